@@ -3,3 +3,11 @@ from ._pydvpl import (
     verify_dvpl,
     cli
 )
+from .api import (
+    DVPLOptions,
+    FileResult,
+    ProgressSink,
+    CallbackProgress,
+    iter_results,
+    run_dvpl
+)
@@ -0,0 +1,5 @@
+from ._pydvpl import cli
+
+
+if __name__ == "__main__":
+    cli()
@@ -2,20 +2,26 @@ import argparse
 import time
 import os
 import sys
-import requests
-from pathlib import Path
 from functools import partial
-from packaging import version
 
-PYDVPL_DIR = os.path.dirname(os.path.abspath(__file__))
-sys.path.append(os.path.dirname(PYDVPL_DIR))
-
-from pydvpl.version import __version__, __description__, __title__, __repo__, __author__, __license__
-from pydvpl.dvpl import compress_dvpl, decompress_dvpl, __LZ4_VERSION__
-from pydvpl.color import Color
+# Only what compress/decompress/verify need is imported here; everything else
+# (requests, packaging, json, thread pools, bench) is imported where it is used
+# to keep per-invocation startup low for build scripts.
+from .version import __version__, __description__, __title__, __repo__, __author__, __license__
+from .dvpl import compress_stream, decompress_stream, verify_stream, __LZ4_VERSION__
+from .color import Color
+from .walker import compile_ignore, collect_files, is_sidecar_path
+from .bundle import pack_dvpl_bundle, unpack_dvpl_bundle, select_bundle_sources, BUNDLE_EXTENSION
+from .policy import compression_policy, parse_compression_overrides
+from .api import iter_results, resolve_workers, ProgressSink
+from .progress import TerminalProgress
+from .footers import read_footers, check_footers
 
 
 def meta_info():
+    import requests
+    from packaging import version
+
     NAME = __title__
     VERSION = __version__
     LZ4_VERSION = __LZ4_VERSION__
@@ -85,191 +91,342 @@ def brand_ascii():
     print(f'{Color.RESET}')
 
 
-def print_remaining_time(processed_files, total_files, start_time):
-    elapsed_time = time.time() - start_time
-    if processed_files > 0:
-        avg_processing_time_per_file = elapsed_time / processed_files
-        remaining_files = total_files - processed_files
-        remaining_time = remaining_files * avg_processing_time_per_file
-        if remaining_time < 1:
-            print(f" | Remaining time: {Color.GREEN}{int(remaining_time * 1000)} ms{Color.RESET}", end='')
-        elif remaining_time < 60:
-            print(f" | Remaining time: {Color.YELLOW}{int(remaining_time)} s{Color.RESET}", end='')
-        elif remaining_time < 3600:
-            print(f" | Remaining time: {Color.ORANGE}{int(remaining_time / 60)} min(s){Color.RESET}\r", end='')
+def is_dvpl_path(file_path):
+    return file_path.endswith(".dvpl")
+
+
+def print_results(directory_or_file, config, total_files=None, processed_files=None, start_time=None, metrics=None, dedup=None, failures=None):
+    # The API walks, journals and commits; the CLI only renders what comes back
+    if os.path.isdir(directory_or_file):
+        progress = TerminalProgress(start_time=start_time, done=processed_files or 0, total=total_files or 0)
+    else:
+        progress = ProgressSink()
+
+    success_count = 0
+    failure_count = 0
+    ignored_count = 0
+    for result in iter_results(directory_or_file, config, progress, metrics, dedup):
+        print_file_result(result, config)
+        if result.status == "ok":
+            success_count += 1
+        elif result.status == "failed":
+            failure_count += 1
+            if failures is not None:
+                failures.append({"path": result.path, "error": result.error_kind, "message": str(result.error)})
         else:
-            print(f" | Remaining time: {Color.RED}{int(remaining_time / 3600)} hour(s){Color.RESET}", end='')
+            ignored_count += 1
+
+    return success_count, failure_count, ignored_count
+
+
+def convert_dvpl(directory_or_file, config, total_files=None, processed_files=None, start_time=None, metrics=None):
+    dedup = None
+    if config.mode == "compress" and getattr(config, "dedup", None) and os.path.isdir(directory_or_file):
+        from .dedup import DedupIndex
 
+        dedup = DedupIndex(config.dedup)
 
-def print_progress_bar_with_time(processed_files, total_files, start_time):
+    results = print_results(directory_or_file, config, total_files, processed_files, start_time, metrics, dedup)
 
-        progress = min(processed_files / total_files, 1.0)  # Ensure progress doesn't exceed 100%
-        bar_length = 50
-        filled_length = int(bar_length * progress)
-        gap_length = 1  # Adjust gap length as needed
-        if filled_length < bar_length:  # If progress is less than 100%
-            gap_bar = f'{Color.GREY} {Color.RESET}' * gap_length
+    if dedup is not None:
+        summary = dedup.summary()
+        print(f"\n\n{'Deduplicated:':<12} {Color.GREEN}{summary['files']}{Color.RESET} file(s) in {summary['groups']} group(s), "
+              f"{summary['bytes']} bytes not re-encoded, {summary['disk_bytes']} bytes shared on disk ({', '.join(f'{method}: {count}' for method, count in summary['methods'].items()) or 'none'})", end='')
+
+    return results
+
+
+def print_file_result(result, config):
+    if not config.verbose:
+        return
+
+    if result.status == "ok":
+        if config.mode == "verify":
+            print(f"{Color.GREEN}\nVerified{Color.RESET} file {result.path} as a valid .dvpl file.")
         else:
-            gap_bar = ''
-        filled_bar = f'{Color.GREEN}━{Color.RESET}' * filled_length
-        unfilled_bar = f'{Color.GREY}━{Color.RESET}' * (bar_length - filled_length - gap_length)
-        bar = filled_bar + gap_bar + unfilled_bar
-        percentage = progress * 100
-        sys.stdout.write('\rProcessing: [{:<50}] {:.2f}%'.format(bar, percentage))
-        sys.stdout.flush()
-        print_remaining_time(processed_files, total_files, start_time)
+            print(f"{Color.GREEN}\nFile{Color.RESET} {result.path} has been successfully {Color.GREEN}{config.mode}ed{Color.RESET} into {Color.GREEN}{result.output}{Color.RESET}")
+    elif result.status == "failed":
+        print(f"{Color.RED}\nError{Color.RESET} {'verifying' if config.mode == 'verify' else 'processing'} file {result.path}: {result.error}")
+    elif result.status == "skipped":
+        print(f"{Color.GREY}\nSkipping{Color.RESET} unchanged file {result.path}")
+    else:
+        print(f"{Color.YELLOW}\nIgnoring{Color.RESET} file {result.path}")
 
 
-def count_total_files(directory):
-    total_files = 0
-    for path in Path(directory).rglob('*'):
-        if path.is_file():
-            total_files += 1
-    return total_files
+def verify_dvpl(directory_or_file, config, total_files=None, processed_files=None, start_time=None, metrics=None):
+    failures = []
+    results = print_results(directory_or_file, config, total_files, processed_files, start_time, metrics, failures=failures)
 
+    if getattr(config, "verify_report", None):
+        write_verify_report(config.verify_report, config, results, failures)
 
+    return results
 
-def convert_dvpl(directory_or_file, config, total_files=None, processed_files=None, start_time=None):
-    if total_files is None:
-        total_files = count_total_files(directory_or_file)
-    if processed_files is None:
-        processed_files = 0
-    if start_time is None:
-        start_time = time.time()
 
-    success_count = 0
-    failure_count = 0
-    ignored_count = 0
+def write_verify_report(report_path, config, results, failures):
+    import json
+
+    success_count, failure_count, ignored_count = results
+    report = {
+        "path": str(config.path),
+        "level": getattr(config, "verify_level", "full"),
+        "succeeded": success_count,
+        "failed": failure_count,
+        "ignored": ignored_count,
+        "failures": sorted(failures, key=lambda failure: failure["path"]),
+    }
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def info_dvpl(directory_or_file, config, workers=None):
+    if workers is None:
+        workers = resolve_workers(getattr(config, "jobs", 1))
 
     if not os.path.exists(directory_or_file):
         raise FileNotFoundError(f"File or directory '{directory_or_file}' not found.")
 
-    if Path(directory_or_file).is_dir():
-        for file_path in Path(directory_or_file).rglob('*'):
-            if file_path.is_file():
-                succ, fail, ignored = convert_dvpl(str(file_path), config, total_files, processed_files, start_time)  # Convert WindowsPath to string
-                success_count += succ
-                failure_count += fail
-                ignored_count += ignored
-                processed_files += 1
-                print_progress_bar_with_time(processed_files, total_files, start_time)
+    should_ignore = compile_ignore(config.ignore)
+    if os.path.isdir(directory_or_file):
+        work_files, ignored_files = collect_files(directory_or_file, should_ignore, is_dvpl_path)
     else:
-        is_decompression = config.mode == "decompress" and str(directory_or_file).endswith(".dvpl")  # Convert WindowsPath to string
-        is_compression = config.mode == "compress" and not str(directory_or_file).endswith(".dvpl")  # Convert WindowsPath to string
-
-        ignore_extensions = config.ignore.split(",") if config.ignore else []
-        should_ignore = any(str(directory_or_file).endswith(ext) for ext in ignore_extensions)  # Convert WindowsPath to string
-
-        if not should_ignore and (is_decompression or is_compression):
-            file_path = str(directory_or_file)  # Convert WindowsPath to string
-            try:
-                # Check if the file exists before attempting to open it
-                if os.path.exists(file_path):
-                    with open(file_path, "rb") as f:
-                        file_data = f.read()
-
-                    if is_compression:
-                        if config.compression == "fast":
-                            processed_block = compress_dvpl(file_data, "fast")
-                        elif config.compression == "hc":
-                            processed_block = compress_dvpl(file_data, "hc")
-                        else:
-                            processed_block = compress_dvpl(file_data)
-                        new_name = file_path + ".dvpl"
-                    else:
-                        processed_block = decompress_dvpl(file_data)
-                        new_name = os.path.splitext(file_path)[0]
-
-                    with open(new_name, "wb") as f:
-                        f.write(processed_block)
-
-                    if not config.keep_originals:
-                        os.remove(file_path)
-
-                    success_count += 1
-                    if config.verbose:
-                            print(f"{Color.GREEN}\nFile{Color.RESET} {file_path} has been successfully {Color.GREEN}{'compressed' if is_compression else 'decompressed'}{Color.RESET} into {Color.GREEN}{new_name}{Color.RESET}")
-                else:
-                    if config.verbose:
-                            print(f"{Color.RED}\nError{Color.RESET}: File {file_path} does not exist.")
-                    failure_count += 1
-            except Exception as e:
-                failure_count += 1
-                if config.verbose:
-                        print(f"{Color.RED}\nError{Color.RESET} processing file {file_path}: {e}")
-        else:
-            ignored_count += 1
-            if config.verbose:
-                    print(f"{Color.YELLOW}\nIgnoring{Color.RESET} file {directory_or_file}")
+        file_path = os.fspath(directory_or_file)
+        accepted = is_dvpl_path(file_path) and not should_ignore(file_path)
+        work_files, ignored_files = ([file_path], []) if accepted else ([], [file_path])
 
-    return success_count, failure_count, ignored_count
+    if config.verbose:
+        for file_path in ignored_files:
+            print(f"{Color.YELLOW}\nIgnoring{Color.RESET} file {file_path}")
 
-def verify_dvpl(directory_or_file, config, total_files=None, processed_files=None, start_time=None):
-    if total_files is None:
-        total_files = count_total_files(directory_or_file)
-    if processed_files is None:
-        processed_files = 0
-    if start_time is None:
-        start_time = time.time()
+    # Footers are read into one table and checked as columns instead of file by file
+    table = read_footers(work_files, workers)
+    entries = table.to_entries()
+    summary = summarize_dvpl_entries(entries)
+    summary["anomalies"] = check_footers(table)
 
-    success_count = 0
-    failure_count = 0
-    ignored_count = 0
+    if getattr(config, "format", "table") == "json":
+        import json
 
-    if not os.path.exists(directory_or_file):
-        raise FileNotFoundError(f"File or directory '{directory_or_file}' not found.")
+        print(json.dumps(summary, indent=2))
+    else:
+        print_info_table(summary, config)
+
+    return len(entries) - summary["errors"], summary["errors"], len(ignored_files)
+
+
+def compression_ratio(original_size, compressed_size):
+    return round(compressed_size / original_size, 4) if original_size else 0.0
+
+
+def summarize_dvpl_entries(entries):
+    files = sorted(entries, key=lambda entry: entry["path"])
+    extensions = {}
+    total = {"files": 0, "original_size": 0, "compressed_size": 0}
+
+    for entry in files:
+        if "error" in entry:
+            continue
+        extension = os.path.splitext(entry["path"][:-len(".dvpl")])[1].lower() or "(none)"
+        bucket = extensions.setdefault(extension, {"files": 0, "original_size": 0, "compressed_size": 0})
+        for stats in (bucket, total):
+            stats["files"] += 1
+            stats["original_size"] += entry["original_size"]
+            stats["compressed_size"] += entry["compressed_size"]
+
+    for stats in list(extensions.values()) + [total]:
+        stats["ratio"] = compression_ratio(stats["original_size"], stats["compressed_size"])
+
+    return {
+        "files": files,
+        "extensions": dict(sorted(extensions.items())),
+        "total": total,
+        "errors": sum(1 for entry in files if "error" in entry),
+    }
+
+
+def print_info_table(summary, config):
+    if config.verbose:
+        for entry in summary["files"]:
+            if "error" in entry:
+                print(f"{Color.RED}Error{Color.RESET} {entry['path']}: {entry['error']}")
+            else:
+                print(f"{entry['path']}  original={entry['original_size']} compressed={entry['compressed_size']} crc32={entry['crc32']:08x} type={entry['type']}")
+        print()
+
+    header = f"{'Extension':<16} {'Files':>8} {'Original':>16} {'Compressed':>16} {'Ratio':>8}"
+    print(f"{Color.BLUE}{header}{Color.RESET}")
+    print(f"{Color.GREY}{'-' * len(header)}{Color.RESET}")
+    for extension, stats in summary["extensions"].items():
+        print(f"{extension:<16} {stats['files']:>8} {stats['original_size']:>16} {stats['compressed_size']:>16} {stats['ratio']:>8.4f}")
+    print(f"{Color.GREY}{'-' * len(header)}{Color.RESET}")
+    total = summary["total"]
+    print(f"{Color.GREEN}{'Total':<16}{Color.RESET} {total['files']:>8} {total['original_size']:>16} {total['compressed_size']:>16} {total['ratio']:>8.4f}")
+
+    # Unreadable footers are not in any row, without this line they would just vanish from the totals
+    if summary["errors"]:
+        print(f"{Color.RED}\nErrors{Color.RESET} {summary['errors']} file(s) have no readable footer{'' if config.verbose else ', use -v to list them'}")
+
+    anomalies = summary.get("anomalies")
+    if anomalies and anomalies["files"]:
+        counts = ", ".join(f"{kind}={count}" for kind, count in anomalies["counts"].items() if count)
+        print(f"{Color.YELLOW}\nAnomalies{Color.RESET} {counts}")
+        if config.verbose:
+            for anomaly in anomalies["files"]:
+                print(f"{Color.YELLOW}{anomaly['kind']}{Color.RESET} {anomaly['path']}")
+
+
+def pack_dvpl(directory, config, workers=None):
+    if workers is None:
+        workers = resolve_workers(getattr(config, "jobs", 1))
+
+    if not os.path.isdir(directory):
+        raise NotADirectoryError(f"Directory '{directory}' not found.")
 
-    if Path(directory_or_file).is_dir():
-        for file_path in Path(directory_or_file).rglob('*'):
-            if file_path.is_file():
-                succ, fail, ignored = verify_dvpl(str(file_path), config, total_files, processed_files, start_time)  # Convert WindowsPath to string
-                success_count += succ
-                failure_count += fail
-                ignored_count += ignored
-                processed_files += 1
-                print_progress_bar_with_time(processed_files, total_files, start_time)
+    bundle_path = config.output or os.path.abspath(directory) + BUNDLE_EXTENSION
+
+    def is_bundle_source(file_path):
+        # Neither are the tool's own sidecars nor an earlier bundle written into the tree
+        return not is_sidecar_path(file_path) and os.path.abspath(file_path) != os.path.abspath(bundle_path)
+
+    work_files, ignored_files = collect_files(directory, compile_ignore(config.ignore), is_bundle_source)
+    # Resolved before anything is compressed, so a kept source never collides with its .dvpl halfway through the pack
+    work_files, shadowed_files = select_bundle_sources(work_files, directory)
+    if config.verbose:
+        for file_path in shadowed_files:
+            print(f"{Color.YELLOW}\nIgnoring{Color.RESET} file {file_path}, packing its .dvpl instead")
+    ignored_files += shadowed_files
+    policy = compression_policy(config.compression or "default", config.compression_override)
+    packed_count = pack_dvpl_bundle(work_files, directory, bundle_path, policy, workers)
+
+    if config.verbose:
+        print(f"{Color.GREEN}\nPacked{Color.RESET} {packed_count} file(s) into {Color.GREEN}{bundle_path}{Color.RESET}")
+
+    return packed_count, 0, len(ignored_files)
+
+
+def unpack_dvpl(bundle_path, config):
+    if not os.path.isfile(bundle_path):
+        raise FileNotFoundError(f"Bundle '{bundle_path}' not found.")
+
+    output_directory = config.output or os.path.splitext(bundle_path)[0]
+    fsync = getattr(config, "fsync", "batch")
+    extracted_files = unpack_dvpl_bundle(bundle_path, output_directory, fsync=fsync == "always")
+    unpacked_count = len(extracted_files)
+
+    if not config.keep_originals and extracted_files:
+        from .journal import CommitQueue
+
+        # One batch, so the bundle is deleted only once every entry extracted from it is durable
+        CommitQueue(fsync).commit([(bundle_path, file_path) for file_path in extracted_files])
+    elif not config.keep_originals:
+        os.remove(bundle_path)
+
+    if config.verbose:
+        print(f"{Color.GREEN}\nUnpacked{Color.RESET} {unpacked_count} file(s) into {Color.GREEN}{output_directory}{Color.RESET}")
+
+    return unpacked_count, 0, 0
+
+
+def bench_dvpl(config):
+    import json
+    from .bench import run_benchmark, BENCH_MODES, BENCH_IO
+
+    jobs = resolve_workers(config.jobs if config.jobs_explicit else 0)
+    workers = (1, jobs) if jobs > 1 else (1,)
+    modes = (config.compression,) if config.compression else BENCH_MODES
+    io = (config.io,) if config.io_explicit else BENCH_IO
+
+    report = run_benchmark(config.corpus, modes=modes, workers=workers, io=io)
+
+    if config.output:
+        with open(config.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
     else:
-        is_dvpl_file = str(directory_or_file).endswith(".dvpl")  # Convert WindowsPath to string
-        ignore_extensions = config.ignore.split(",") if config.ignore else []
-        should_ignore = any(str(directory_or_file).endswith(ext) for ext in ignore_extensions)  # Convert WindowsPath to string
-
-        if not should_ignore and is_dvpl_file:
-            file_path = str(directory_or_file)  # Convert WindowsPath to string
-            try:
-                # Check if the file exists before attempting to open it
-                if os.path.exists(file_path):
-                    with open(file_path, "rb") as f:
-                        file_data = f.read()
-
-                    try:
-                        success_count += 1
-                        if config.verbose:
-                                print(f"{Color.GREEN}\nVerified{Color.RESET} file {file_path} as a valid .dvpl file.")
-                    except Exception as e:
-                        failure_count += 1
-                        if config.verbose:
-                                print(f"{Color.RED}\nError{Color.RESET} verifying file {file_path}: {e}")
-                else:
-                    if config.verbose:
-                            print(f"{Color.RED}\nError{Color.RESET}: File {file_path} does not exist.")
-                    failure_count += 1
-            except Exception as e:
-                failure_count += 1
-                if config.verbose:
-                        print(f"{Color.RED}\nError{Color.RESET} processing file {file_path}: {e}")
+        print(json.dumps(report, indent=2))
+
+    failed = sum(1 for result in report["results"] if not result["roundtrip_ok"])
+    return len(report["results"]) - failed, failed, 0
+
+
+def serve_dvpl(config):
+    from .serve import DVPLServer
+
+    workers = resolve_workers(config.jobs if config.jobs_explicit else 0)
+    with DVPLServer(workers, config.compression or "default", config.io == "mmap") as server:
+        if config.socket:
+            print(f"Serving on {config.socket} with {workers} worker(s)", file=sys.stderr)
+            server.serve_socket(config.socket)
         else:
-            ignored_count += 1
-            if config.verbose:
-                    print(f"{Color.YELLOW}\nIgnoring{Color.RESET} file {directory_or_file}")
-    
-    return success_count, failure_count, ignored_count
+            server.serve_stream()
+
+    return 0, 0, 0
+
+
+def sync_dvpl(config, workers=None):
+    from .sync import sync_trees
+
+    if workers is None:
+        workers = resolve_workers(getattr(config, "jobs", 1))
 
+    policy = compression_policy(config.compression or "default", config.compression_override)
+    compression = config.compression or "default"
+    if config.compression_override:
+        compression += "|" + config.compression_override
+    progress = TerminalProgress()
+    summary = sync_trees(config.src, config.dst, policy, config.ignore, config.prune, workers, config.io == "mmap", progress, compression)
 
-def process_mode(directory_or_file, config):
-    if config.mode in ["compress", "decompress"]:
-        return convert_dvpl(directory_or_file, config)
+    if config.verbose:
+        for failure in summary["failures"]:
+            print(f"{Color.RED}\nError{Color.RESET} syncing file {failure['path']}: {failure['message']}")
+
+    print(f"\n\n{Color.BLUE}Sync Finished!{Color.RESET}\n")
+    print(f"{Color.GREEN}{'-' * 10}{Color.RESET} {Color.GREEN}Summary{Color.RESET} {Color.GREEN}{'-' * 10}{Color.RESET}\n")
+    print(f"{'Added:':<12} {Color.GREEN}{summary['added']}{Color.RESET}")
+    print(f"{'Updated:':<12} {Color.GREEN}{summary['updated']}{Color.RESET}")
+    print(f"{'Unchanged:':<12} {Color.BLUE}{summary['unchanged']}{Color.RESET}")
+    print(f"{'Pruned:':<12} {Color.YELLOW}{summary['pruned']}{Color.RESET}")
+    print(f"{'Failed:':<12} {Color.RED}{summary['failed']}{Color.RESET}")
+    print(f"{'Ignored:':<12} {Color.YELLOW}{summary['ignored']}{Color.RESET}")
+
+    return summary["added"] + summary["updated"], summary["failed"], summary["unchanged"] + summary["ignored"]
+
+
+def stream_dvpl(config, src=None, dst=None):
+    src = src if src is not None else sys.stdin.buffer
+    dst = dst if dst is not None else sys.stdout.buffer
+
+    if config.mode == "compress":
+        compress_stream(src, dst, compression_policy(config.compression or "default", config.compression_override))
+    elif config.mode == "decompress":
+        decompress_stream(src, dst)
     elif config.mode == "verify":
-        return verify_dvpl(directory_or_file, config)
+        verify_stream(src, getattr(config, "verify_level", "full") == "full")
+    else:
+        raise ValueError(f"Mode '{config.mode}' cannot read from standard input.")
+
+    dst.flush()
+    return 1, 0, 0
+
+
+def process_mode(directory_or_file, config, metrics=None):
+    if config.mode == "serve":
+        return serve_dvpl(config)
+    elif config.mode == "sync":
+        return sync_dvpl(config)
+    elif directory_or_file == "-":
+        return stream_dvpl(config)
+    elif config.mode in ["compress", "decompress"]:
+        return convert_dvpl(directory_or_file, config, metrics=metrics)
+    elif config.mode == "verify":
+        return verify_dvpl(directory_or_file, config, metrics=metrics)
+    elif config.mode == "info":
+        return info_dvpl(directory_or_file, config)
+    elif config.mode == "bench":
+        return bench_dvpl(config)
+    elif config.mode == "pack":
+        return pack_dvpl(directory_or_file, config)
+    elif config.mode == "unpack":
+        return unpack_dvpl(directory_or_file, config)
     elif config.mode == "help":
         print_help_message()
         return 0, 0, 0
@@ -293,16 +450,58 @@ def confirm_upgrade():
 def parse_command_line_args():
     parser = argparse.ArgumentParser()
     parser.add_argument("-m", "--mode",
-                        help="mode can be 'c' or 'compress' / 'd' or 'decompress' / 'v' or 'verify' / 'h' or 'help' (for an extended help guide).")
+                        help="mode can be 'c' or 'compress' / 'd' or 'decompress' / 'v' or 'verify' / 'n' or 'info' / 'b' or 'pack' / 'u' or 'unpack' / 's' or 'sync' / 'bench' / 'serve' / 'h' or 'help' (for an extended help guide).")
     parser.add_argument("-k", "--keep-originals", action="store_true",
                         help="keep original files after compression/decompression.")
     parser.add_argument("-v", "--verbose", action="store_true",
                         help="shows verbose information for all processed files.")
-    parser.add_argument("-p", "--path", help="directory/files path to process. Default is the current directory.")
+    parser.add_argument("-p", "--path", help="directory/files path to process. Use '-' to read from stdin and write to stdout. Default is the current directory.")
+    parser.add_argument("-o", "--output",
+                        help=f"output path for 'pack' (bundle file, default is the directory name + '{BUNDLE_EXTENSION}') and 'unpack' (directory, default is the bundle name without extension).")
+    parser.add_argument("--src",
+                        help="source tree of plain files for 'sync' mode.")
+    parser.add_argument("--dst",
+                        help="mirrored .dvpl tree for 'sync' mode, created if missing.")
+    parser.add_argument("--prune", action="store_true",
+                        help="delete .dvpl files in --dst that no longer have a source. Only available for 'sync' mode.")
     parser.add_argument("-i", "--ignore", default="",
                         help="Comma-separated list of file extensions to ignore during compression.")
-    parser.add_argument("-c", "--compression", choices=['default', 'fast', 'hc'],
-                        help="Select compression level: 'default' for default compression, 'fast' for fast compression, 'hc' for high compression. Only available for 'compress' mode.")
+    parser.add_argument("-c", "--compression", choices=['default', 'fast', 'hc', 'none', 'auto'],
+                        help="Select compression level: 'default' for default compression, 'fast' for fast compression, 'hc' for high compression, 'none' to store files uncompressed, 'auto' to pick per file by trial-compressing a sample. Only available for 'compress' mode.")
+    parser.add_argument("--compression-override", default="",
+                        help="Comma-separated per-extension compression levels that take precedence over --compression, e.g. 'png=none,yaml=hc'.")
+    parser.add_argument("-j", "--jobs", "-t", "--threads", dest="jobs", type=int, default=None,
+                        help="number of parallel workers used for compression/decompression. Use 0 for one worker per CPU core. Default is 1, or one per CPU core for 'bench' and 'serve' modes.")
+    parser.add_argument("--verify-level", choices=['crc', 'full'], default="full",
+                        help="Select verification depth: 'crc' checks the footer, payload size and CRC32, 'full' also LZ4-decodes and checks the original size. Only available for 'verify' mode.")
+    parser.add_argument("--verify-report",
+                        help="write a JSON report of every file that failed verification to the given path. Only available for 'verify' mode.")
+    parser.add_argument("--chunked", action="store_true",
+                        help="use the chunked multi-block encoding: independent LZ4 blocks with a block index, no 4 GiB limit, decoded in bounded memory and with blocks spread over --jobs. The game client cannot read these files. Without it chunked files are rejected.")
+    parser.add_argument("--block-size", type=int, default=4,
+                        help="block size in MiB for --chunked. Default is 4.")
+    parser.add_argument("--report",
+                        help="write a JSON run report with per-phase timings (walk/read/crc/lz4/write/unlink), bytes, per-extension throughput, the slowest files and an error breakdown to the given path. Only available for 'compress', 'decompress' and 'verify' modes.")
+    parser.add_argument("--fsync", choices=['none', 'batch', 'always'], default="batch",
+                        help="Select durability before originals are deleted or outputs are journaled for --resume: 'none' never fsyncs, 'batch' fsyncs outputs in batches before deleting their originals or journaling them, 'always' fsyncs every output before it is renamed into place. Default is batch.")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted directory run from its journal, skipping files that were already committed. Only available for 'compress' and 'decompress' modes.")
+    parser.add_argument("--journal", nargs="?", const="",
+                        help="journal committed files so an interrupted run can be continued with --resume, optionally to the given file. Default is '.pydvpl-journal' in the processed directory.")
+    parser.add_argument("--dedup", choices=['auto', 'copy', 'reflink', 'hardlink'],
+                        help="compress each distinct file content once and write its duplicates from the first output: 'auto' reflinks where the filesystem supports it and copies otherwise, 'copy' always copies, 'reflink' and 'hardlink' fall back to copies. Only available for 'compress' mode on directories.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="skip files that are unchanged since the last compression run, tracked in a manifest file. Requires --keep-originals. Only available for 'compress' mode.")
+    parser.add_argument("--manifest",
+                        help="manifest file used by --incremental. Default is '.pydvpl-manifest.json' in the processed directory.")
+    parser.add_argument("--corpus",
+                        help="directory of sample files for 'bench' mode. Default is a generated, seeded synthetic asset corpus.")
+    parser.add_argument("--socket",
+                        help="Unix socket path for 'serve' mode. Default is to read JSON-lines requests from stdin and answer on stdout.")
+    parser.add_argument("--io", choices=['mmap', 'read'], default=None,
+                        help="Select file I/O strategy: 'mmap' maps input files and avoids payload copies, 'read' loads them with a plain read for filesystems without mmap support.")
+    parser.add_argument("-f", "--format", choices=['table', 'json'], default="table",
+                        help="Select output format for 'info' mode: 'table' for a per-extension summary, 'json' for a machine-readable inventory.")
     parser.add_argument("--version", action="store_true",
                         help="show version information and updates and exit.")
     parser.add_argument("--upgrade", action="store_true",
@@ -327,11 +526,18 @@ def parse_command_line_args():
     if not args.path:
         args.path = os.getcwd()
 
+    if args.jobs is not None and args.jobs < 0:
+        parser.error("Jobs must be 0 (one per CPU core) or a positive number of workers.")
+
     # Map short forms to full mode names
     mode_mapping = {
         'c': 'compress',
         'd': 'decompress',
         'v': 'verify',
+        'n': 'info',
+        'b': 'pack',
+        'u': 'unpack',
+        's': 'sync',
         'h': 'help'
     }
 
@@ -340,22 +546,107 @@ def parse_command_line_args():
         args.mode = mode_mapping[args.mode]
 
     # Check if compression option is used with incorrect modes
-    if args.mode not in ['compress', 'c'] and args.compression is not None:
-        parser.error("Compression option is only supported for 'compress' mode.")
+    if args.mode not in ['compress', 'c', 'pack', 'sync', 'bench', 'serve'] and args.compression is not None:
+        parser.error("Compression option is only supported for 'compress', 'pack', 'sync', 'bench' and 'serve' modes.")
+
+    if args.mode == 'sync' and (not args.src or not args.dst):
+        parser.error("Sync mode needs both --src and --dst.")
+
+    if args.mode != 'sync' and (args.src is not None or args.dst is not None or args.prune):
+        parser.error("Src, dst and prune options are only supported for 'sync' mode.")
+
+    if args.incremental and args.mode != 'compress':
+        parser.error("Incremental option is only supported for 'compress' mode.")
+
+    if args.socket is not None and args.mode != 'serve':
+        parser.error("Socket option is only supported for 'serve' mode.")
+
+    if args.output is not None and args.mode not in ['pack', 'unpack', 'bench']:
+        parser.error("Output option is only supported for 'pack', 'unpack' and 'bench' modes.")
+
+    if args.compression_override:
+        if args.mode not in ['compress', 'pack', 'sync']:
+            parser.error("Compression override option is only supported for 'compress', 'pack' and 'sync' modes.")
+        try:
+            parse_compression_overrides(args.compression_override)
+        except ValueError as e:
+            parser.error(str(e))
+
+    # Bench compares both I/O strategies unless one is picked explicitly
+    args.io_explicit = args.io is not None
+    if args.io is None:
+        args.io = "mmap"
+    # bench and serve default to every core, an explicit --jobs 1 still means one worker
+    args.jobs_explicit = args.jobs is not None
+    if args.jobs is None:
+        args.jobs = 1
+
+    if args.path == "-" and args.mode in ['pack', 'unpack']:
+        parser.error("Pack and unpack modes cannot stream from stdin.")
+
+    if args.chunked and args.mode not in ['compress', 'decompress', 'verify']:
+        parser.error("Chunked option is only supported for 'compress', 'decompress' and 'verify' modes.")
+
+    if args.chunked and (args.path == "-" or args.incremental):
+        parser.error("Chunked option cannot be combined with streaming or --incremental.")
+
+    if not 0 < args.block_size <= 2016:
+        parser.error("Block size must be between 1 and 2016 MiB.")
+
+    if (args.resume or args.journal is not None) and (args.mode not in ['compress', 'decompress'] or args.path == "-"):
+        parser.error("Resume and journal options are only supported for 'compress' and 'decompress' modes on directories.")
+
+    # Duplicates only exist between files, so a single file or a stream has nothing to dedup
+    if args.dedup is not None and (args.mode != 'compress' or not os.path.isdir(args.path)):
+        parser.error("Dedup option is only supported for 'compress' mode on directories.")
+
+    if args.incremental and args.path == "-":
+        parser.error("Incremental option is not supported when streaming from stdin.")
+
+    if args.incremental and not args.keep_originals:
+        parser.error("Incremental compression needs the source files, use it together with --keep-originals.")
+
+    if args.mode != 'verify' and args.verify_report is not None:
+        parser.error("Verify report option is only supported for 'verify' mode.")
+
+    if args.report is not None and (args.mode not in ['compress', 'decompress', 'verify'] or args.path == "-"):
+        parser.error("Report option is only supported for 'compress', 'decompress' and 'verify' modes on files and directories.")
 
     return args
 
 
 def print_help_message():
-    print('''$ pydvpl [--mode] [--keep-originals] [--path] [--verbose] [--ignore] [--threads]
+    print('''$ pydvpl [--mode] [--keep-originals] [--path] [--verbose] [--ignore] [--jobs]
 
     • flags can be one of the following:
 
         -m, --mode: required flag to select modes for processing.
         -k, --keep-originals: keeps the original files after compression/decompression.
-        -p, --path: specifies the directory/files path to process. Default is the current directory.
-        -i, --ignore: specifies comma-separated (file extensions/file names/matching extentions or file names) to ignore during compression.
+        -p, --path: specifies the directory/files path to process. Use - to stream stdin to stdout. Default is the current directory.
+        -i, --ignore: specifies comma-separated (file extensions/file names/matching extentions or file names/glob patterns such as *.png or cache_*) to ignore during compression.
         -v, --verbose: shows verbose information for all processed files.
+        -j, --jobs: specifies the number of parallel workers (alias -t, --threads). 0 uses every CPU core. Default is 1, or every CPU core for bench and serve modes.
+        --verify-level: verification depth, 'crc' (footer, size and CRC32) or 'full' (also LZ4-decodes). Default is full.
+        --verify-report: writes a JSON report of the files that failed verification.
+        --report: writes a JSON run report with per-phase timings, bytes, per-extension throughput, slowest files and errors.
+        -o, --output: bundle file for pack mode, output directory for unpack mode, JSON report for bench mode.
+        -f, --format: output format for info mode, 'table' or 'json'. Default is table.
+        -c, --compression: compression level, 'default', 'fast', 'hc', 'none' (store raw) or 'auto' (picked per file). Default is default.
+        --compression-override: per-extension compression levels, e.g. png=none,yaml=hc.
+        --chunked: uses the chunked multi-block encoding (parallel blocks, no 4 GiB limit). Not readable by the game client.
+        --block-size: block size in MiB for --chunked. Default is 4.
+        --fsync: durability policy, 'none', 'batch' (fsync outputs in batches before deleting originals or journaling them for --resume) or 'always' (fsync every output). Default is batch.
+        --resume: continues an interrupted directory run from its journal without walking or redoing committed files.
+        --journal: journals committed files so an interrupted run can be resumed, optionally to the given file. Default is .pydvpl-journal in the processed directory.
+        --dedup: compresses identical files once and reflinks, hardlinks or copies the other outputs ('auto', 'copy', 'reflink', 'hardlink').
+        --incremental: only compresses files changed since the last run, tracked in a manifest (requires --keep-originals).
+        --manifest: manifest file used by --incremental. Default is .pydvpl-manifest.json in the processed directory.
+        --io: file I/O strategy, 'mmap' (zero-copy) or 'read' (plain reads). Default is mmap.
+        --src: source tree of plain files for sync mode.
+        --dst: mirrored .dvpl tree for sync mode.
+        --prune: deletes .dvpl files in --dst whose source is gone (sync mode).
+        --socket: unix socket path for serve mode. Default is stdin/stdout.
+        --corpus: sample directory for bench mode. Default is a generated synthetic corpus.
         --version: check version info/update and meta info.
         --upgrade: update to the latest version.
 
@@ -364,6 +655,12 @@ def print_help_message():
         c, compress: compresses files into dvpl.
         d, decompress: decompresses dvpl files into standard files.
         v, verify: verify compressed dvpl files to determine valid compression.
+        n, info: list original/compressed sizes, crc and type of dvpl files by reading only their footers, and flag anomalous footers.
+        b, pack: packs a directory into one indexed .dvplb bundle of dvpl entries.
+        u, unpack: extracts a .dvplb bundle back into standard .dvpl files.
+        s, sync: mirrors a source tree into a .dvpl tree, compressing only new or changed files (tracked in a .pydvpl-manifest.json inside --dst).
+        serve: runs a long-lived worker that takes JSON-lines compress/decompress/verify batches on stdin or a unix socket.
+        bench: benchmarks compression modes, worker counts and I/O strategies and prints a JSON report.
         h, help: show this help message.
 
     • usage can be one of the following examples:
@@ -398,13 +695,59 @@ def print_help_message():
 
         $ pydvpl --mode compress --path /path/to/decompress --ignore test_test.exe,test_test.txt
 
+        $ pydvpl --mode compress --path /path/to/decompress --ignore "*.png,cache_*"
+
         $ pydvpl --mode verify -path /path/to/verify
 
         $ pydvpl --mode verify -path /path/to/verify/verify.yaml.dvpl
+
+        $ pydvpl --mode verify --path /path/to/verify --verify-level crc --jobs 0 --verify-report failures.json
+
+        $ pydvpl --mode compress --path /path/to/decompress --jobs 0 --report run.json
+
+        $ pydvpl --mode compress --chunked --block-size 8 --jobs 0 --path /path/to/huge.bundle
+
+        $ pydvpl --mode decompress --chunked --jobs 0 --path /path/to/huge.bundle.dvpl
+
+        $ pydvpl --mode compress --path /path/to/decompress --jobs 0 --journal
+
+        $ pydvpl --mode compress --path /path/to/decompress --jobs 0 --resume
+
+        $ pydvpl --mode compress --path /path/to/assets --compression hc --dedup auto --report run.json
+
+        $ pydvpl --mode compress --keep-originals --incremental --path /path/to/decompress --compression hc
+
+        $ cat compress.yaml | pydvpl --mode compress --path - > compress.yaml.dvpl
+
+        $ ssh host cat compress.yaml.dvpl | pydvpl --mode decompress --path - > compress.yaml
+
+        $ pydvpl --mode pack --path /path/to/configs --output configs.dvplb --compression hc
+
+        $ pydvpl --mode unpack --keep-originals --path configs.dvplb --output /path/to/configs
+
+        $ pydvpl --mode sync --src /path/to/assets --dst /path/to/mirror --prune --jobs 0
+
+        $ pydvpl --mode serve --jobs 0 --socket /tmp/pydvpl.sock
+
+        $ echo '{"id": 1, "jobs": [{"op": "compress", "path": "a.yaml"}, {"op": "verify", "path": "b.yaml.dvpl"}]}' | pydvpl --mode serve
+
+        $ pydvpl --mode bench --jobs 0 --output bench.json
+
+        $ pydvpl --mode bench --corpus /path/to/sample --compression hc --io mmap
+
+        $ pydvpl --mode info --path /path/to/inventory
+
+        $ pydvpl --mode info --path /path/to/inventory --format json > inventory.json
         
         $ pydvpl --mode compress --path /path/to/decompress/compress.yaml --compression hc
         
         $ pydvpl --mode compress --path /path/to/decompress/ --compression fast
+
+        $ pydvpl --mode compress --path /path/to/decompress/ --compression hc --jobs 0
+
+        $ pydvpl --mode compress --path /path/to/decompress/ --compression auto --compression-override sc2=hc,tex=none
+
+        $ pydvpl --mode decompress --path /path/to/decompress/ --jobs 8
     ''')
 
 
@@ -423,12 +766,32 @@ def cli():
     start_time = time.time()
     config = parse_command_line_args()
 
-    brand_ascii()
+    if config.path == "-" or config.mode == "serve":
+        # stdout carries the payload or the protocol, so no banner or summary
+        try:
+            process_mode(config.path, config)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    # Keep stdout clean for machine-readable output and for build scripts capturing it
+    machine_output = (config.mode == "info" and config.format == "json") or (config.mode == "bench" and not config.output)
+    if not machine_output and sys.stdout.isatty():
+        brand_ascii()
+
+    metrics = None
+    if config.report:
+        from .metrics import RunMetrics
+
+        metrics = RunMetrics(config.mode, resolve_workers(config.jobs))
 
     try:
-        process_func_partial = partial(process_mode, config=config)
+        process_func_partial = partial(process_mode, config=config, metrics=metrics)
 
         results = [process_func_partial(config.path)]
+        if metrics is not None:
+            metrics.write_report(config.report)
 
         success_count = sum(result[0] for result in results)
         failure_count = sum(result[1] for result in results)
@@ -445,6 +808,8 @@ def cli():
             print(f"{'Succeeded:':<12} {Color.GREEN}{success_count}{Color.RESET}")
             print(f"{'Failed:':<12} {Color.RED}{failure_count}{Color.RESET}")
             print(f"{'Ignored:':<12} {Color.YELLOW}{ignored_count}{Color.RESET}\n")
+            if config.report:
+                print(f"{'Run report:':<12} {config.report}\n")
         elif config.mode == "verify":
             print_elapsed_time(time.time() - start_time)
             print(f"{Color.BLUE}Verification Finished!{Color.RESET}\n")
@@ -453,11 +818,24 @@ def cli():
             print(f"{'Succeeded:':<12} {Color.GREEN}{success_count}{Color.RESET}")
             print(f"{'Failed:':<12} {Color.RED}{failure_count}{Color.RESET}")
             print(f"{'Ignored:':<12} {Color.YELLOW}{ignored_count}{Color.RESET}\n")
+            if config.verify_report:
+                print(f"{'Report:':<12} {config.verify_report}\n")
+            if config.report:
+                print(f"{'Run report:':<12} {config.report}\n")
+        elif config.mode in ["pack", "unpack"]:
+            print_elapsed_time(time.time() - start_time)
+            print(f"{Color.BLUE}{'Packing' if config.mode == 'pack' else 'Unpacking'} Finished!{Color.RESET}\n")
+            print(f"{Color.GREEN}{'-' * 10}{Color.RESET} {Color.GREEN}Summary{Color.RESET} {Color.GREEN}{'-' * 10}{Color.RESET}\n")
+            print(f"{'Entries:':<12} {Color.GREEN}{success_count}{Color.RESET}")
+            print(f"{'Ignored:':<12} {Color.YELLOW}{ignored_count}{Color.RESET}\n")
+        elif config.mode == "sync" or (config.mode == "info" and config.format == "table"):
+            print_elapsed_time(time.time() - start_time)
 
     except Exception as e:
         print(f"{Color.RED}\nError: {e}{Color.RESET}\n")
         sys.exit(1)
 
+    # Let CI pipelines fail on broken packs
+    if config.mode == "verify" and failure_count:
+        sys.exit(1)
 
-if __name__ == "__main__":
-    cli()
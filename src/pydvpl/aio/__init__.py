@@ -0,0 +1,7 @@
+from ._aio import (
+    compress_file,
+    decompress_file,
+    verify_file,
+    read_file,
+    convert_tree
+)
\ No newline at end of file
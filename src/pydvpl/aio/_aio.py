@@ -0,0 +1,117 @@
+import asyncio
+from functools import partial
+from ..dvpl import compress_dvpl_file, decompress_dvpl_file, verify_dvpl_file, read_dvpl_file
+from ..policy import compression_policy
+from ..journal import CommitQueue
+from ..walker import collect_files, compile_ignore, is_sidecar_path
+
+
+async def run_blocking(func, *args, executor=None):
+    # Disk I/O and LZ4 both run on the executor, the event loop only awaits the result
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(func, *args))
+
+
+def remove_original(path, output):
+    # The original is deleted only once its output is durable
+    with CommitQueue() as committer:
+        committer.add(path, output)
+
+
+def compress_and_cleanup(path, output, compression, keep_originals, use_mmap):
+    footer_data = compress_dvpl_file(path, output, compression, use_mmap)
+    if not keep_originals:
+        remove_original(path, output)
+    return footer_data
+
+
+def decompress_and_cleanup(path, output, keep_originals, use_mmap):
+    footer_data = decompress_dvpl_file(path, output, use_mmap)
+    if not keep_originals:
+        remove_original(path, output)
+    return footer_data
+
+
+async def compress_file(path, output=None, compression="default", compression_override=None, keep_originals=True, use_mmap=True, executor=None):
+    output = output or path + ".dvpl"
+    policy = compression_policy(compression, compression_override)
+    return await run_blocking(compress_and_cleanup, path, output, policy, keep_originals, use_mmap, executor=executor)
+
+
+async def decompress_file(path, output=None, keep_originals=True, use_mmap=True, executor=None):
+    if output is None:
+        if not path.endswith(".dvpl"):
+            raise ValueError(f"Cannot derive an output name for '{path}', pass output explicitly.")
+        output = path[:-len(".dvpl")]
+    return await run_blocking(decompress_and_cleanup, path, output, keep_originals, use_mmap, executor=executor)
+
+
+async def verify_file(path, full=True, use_mmap=True, executor=None):
+    return await run_blocking(verify_dvpl_file, path, full, use_mmap, executor=executor)
+
+
+async def read_file(path, use_mmap=True, executor=None):
+    return await run_blocking(read_dvpl_file, path, use_mmap, executor=executor)
+
+
+async def convert_tree(directory, mode, compression="default", compression_override=None, keep_originals=True, ignore="",
+                       concurrency=4, progress=None, use_mmap=True, executor=None):
+    if mode not in ("compress", "decompress", "verify"):
+        raise ValueError(f"Unknown mode '{mode}', expected compress, decompress or verify.")
+
+    def accept(file_path):
+        return file_path.endswith(".dvpl") != (mode == "compress") and not is_sidecar_path(file_path)
+
+    work_files, ignored_files = await run_blocking(collect_files, directory, compile_ignore(ignore), accept, executor=executor)
+    total_files = len(work_files)
+    policy = compression_policy(compression, compression_override)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    inflight = set()
+    results = []
+
+    async def run_tracked(func, *args):
+        # Shielded so cancelling the task does not orphan a thread that is still writing an output
+        future = asyncio.get_running_loop().run_in_executor(executor, partial(func, *args))
+        inflight.add(future)
+        future.add_done_callback(inflight.discard)
+        return await asyncio.shield(future)
+
+    async def convert_one(file_path):
+        async with semaphore:
+            try:
+                if mode == "compress":
+                    footer_data = await run_tracked(compress_and_cleanup, file_path, file_path + ".dvpl", policy, keep_originals, use_mmap)
+                elif mode == "decompress":
+                    footer_data = await run_tracked(decompress_and_cleanup, file_path, file_path[:-len(".dvpl")], keep_originals, use_mmap)
+                else:
+                    footer_data = await run_tracked(verify_dvpl_file, file_path, True, use_mmap)
+                result = {"path": file_path, "ok": True, "footer": footer_data}
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                result = {"path": file_path, "ok": False, "error": type(e).__name__, "message": str(e)}
+
+        # Only finished files are reported, so a cancelled run never reports work it did not complete
+        results.append(result)
+        if progress is not None:
+            progress(len(results), total_files, result)
+        return result
+
+    tasks = [asyncio.ensure_future(convert_one(file_path)) for file_path in work_files]
+    try:
+        await asyncio.gather(*tasks)
+    except asyncio.CancelledError:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Executor jobs cannot be interrupted, wait for the in-flight ones to finish their writes
+        if inflight:
+            await asyncio.wait(list(inflight))
+        raise
+
+    return {
+        "succeeded": sum(1 for result in results if result["ok"]),
+        "failed": sum(1 for result in results if not result["ok"]),
+        "ignored": len(ignored_files),
+        "results": results,
+    }
@@ -0,0 +1,14 @@
+from ._api import (
+    DVPLOptions,
+    FileResult,
+    ProgressSink,
+    CallbackProgress,
+    process_file,
+    iter_results,
+    run_dvpl,
+    resolve_workers,
+    iter_file_results,
+    MODES,
+    COMPRESSION_TYPES,
+    VERIFY_LEVELS
+)
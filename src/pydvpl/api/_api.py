@@ -0,0 +1,334 @@
+import os
+import time
+from collections import namedtuple
+from functools import partial
+from ..dvpl import compress_dvpl_file, decompress_dvpl_file, verify_dvpl_file, FSYNC_POLICIES
+from ..chunked import is_chunked_dvpl, compress_chunked_file, decompress_chunked_file, verify_chunked_file
+from ..policy import compression_policy, parse_compression_overrides
+from ..walker import compile_ignore, collect_files, is_sidecar_path
+from ..metrics import time_phase, error_kind
+
+
+MODES = ("compress", "decompress", "verify")
+COMPRESSION_TYPES = ("default", "fast", "hc", "none", "auto")
+VERIFY_LEVELS = ("crc", "full")
+IO_STRATEGIES = ("mmap", "read")
+
+
+class DVPLOptions:
+    # Attribute names match the CLI flags, so the argparse namespace works wherever options do
+    __slots__ = ("mode", "compression", "compression_override", "ignore", "keep_originals", "jobs", "verify_level", "io",
+                 "chunked", "block_size", "incremental", "manifest", "fsync", "resume", "journal", "dedup")
+
+    def __init__(self, mode: str = "compress", compression: str = "default", compression_override: str = "", ignore: str = "",
+                 keep_originals: bool = True, jobs: int = 1, verify_level: str = "full", io: str = "mmap", chunked: bool = False,
+                 block_size: int = 4, incremental: bool = False, manifest: str | None = None, fsync: str = "batch",
+                 resume: bool = False, journal: str | None = None, dedup: str | None = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}', expected one of {', '.join(MODES)}.")
+        if compression not in COMPRESSION_TYPES:
+            raise ValueError(f"Unknown compression '{compression}', expected one of {', '.join(COMPRESSION_TYPES)}.")
+        if verify_level not in VERIFY_LEVELS:
+            raise ValueError(f"Unknown verify level '{verify_level}', expected one of {', '.join(VERIFY_LEVELS)}.")
+        if io not in IO_STRATEGIES:
+            raise ValueError(f"Unknown I/O strategy '{io}', expected one of {', '.join(IO_STRATEGIES)}.")
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync}', expected one of {', '.join(FSYNC_POLICIES)}.")
+        if jobs < 0:
+            raise ValueError("Jobs must be 0 (one per CPU core) or a positive number of workers.")
+        if not 0 < block_size <= 2016:
+            raise ValueError("Block size must be between 1 and 2016 MiB.")
+        if incremental and (mode != "compress" or not keep_originals or chunked):
+            raise ValueError("Incremental runs only compress, keep the originals and cannot be chunked.")
+        if resume and mode == "verify":
+            raise ValueError("Only compress and decompress runs can be resumed.")
+        if dedup is not None:
+            from ..dedup import DEDUP_METHODS
+
+            if dedup not in DEDUP_METHODS:
+                raise ValueError(f"Unknown dedup method '{dedup}', expected one of {', '.join(DEDUP_METHODS)}.")
+            if mode != "compress":
+                raise ValueError("Dedup only applies to compress runs.")
+        parse_compression_overrides(compression_override)
+
+        self.mode = mode
+        self.compression = compression
+        self.compression_override = compression_override
+        self.ignore = ignore
+        self.keep_originals = keep_originals
+        self.jobs = jobs
+        self.verify_level = verify_level
+        self.io = io
+        self.chunked = chunked
+        self.block_size = block_size
+        self.incremental = incremental
+        self.manifest = manifest
+        self.fsync = fsync
+        self.resume = resume
+        self.journal = journal
+        self.dedup = dedup
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"DVPLOptions({fields})"
+
+
+class FileResult(namedtuple("FileResult", ["path", "output", "status", "original_size", "compressed_size", "seconds", "error"])):
+    # status is one of ok, failed, ignored (not selected) or skipped (unchanged since the last incremental run)
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.status == "ok"
+
+    @property
+    def error_kind(self):
+        return error_kind(self.error) if self.error is not None else None
+
+
+class ProgressSink:
+    # Gets the file total once, then every finished file; the base class renders nothing
+    def start(self, total):
+        pass
+
+    def update(self, result, done, total):
+        self.advance()
+
+    def advance(self, count=1):
+        pass
+
+    def finish(self):
+        pass
+
+
+class CallbackProgress(ProgressSink):
+    def __init__(self, callback):
+        self.callback = callback
+
+    def update(self, result, done, total):
+        self.callback(result, done, total)
+
+
+def resolve_workers(jobs):
+    if jobs is None:
+        return 1
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def iter_file_results(process_func, file_paths, config, workers=1):
+    if workers <= 1:
+        for file_path in file_paths:
+            yield process_func(file_path, config)
+        return
+
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    # lz4.block and zlib.crc32 release the GIL, so a thread pool keeps every core busy
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(process_func, file_path, config) for file_path in file_paths]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # A consumer that stops early does not wait for files that have not started yet
+            executor.shutdown(cancel_futures=True)
+
+
+def accepts_path(mode, file_path):
+    if is_sidecar_path(file_path):
+        return False
+    if mode == "compress":
+        return not file_path.endswith(".dvpl")
+    return file_path.endswith(".dvpl")
+
+
+def process_file(file_path, options, manifest=None, metrics=None, committer=None, dedup=None):
+    mode = options.mode
+
+    if (manifest is not None and manifest.owns(file_path)) or (committer is not None and committer.owns(file_path)):
+        return FileResult(file_path, None, "ignored", 0, 0, 0.0, None)
+    if not accepts_path(mode, file_path) or compile_ignore(options.ignore)(file_path):
+        return FileResult(file_path, None, "ignored", 0, 0, 0.0, None)
+
+    start_time = time.perf_counter()
+    timings = metrics.start_file(file_path) if metrics is not None else None
+    use_mmap = getattr(options, "io", "mmap") == "mmap"
+    chunked = getattr(options, "chunked", False)
+    fsync = committer is not None and committer.fsync_each
+    output = None
+
+    try:
+        if mode == "compress":
+            output = file_path + ".dvpl"
+            compression_override = getattr(options, "compression_override", "")
+            compression = options.compression or "default"
+            if compression_override:
+                compression += "|" + compression_override
+            if manifest is not None and manifest.is_fresh(file_path, output, compression):
+                return FileResult(file_path, output, "skipped", 0, 0, time.perf_counter() - start_time, None)
+            policy = compression_policy(options.compression or "default", compression_override)
+            digests = []
+            on_source = None
+            if manifest is not None:
+                from ..manifest import hash_buffer
+
+                # The manifest records the content that was compressed, not whatever is on disk afterwards
+                src_stat = os.stat(file_path)
+
+                def on_source(buffer):
+                    with time_phase(timings, "hash"):
+                        digests.append(hash_buffer(buffer))
+            if chunked:
+                compress_func = partial(compress_chunked_file, compression_type=policy, block_size=options.block_size * 1024 * 1024,
+                                        workers=resolve_workers(options.jobs), use_mmap=use_mmap, timings=timings, fsync=fsync,
+                                        on_source=on_source)
+            else:
+                compress_func = partial(compress_dvpl_file, compression_type=policy, use_mmap=use_mmap, timings=timings, fsync=fsync,
+                                        on_source=on_source)
+            if dedup is not None:
+                footer_data = dedup.compress(file_path, output, compress_func, timings, fsync)
+            else:
+                footer_data = compress_func(file_path, output)
+            if manifest is not None:
+                # Dedup clones are never mapped here, record() then hashes the source itself
+                manifest.record(file_path, compression, footer_data, digests[0] if digests else None, src_stat)
+        elif mode == "decompress":
+            output = os.path.splitext(file_path)[0]
+            if chunked and is_chunked_dvpl(file_path):
+                footer_data = decompress_chunked_file(file_path, output, resolve_workers(options.jobs), timings, fsync)
+            else:
+                footer_data = decompress_dvpl_file(file_path, output, use_mmap, timings, fsync)
+        else:
+            full = getattr(options, "verify_level", "full") == "full"
+            if chunked and is_chunked_dvpl(file_path):
+                footer_data = verify_chunked_file(file_path, full, resolve_workers(options.jobs))
+            else:
+                footer_data = verify_dvpl_file(file_path, full, use_mmap, timings)
+
+        if output is not None and committer is not None:
+            # The committer deletes the original once the output is durable
+            committer.add(file_path, output)
+        elif output is not None and not options.keep_originals:
+            with time_phase(timings, "unlink"):
+                os.remove(file_path)
+    except Exception as e:
+        if timings is not None:
+            metrics.finish_file(timings, e)
+        return FileResult(file_path, output, "failed", 0, 0, time.perf_counter() - start_time, e)
+
+    if timings is not None:
+        # Payload bytes, footers and block indexes are not counted
+        if mode == "compress":
+            timings.bytes_in, timings.bytes_out = footer_data.original_size, footer_data.compressed_size
+        elif mode == "decompress":
+            timings.bytes_in, timings.bytes_out = footer_data.compressed_size, footer_data.original_size
+        else:
+            timings.bytes_in = footer_data.compressed_size
+        metrics.finish_file(timings)
+
+    return FileResult(file_path, output, "ok", footer_data.original_size, footer_data.compressed_size, time.perf_counter() - start_time, None)
+
+
+def iter_results(path, options=None, progress=None, metrics=None, dedup=None):
+    # dedup is an optional DedupIndex to share, by default one is built from options.dedup for directory compress runs
+    options = options if options is not None else DVPLOptions()
+    progress = progress if progress is not None else ProgressSink()
+    path = os.fspath(path)
+    mode = options.mode
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"File or directory '{path}' not found.")
+
+    is_directory = os.path.isdir(path)
+    resume = getattr(options, "resume", False)
+    if resume and (not is_directory or mode not in ("compress", "decompress")):
+        raise ValueError("Only compress and decompress runs on directories can be resumed.")
+
+    from ..journal import Journal, CommitQueue, remove_originals, DEFAULT_JOURNAL_NAME
+
+    # Journaling costs an fsync per batch, so only runs that asked to be resumable keep one
+    journal = None
+    journal_path = getattr(options, "journal", None)
+    if is_directory and mode in ("compress", "decompress") and (resume or journal_path is not None):
+        journal = Journal(journal_path or os.path.join(path, DEFAULT_JOURNAL_NAME), path)
+
+    done_files = []
+    if resume:
+        # A resumed run takes its file list from the journal instead of walking again
+        work_files, done_files = journal.resume(mode)
+        ignored_files = []
+        if not options.keep_originals:
+            # Files journaled just before the interruption may still have their originals
+            remove_originals(done_files)
+    elif is_directory:
+        # One walk feeds both the progress total and the workers
+        walk_start = time.perf_counter()
+        work_files, ignored_files = collect_files(path, compile_ignore(options.ignore), partial(accepts_path, mode))
+        if metrics is not None:
+            metrics.record_walk(time.perf_counter() - walk_start)
+        if journal is not None:
+            journal.begin(mode, work_files)
+    else:
+        work_files, ignored_files = [path], []
+
+    manifest = None
+    if mode == "compress" and getattr(options, "incremental", False):
+        from ..manifest import Manifest, DEFAULT_MANIFEST_NAME
+
+        root = path if is_directory else os.path.dirname(os.path.abspath(path))
+        manifest = Manifest(getattr(options, "manifest", None) or os.path.join(root, DEFAULT_MANIFEST_NAME), root)
+
+    if dedup is None and mode == "compress" and is_directory and getattr(options, "dedup", None):
+        from ..dedup import DedupIndex
+
+        dedup = DedupIndex(options.dedup)
+    if dedup is not None:
+        dedup.index(work_files)
+
+    # Chunked files spread their blocks over the workers, so files themselves go one at a time
+    workers = 1 if getattr(options, "chunked", False) else resolve_workers(getattr(options, "jobs", 1))
+    total_files = len(done_files) + len(work_files) + len(ignored_files)
+    finished_files = len(done_files)
+    completed = False
+
+    progress.start(total_files)
+    if finished_files:
+        progress.advance(finished_files)
+    committer = CommitQueue(getattr(options, "fsync", "batch"), options.keep_originals, journal, metrics)
+    try:
+        # The committer flushes on the way out, outputs finished before an error or an early stop are still committed
+        with committer:
+            for file_path in ignored_files:
+                finished_files += 1
+                result = FileResult(file_path, None, "ignored", 0, 0, 0.0, None)
+                progress.update(result, finished_files, total_files)
+                yield result
+
+            process_func = partial(process_file, manifest=manifest, metrics=metrics, committer=committer, dedup=dedup)
+            for result in iter_file_results(process_func, work_files, options, workers):
+                finished_files += 1
+                progress.update(result, finished_files, total_files)
+                yield result
+        completed = True
+        if dedup is not None and metrics is not None:
+            metrics.sections["dedup"] = dedup.summary()
+    finally:
+        if journal is not None:
+            # An unfinished run keeps its journal, --resume picks up from the last committed batch
+            journal.close(completed=completed)
+        if manifest is not None:
+            # Only a full tree run knows which entries are stale
+            manifest.save(evict=is_directory and completed and not resume)
+        progress.finish()
+
+
+def run_dvpl(path, options=None, progress=None, metrics=None):
+    results = list(iter_results(path, options, progress, metrics))
+    return {
+        "succeeded": sum(1 for result in results if result.status == "ok"),
+        "failed": sum(1 for result in results if result.status == "failed"),
+        "ignored": sum(1 for result in results if result.status in ("ignored", "skipped")),
+        "results": results,
+    }
@@ -0,0 +1,10 @@
+from ._bench import (
+    generate_corpus,
+    run_bench_case,
+    run_benchmark,
+    measure_startup,
+    check_startup,
+    STARTUP_BUDGET_MS,
+    BENCH_MODES,
+    BENCH_IO
+)
\ No newline at end of file
@@ -0,0 +1,208 @@
+import filecmp
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ..dvpl import compress_dvpl_file, decompress_dvpl_file, __LZ4_VERSION__
+from ..policy import compression_policy
+from ..version import __version__
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+BENCH_MODES = ("fast", "default", "hc", "auto")
+BENCH_IO = ("mmap", "read")
+# `import pydvpl` must stay cheap for build scripts that spawn it per file
+STARTUP_BUDGET_MS = 50
+STARTUP_FORBIDDEN_MODULES = ("requests", "packaging", "urllib3", "multiprocessing", "concurrent.futures")
+YAML_WORDS = [b"name", b"health", b"armor", b"speed", b"turret", b"gun", b"shell", b"damage", b"true", b"false", b"0.25", b"1200"]
+
+
+def generate_text(rng, size):
+    lines = []
+    length = 0
+    while length < size:
+        line = b"  " * rng.randint(0, 3) + rng.choice(YAML_WORDS) + b": " + rng.choice(YAML_WORDS) + b"\n"
+        lines.append(line)
+        length += len(line)
+    return b"".join(lines)[:size]
+
+
+def generate_binary(rng, size):
+    return rng.randbytes(size)
+
+
+def generate_mixed(rng, size):
+    half = size // 2
+    return generate_text(rng, half) + rng.randbytes(size - half)
+
+
+def generate_corpus(directory, file_count=300, max_size=1024 * 1024, seed=0):
+    # Mirrors an asset pack: mostly small text configs, some incompressible textures and a few mixed blobs
+    rng = random.Random(seed)
+    kinds = [("yaml", generate_text, 6), ("png", generate_binary, 2), ("sc2", generate_mixed, 2)]
+    weights = [weight for _, _, weight in kinds]
+    os.makedirs(directory, exist_ok=True)
+
+    total_size = 0
+    for index in range(file_count):
+        extension, generator, _ = rng.choices(kinds, weights)[0]
+        # Log-uniform sizes between 256 bytes and max_size
+        size = int(256 * (max_size / 256) ** rng.random())
+        subdirectory = os.path.join(directory, f"group{index % 8}")
+        os.makedirs(subdirectory, exist_ok=True)
+        with open(os.path.join(subdirectory, f"asset{index}.{extension}"), "wb") as f:
+            f.write(generator(rng, size))
+        total_size += size
+
+    return {"directory": str(directory), "files": file_count, "bytes": total_size, "seed": seed}
+
+
+def list_corpus(directory):
+    file_paths = []
+    for root, _, file_names in os.walk(directory):
+        file_paths.extend(os.path.join(root, file_name) for file_name in file_names if not file_name.endswith(".dvpl"))
+    return sorted(file_paths)
+
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def timed_map(func, items, workers):
+    start_time = time.perf_counter()
+    if workers <= 1:
+        results = [func(item) for item in items]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(func, items))
+    return time.perf_counter() - start_time, results
+
+
+def run_bench_case(corpus_directory, mode, workers, io):
+    file_paths = list_corpus(corpus_directory)
+    scratch_directory = tempfile.mkdtemp(prefix="pydvpl-bench-")
+    use_mmap = io == "mmap"
+    compression_type = compression_policy(mode)
+
+    def compress_one(item):
+        index, file_path = item
+        target_path = os.path.join(scratch_directory, f"{index}.dvpl")
+        footer_data = compress_dvpl_file(file_path, target_path, compression_type, use_mmap)
+        return target_path, footer_data
+
+    def decompress_one(target_path):
+        return decompress_dvpl_file(target_path, target_path[:-len(".dvpl")], use_mmap)
+
+    try:
+        compress_time, compressed = timed_map(compress_one, list(enumerate(file_paths)), workers)
+        decompress_time, _ = timed_map(decompress_one, [target_path for target_path, _ in compressed], workers)
+        # Compared outside the timed passes, numbers from a broken round trip are worthless
+        roundtrip_ok = all(filecmp.cmp(file_path, target_path[:-len(".dvpl")], shallow=False)
+                           for file_path, (target_path, _) in zip(file_paths, compressed))
+    finally:
+        shutil.rmtree(scratch_directory, ignore_errors=True)
+
+    bytes_in = sum(footer_data.original_size for _, footer_data in compressed)
+    bytes_out = sum(footer_data.compressed_size for _, footer_data in compressed)
+    megabytes = bytes_in / (1024 * 1024)
+
+    return {
+        "mode": mode,
+        "workers": workers,
+        "io": io,
+        "files": len(file_paths),
+        "bytes_in": bytes_in,
+        "bytes_out": bytes_out,
+        "ratio": round(bytes_out / bytes_in, 4) if bytes_in else 0.0,
+        "compress_seconds": round(compress_time, 4),
+        "compress_mb_s": round(megabytes / compress_time, 2) if compress_time else None,
+        "compress_files_s": round(len(file_paths) / compress_time, 1) if compress_time else None,
+        "decompress_seconds": round(decompress_time, 4),
+        "decompress_mb_s": round(megabytes / decompress_time, 2) if decompress_time else None,
+        "decompress_files_s": round(len(file_paths) / decompress_time, 1) if decompress_time else None,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "roundtrip_ok": roundtrip_ok,
+    }
+
+
+def run_isolated_case(corpus_directory, mode, workers, io):
+    # A fresh interpreter per case keeps ru_maxrss from leaking between configurations
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        return pool.apply(run_bench_case, (corpus_directory, mode, workers, io))
+
+
+def measure_startup(runs=5):
+    code = "import sys, pydvpl; print(','.join(sorted(sys.modules)))"
+    timings = []
+    modules = set()
+    for _ in range(runs):
+        completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True)
+        for line in completed.stderr.splitlines():
+            columns = line.split("|")
+            if len(columns) == 3 and columns[2].strip() == "pydvpl":
+                timings.append(int(columns[1]) / 1000)
+        modules = set(completed.stdout.strip().split(","))
+
+    # The fastest run is the least disturbed by the machine, the first one may also compile bytecode
+    import_ms = round(min(timings), 2)
+    heavy_modules = sorted(modules.intersection(STARTUP_FORBIDDEN_MODULES))
+    return {
+        "import_ms": import_ms,
+        "budget_ms": STARTUP_BUDGET_MS,
+        "heavy_modules": heavy_modules,
+        "ok": import_ms <= STARTUP_BUDGET_MS and not heavy_modules,
+    }
+
+
+def check_startup(runs=5):
+    result = measure_startup(runs)
+    print(f"import pydvpl: {result['import_ms']} ms (budget {result['budget_ms']} ms)")
+    if result["heavy_modules"]:
+        print(f"modules that must be imported lazily: {', '.join(result['heavy_modules'])}")
+    return 0 if result["ok"] else 1
+
+
+def run_benchmark(corpus_directory=None, modes=BENCH_MODES, workers=(1,), io=BENCH_IO, isolate=True, file_count=300, seed=0):
+    generated_directory = None
+    if corpus_directory is None:
+        generated_directory = tempfile.mkdtemp(prefix="pydvpl-corpus-")
+        corpus = generate_corpus(generated_directory, file_count=file_count, seed=seed)
+        corpus_directory = generated_directory
+    else:
+        file_paths = list_corpus(corpus_directory)
+        corpus = {"directory": str(corpus_directory), "files": len(file_paths), "bytes": sum(os.path.getsize(file_path) for file_path in file_paths), "seed": None}
+
+    run_case = run_isolated_case if isolate else run_bench_case
+    try:
+        results = [run_case(corpus_directory, mode, worker_count, io_strategy)
+                   for mode in modes for worker_count in workers for io_strategy in io]
+    finally:
+        if generated_directory is not None:
+            shutil.rmtree(generated_directory, ignore_errors=True)
+
+    return {
+        "pydvpl": __version__,
+        "lz4": __LZ4_VERSION__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "startup": measure_startup(),
+        "corpus": corpus,
+        "results": results,
+    }
@@ -0,0 +1,9 @@
+from ._bundle import (
+    DVPLBundle,
+    DVPLBundleWriter,
+    pack_dvpl_bundle,
+    select_bundle_sources,
+    unpack_dvpl_bundle,
+    BUNDLE_EXTENSION,
+    BUNDLE_TRAILER_SIZE
+)
\ No newline at end of file
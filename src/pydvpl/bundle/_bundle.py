@@ -0,0 +1,223 @@
+import os
+import struct
+from ..dvpl import (
+    compress_dvpl,
+    compress_dvpl_parts,
+    decompress_dvpl,
+    read_dvpl_footer,
+    resolve_compression,
+    atomic_output,
+    DVPL_FOOTER_SIZE
+)
+
+
+BUNDLE_EXTENSION = ".dvplb"
+BUNDLE_MAGIC = b"DVPB"
+# index offset, index length, entry count, magic
+BUNDLE_TRAILER = struct.Struct("<QQI4s")
+BUNDLE_TRAILER_SIZE = BUNDLE_TRAILER.size
+# entry offset, entry length, name length
+BUNDLE_INDEX_ENTRY = struct.Struct("<QIH")
+
+
+def encode_bundle_index(entries):
+    parts = []
+    for name, (offset, length) in entries.items():
+        encoded_name = name.encode("utf-8")
+        parts.append(BUNDLE_INDEX_ENTRY.pack(offset, length, len(encoded_name)))
+        parts.append(encoded_name)
+    return b"".join(parts)
+
+
+def decode_bundle_index(buffer, entry_count):
+    entries = {}
+    position = 0
+    for _ in range(entry_count):
+        offset, length, name_length = BUNDLE_INDEX_ENTRY.unpack_from(buffer, position)
+        position += BUNDLE_INDEX_ENTRY.size
+        name = bytes(buffer[position:position + name_length]).decode("utf-8")
+        position += name_length
+        entries[name] = (offset, length)
+    return entries
+
+
+class DVPLBundleWriter:
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        # The bundle is written under a temp name and only renamed into place once its index is written
+        self.output = atomic_output(path)
+        self.file = self.output.__enter__()
+        self.offset = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            # A bundle missing entries must not look complete, so no index is written and the temp file is removed
+            self.output.__exit__(exc_type, exc_value, traceback)
+            return
+        self.close()
+
+    def add_dvpl_parts(self, name, *parts):
+        if name in self.entries:
+            raise ValueError(f"DVPLBundleDuplicateEntry: {name}")
+
+        length = 0
+        for part in parts:
+            self.file.write(part)
+            length += len(part)
+        if length < DVPL_FOOTER_SIZE:
+            raise ValueError("InvalidDVPLFooter: Buffer size is smaller than expected")
+
+        self.entries[name] = (self.offset, length)
+        self.offset += length
+
+    def add_dvpl(self, name, dvpl_buffer):
+        read_dvpl_footer(dvpl_buffer)
+        self.add_dvpl_parts(name, dvpl_buffer)
+
+    def add(self, name, buffer, compression_type="default"):
+        self.add_dvpl_parts(name, *compress_dvpl_parts(buffer, resolve_compression(compression_type, name, buffer)))
+
+    def close(self):
+        if self.file.closed:
+            return
+        index_block = compress_dvpl(encode_bundle_index(self.entries))
+        self.file.write(index_block)
+        self.file.write(BUNDLE_TRAILER.pack(self.offset, len(index_block), len(self.entries), BUNDLE_MAGIC))
+        self.output.__exit__(None, None, None)
+
+
+class DVPLBundle:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            self.entries = self.read_index()
+        except Exception:
+            self.file.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def names(self):
+        return list(self.entries)
+
+    def read_index(self):
+        file_size = self.file.seek(0, os.SEEK_END)
+        if file_size < BUNDLE_TRAILER_SIZE:
+            raise ValueError("InvalidDVPLBundle: File size is smaller than expected")
+
+        self.file.seek(-BUNDLE_TRAILER_SIZE, os.SEEK_END)
+        index_offset, index_length, entry_count, magic = BUNDLE_TRAILER.unpack(self.file.read(BUNDLE_TRAILER_SIZE))
+        if magic != BUNDLE_MAGIC:
+            raise ValueError("InvalidDVPLBundle: Trailer signature mismatch")
+        if index_offset + index_length + BUNDLE_TRAILER_SIZE != file_size:
+            raise ValueError("InvalidDVPLBundle: Index size mismatch")
+
+        self.file.seek(index_offset)
+        return decode_bundle_index(decompress_dvpl(self.file.read(index_length)), entry_count)
+
+    def read_dvpl(self, name):
+        try:
+            offset, length = self.entries[name]
+        except KeyError:
+            raise KeyError(f"DVPLBundleMissingEntry: {name}") from None
+
+        self.file.seek(offset)
+        return self.file.read(length)
+
+    def read(self, name):
+        return decompress_dvpl(self.read_dvpl(name))
+
+    def footer(self, name):
+        return read_dvpl_footer(self.read_dvpl(name))
+
+    def extract(self, name, output_directory, decompress=False, fsync=False):
+        # Names come from the bundle and are untrusted: absolute paths, drive letters, backslashes and '..'
+        # are all resolved by the OS first, and whatever lands outside the output directory is rejected
+        output_root = os.path.realpath(output_directory)
+        target_path = os.path.realpath(os.path.join(output_root, name))
+        try:
+            inside = target_path != output_root and os.path.commonpath([output_root, target_path]) == output_root
+        except ValueError:
+            # Paths on different drives have no common path
+            inside = False
+        if not inside:
+            raise ValueError(f"DVPLBundleUnsafeEntry: {name}")
+
+        if not decompress:
+            target_path += ".dvpl"
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+
+        with atomic_output(target_path, fsync) as f:
+            f.write(self.read(name) if decompress else self.read_dvpl(name))
+        return target_path
+
+    def close(self):
+        self.file.close()
+
+
+def read_bundle_source(file_path, compression_type):
+    with open(file_path, "rb") as f:
+        data = f.read()
+    if file_path.endswith(".dvpl"):
+        read_dvpl_footer(data)
+        return (data,)
+    return compress_dvpl_parts(data, resolve_compression(compression_type, file_path, data))
+
+
+def bundle_name(file_path, root):
+    name = os.path.relpath(file_path, root).replace(os.sep, "/")
+    return name[:-len(".dvpl")] if name.endswith(".dvpl") else name
+
+
+def select_bundle_sources(file_paths, root):
+    # A tree compressed with --keep-originals has both a.yaml and a.yaml.dvpl for the entry a.yaml,
+    # the existing .dvpl is packed as is and its source is left out
+    dvpl_names = {bundle_name(file_path, root) for file_path in file_paths if file_path.endswith(".dvpl")}
+    work_files = []
+    shadowed_files = []
+    for file_path in file_paths:
+        if not file_path.endswith(".dvpl") and bundle_name(file_path, root) in dvpl_names:
+            shadowed_files.append(file_path)
+        else:
+            work_files.append(file_path)
+    return work_files, shadowed_files
+
+
+def pack_dvpl_bundle(file_paths, root, bundle_path, compression_type="default", workers=1):
+    with DVPLBundleWriter(bundle_path) as writer:
+        if workers <= 1:
+            for file_path in file_paths:
+                writer.add_dvpl_parts(bundle_name(file_path, root), *read_bundle_source(file_path, compression_type))
+            return len(writer.entries)
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        # Compress ahead in bounded windows so memory stays proportional to the worker count
+        window = workers * 4
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for start in range(0, len(file_paths), window):
+                batch = file_paths[start:start + window]
+                for file_path, parts in zip(batch, executor.map(read_bundle_source, batch, [compression_type] * len(batch))):
+                    writer.add_dvpl_parts(bundle_name(file_path, root), *parts)
+        return len(writer.entries)
+
+
+def unpack_dvpl_bundle(bundle_path, output_directory, decompress=False, fsync=False):
+    # Returns the extracted paths, a caller deleting the bundle first makes them durable
+    with DVPLBundle(bundle_path) as bundle:
+        return [bundle.extract(name, output_directory, decompress, fsync) for name in bundle.names()]
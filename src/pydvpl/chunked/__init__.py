@@ -0,0 +1,10 @@
+from ._chunked import (
+    DVPLChunkedFooter,
+    is_chunked_dvpl,
+    read_chunked_footer,
+    compress_chunked_file,
+    decompress_chunked_file,
+    verify_chunked_file,
+    DEFAULT_BLOCK_SIZE,
+    CHUNKED_TRAILER_SIZE
+)
\ No newline at end of file
@@ -0,0 +1,189 @@
+import os
+import struct
+import zlib
+import lz4.block
+from contextlib import closing
+from ..metrics import time_phase
+from ..dvpl import (
+    map_dvpl_file,
+    atomic_output,
+    resolve_compression,
+    lz4_mode,
+    DVPL_TYPE_NONE,
+    DVPL_TYPE_LZ4,
+    DVPL_CHUNKED_FOOTER,
+    DVPL_MAX_BLOCK_SIZE
+)
+
+
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+# compressed size, original size, crc32 of the stored block, block type
+CHUNKED_INDEX_ENTRY = struct.Struct("<IIII")
+# original size, payload size, block size, block count, signature
+CHUNKED_TRAILER = struct.Struct("<QQII4s")
+CHUNKED_TRAILER_SIZE = CHUNKED_TRAILER.size
+
+
+class DVPLChunkedFooter:
+    # blocks holds one (offset, compressed size, original size, crc32, type) tuple per block
+    def __init__(self, original_size, compressed_size, block_size, blocks):
+        self.original_size = original_size
+        self.compressed_size = compressed_size
+        self.block_size = block_size
+        self.blocks = blocks
+
+
+def is_chunked_dvpl(path):
+    with open(path, "rb") as f:
+        if f.seek(0, os.SEEK_END) < CHUNKED_TRAILER_SIZE:
+            return False
+        f.seek(-len(DVPL_CHUNKED_FOOTER), os.SEEK_END)
+        return f.read(len(DVPL_CHUNKED_FOOTER)) == DVPL_CHUNKED_FOOTER
+
+
+def read_chunked_footer_from(f):
+    file_size = f.seek(0, os.SEEK_END)
+    if file_size < CHUNKED_TRAILER_SIZE:
+        raise ValueError("InvalidDVPLChunkedFooter: File size is smaller than expected")
+
+    f.seek(-CHUNKED_TRAILER_SIZE, os.SEEK_END)
+    original_size, compressed_size, block_size, block_count, signature = CHUNKED_TRAILER.unpack(f.read(CHUNKED_TRAILER_SIZE))
+    if signature != DVPL_CHUNKED_FOOTER:
+        raise ValueError("InvalidDVPLChunkedFooter: Footer signature mismatch")
+
+    index_size = block_count * CHUNKED_INDEX_ENTRY.size
+    if compressed_size + index_size + CHUNKED_TRAILER_SIZE != file_size:
+        raise ValueError("DVPLSizeMismatch")
+
+    f.seek(compressed_size)
+    index_buffer = f.read(index_size)
+    blocks = []
+    offset = 0
+    for compressed_block_size, original_block_size, crc32_val, type_val in CHUNKED_INDEX_ENTRY.iter_unpack(index_buffer):
+        blocks.append((offset, compressed_block_size, original_block_size, crc32_val, type_val))
+        offset += compressed_block_size
+
+    if offset != compressed_size or sum(block[2] for block in blocks) != original_size:
+        raise ValueError("DVPLChunkedIndexMismatch")
+
+    return DVPLChunkedFooter(original_size, compressed_size, block_size, blocks)
+
+
+def read_chunked_footer(path):
+    with open(path, "rb") as f:
+        return read_chunked_footer_from(f)
+
+
+def encode_block(block, mode):
+    compressed_block = lz4.block.compress(block, store_size=False, mode=mode)
+    # Blocks that do not shrink are stored, the index records the type per block
+    if len(compressed_block) >= len(block):
+        return bytes(block), DVPL_TYPE_NONE
+    return compressed_block, DVPL_TYPE_LZ4
+
+
+def decode_block(block, original_block_size, crc32_val, type_val):
+    if zlib.crc32(block) != crc32_val:
+        raise ValueError("DVPLCRC32Mismatch")
+    if type_val == DVPL_TYPE_NONE:
+        if len(block) != original_block_size:
+            raise ValueError("DVPLTypeSizeMismatch")
+        return block
+    if type_val != DVPL_TYPE_LZ4:
+        raise ValueError("UNKNOWN DVPL FORMAT")
+
+    decoded_block = lz4.block.decompress(block, uncompressed_size=original_block_size)
+    if len(decoded_block) != original_block_size:
+        raise ValueError("DVPLDecodeSizeMismatch")
+    return decoded_block
+
+
+def map_windows(func, items, workers):
+    # Blocks are processed in windows of a few per worker, so memory stays bounded by the window, not the file
+    if workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    window = workers * 2
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) == window:
+                yield from executor.map(func, batch)
+                batch = []
+        yield from executor.map(func, batch)
+
+
+def compress_chunked_file(src_path, dst_path, compression_type="default", block_size=DEFAULT_BLOCK_SIZE, workers=1, use_mmap=True, timings=None, fsync=False, on_source=None):
+    if not 0 < block_size <= DVPL_MAX_BLOCK_SIZE:
+        raise ValueError(f"Block size must be between 1 and {DVPL_MAX_BLOCK_SIZE} bytes.")
+
+    with map_dvpl_file(src_path, use_mmap, timings) as buffer, atomic_output(dst_path, fsync) as f:
+        if on_source is not None:
+            on_source(buffer)
+        compression_type = resolve_compression(compression_type, src_path, buffer)
+        mode = None if compression_type == "none" else lz4_mode(compression_type)
+        original_size = len(buffer)
+
+        with memoryview(buffer) as view:
+            def encode(offset):
+                with view[offset:offset + block_size] as block:
+                    if compression_type == "none":
+                        return bytes(block), DVPL_TYPE_NONE, len(block)
+                    return encode_block(block, mode) + (len(block),)
+
+            blocks = []
+            compressed_size = 0
+            # closing() joins the pool on errors too, before the view over the mapping is released
+            with closing(map_windows(encode, range(0, original_size, block_size), workers)) as encoded_blocks:
+                # Blocks are encoded on the pool while this thread writes, so only the write wait is timed here
+                for stored_block, type_val, original_block_size in encoded_blocks:
+                    with time_phase(timings, "write"):
+                        f.write(stored_block)
+                    # Same tuples as read_chunked_footer_from returns
+                    blocks.append((compressed_size, len(stored_block), original_block_size, zlib.crc32(stored_block), type_val))
+                    compressed_size += len(stored_block)
+
+        f.write(b"".join(CHUNKED_INDEX_ENTRY.pack(*block[1:]) for block in blocks))
+        f.write(CHUNKED_TRAILER.pack(original_size, compressed_size, block_size, len(blocks), DVPL_CHUNKED_FOOTER))
+
+    return DVPLChunkedFooter(original_size, compressed_size, block_size, blocks)
+
+
+def iter_decoded_blocks(f, footer_data, workers):
+    def read_blocks():
+        for offset, compressed_block_size, original_block_size, crc32_val, type_val in footer_data.blocks:
+            f.seek(offset)
+            yield f.read(compressed_block_size), original_block_size, crc32_val, type_val
+
+    return map_windows(lambda block: decode_block(*block), read_blocks(), workers)
+
+
+def decompress_chunked_file(src_path, dst_path, workers=1, timings=None, fsync=False):
+    with open(src_path, "rb") as f:
+        footer_data = read_chunked_footer_from(f)
+        with atomic_output(dst_path, fsync) as output, closing(iter_decoded_blocks(f, footer_data, workers)) as decoded_blocks:
+            for decoded_block in decoded_blocks:
+                with time_phase(timings, "write"):
+                    output.write(decoded_block)
+    return footer_data
+
+
+def verify_chunked_file(path, full=True, workers=1):
+    with open(path, "rb") as f:
+        footer_data = read_chunked_footer_from(f)
+        if not full:
+            for offset, compressed_block_size, _, crc32_val, _ in footer_data.blocks:
+                f.seek(offset)
+                if zlib.crc32(f.read(compressed_block_size)) != crc32_val:
+                    raise ValueError("DVPLCRC32Mismatch")
+            return footer_data
+
+        with closing(iter_decoded_blocks(f, footer_data, workers)) as decoded_blocks:
+            for _ in decoded_blocks:
+                pass
+    return footer_data
@@ -0,0 +1,5 @@
+from ._dedup import (
+    DedupIndex,
+    clone_file,
+    DEDUP_METHODS
+)
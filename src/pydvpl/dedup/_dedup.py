@@ -0,0 +1,144 @@
+import os
+import shutil
+import threading
+from collections import Counter
+from contextlib import suppress
+from ..dvpl import atomic_output, temp_output_path
+from ..manifest import hash_file
+from ..metrics import time_phase
+
+
+# auto tries a reflink and falls back to a copy; hardlinks share the inode and are only used when asked for
+DEDUP_METHODS = ("auto", "copy", "reflink", "hardlink")
+# FICLONE from linux/fs.h, a copy-on-write clone on btrfs, XFS and other reflink-capable filesystems
+FICLONE = 0x40049409
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def reflink_file(src_path, dst_path, fsync=False):
+    import fcntl
+
+    with open(src_path, "rb") as src, atomic_output(dst_path, fsync) as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+def copy_file(src_path, dst_path, fsync=False):
+    with open(src_path, "rb") as src, atomic_output(dst_path, fsync) as dst:
+        shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+
+
+def hardlink_file(src_path, dst_path):
+    temp_path = temp_output_path(dst_path)
+    os.link(src_path, temp_path)
+    try:
+        os.replace(temp_path, dst_path)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.remove(temp_path)
+        raise
+
+
+def clone_file(src_path, dst_path, method="auto", fsync=False):
+    if method == "hardlink":
+        try:
+            hardlink_file(src_path, dst_path)
+            return "hardlink"
+        except OSError:
+            pass
+    elif method in ("auto", "reflink"):
+        try:
+            reflink_file(src_path, dst_path, fsync)
+            return "reflink"
+        except (OSError, ImportError):
+            # Not supported by this filesystem or platform
+            pass
+
+    copy_file(src_path, dst_path, fsync)
+    return "copy"
+
+
+class DedupLeader:
+    __slots__ = ("output", "footer", "done", "copies")
+
+    def __init__(self, output):
+        self.output = output
+        self.footer = None
+        self.done = threading.Event()
+        self.copies = 0
+
+
+class DedupIndex:
+    # The first file of every identical-content group is encoded, the others reuse its output
+    def __init__(self, method="auto"):
+        if method not in DEDUP_METHODS:
+            raise ValueError(f"Unknown dedup method '{method}', expected one of {', '.join(DEDUP_METHODS)}.")
+        self.method = method
+        self.shared_sizes = frozenset()
+        self.leaders = {}
+        self.lock = threading.Lock()
+        self.files = 0
+        self.bytes = 0
+        self.disk_bytes = 0
+        self.methods = Counter()
+
+    def index(self, file_paths):
+        # Only files that share their size with another one can be duplicates, the rest are never hashed
+        sizes = Counter()
+        for file_path in file_paths:
+            with suppress(OSError):
+                sizes[os.path.getsize(file_path)] += 1
+        self.shared_sizes = frozenset(size for size, count in sizes.items() if count > 1)
+
+    def compress(self, src_path, dst_path, compress_func, timings=None, fsync=False):
+        size = os.path.getsize(src_path)
+        if size not in self.shared_sizes:
+            return compress_func(src_path, dst_path)
+
+        with time_phase(timings, "hash"):
+            digest = hash_file(src_path)
+        # The extension is part of the key, compression policies may encode the same bytes differently per type
+        key = (size, digest, os.path.splitext(src_path)[1].lower())
+
+        with self.lock:
+            leader = self.leaders.get(key)
+            if leader is None:
+                leader = self.leaders[key] = DedupLeader(dst_path)
+                is_leader = True
+            else:
+                is_leader = False
+
+        if is_leader:
+            try:
+                leader.footer = compress_func(src_path, dst_path)
+            finally:
+                leader.done.set()
+            return leader.footer
+
+        # The leader is already running on another worker, so waiting here cannot deadlock the pool
+        leader.done.wait()
+        if leader.footer is None:
+            return compress_func(src_path, dst_path)
+
+        with time_phase(timings, "write"):
+            method = clone_file(leader.output, dst_path, self.method, fsync)
+        with self.lock:
+            leader.copies += 1
+            self.files += 1
+            self.bytes += size
+            self.methods[method] += 1
+            if method != "copy":
+                self.disk_bytes += os.path.getsize(dst_path)
+        return leader.footer
+
+    def summary(self):
+        with self.lock:
+            return {
+                "method": self.method,
+                "files": self.files,
+                "groups": sum(1 for leader in self.leaders.values() if leader.copies),
+                # Source bytes that were not encoded again
+                "bytes": self.bytes,
+                # Output bytes shared on disk through reflinks or hardlinks instead of stored twice
+                "disk_bytes": self.disk_bytes,
+                "methods": dict(sorted(self.methods.items())),
+            }
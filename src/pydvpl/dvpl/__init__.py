@@ -1,10 +1,34 @@
 from ._dvpl import (
     read_dvpl_footer,
+    DVPLFooter,
+    stat_dvpl,
     create_dvpl_footer,
     compress_dvpl,
+    compress_dvpl_parts,
+    resolve_compression,
+    lz4_mode,
     decompress_dvpl,
+    validate_dvpl,
+    compress_dvpl_file,
+    decompress_dvpl_file,
+    verify_dvpl_file,
+    read_dvpl_file,
+    map_dvpl_file,
+    write_dvpl_parts,
+    atomic_output,
+    temp_output_path,
+    is_temp_path,
+    compress_stream,
+    decompress_stream,
+    verify_stream,
     DVPL_FOOTER_SIZE,
+    DVPL_FOOTER_STRUCT,
+    DVPL_FOOTER,
     DVPL_TYPE_NONE,
     DVPL_TYPE_LZ4,
+    DVPL_CHUNKED_FOOTER,
+    DVPL_MAX_BLOCK_SIZE,
+    TEMP_SUFFIX,
+    FSYNC_POLICIES,
     __LZ4_VERSION__
 )
\ No newline at end of file
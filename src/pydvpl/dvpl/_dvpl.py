@@ -1,7 +1,14 @@
+import os
+import mmap
+import struct
+import threading
 import lz4.block
 import zlib
-from ..color import Color
+from collections import namedtuple
+from contextlib import contextmanager, suppress
 from lz4 import __version__
+from ..metrics import time_phase
+from ..policy import choose_compression
 
 
 __LZ4_VERSION__ = __version__
@@ -11,74 +18,286 @@ DVPL_FOOTER_SIZE = 20
 DVPL_TYPE_NONE = 0
 DVPL_TYPE_LZ4 = 2
 DVPL_FOOTER = b"DVPL"
+# original size, compressed size, crc32 of the payload, type, signature
+DVPL_FOOTER_STRUCT = struct.Struct("<IIII4s")
+DVPL_CHUNKED_FOOTER = b"DVPC"
+# LZ4_MAX_INPUT_SIZE, the largest buffer a single LZ4 block can hold
+DVPL_MAX_BLOCK_SIZE = 0x7E000000
+STREAM_CHUNK_SIZE = 1024 * 1024
+TEMP_SUFFIX = ".pydvpl-tmp"
+# none: never fsync, batch: fsync a batch of outputs before deleting their originals, always: fsync every output before its rename
+FSYNC_POLICIES = ("none", "batch", "always")
+# lz4.block mode per compression type, 'none' is stored raw and 'auto' is resolved per file first
+LZ4_MODES = {"fast": "fast", "default": "default", "hc": "high_compression"}
 
 
-class DVPLFooter:
-    def __init__(self, original_size, compressed_size, crc32, type_val):
-        self.original_size = original_size
-        self.compressed_size = compressed_size
-        self.crc32 = crc32
-        self.type = type_val
+# A tuple record, no per-instance dict for the millions of footers an audit reads
+DVPLFooter = namedtuple("DVPLFooter", ["original_size", "compressed_size", "crc32", "type"])
 
 
 def create_dvpl_footer(input_size, compressed_size, crc32_val, type_val):
-    result = bytearray(DVPL_FOOTER_SIZE)
-    result[:4] = input_size.to_bytes(4, 'little')
-    result[4:8] = compressed_size.to_bytes(4, 'little')
-    result[8:12] = crc32_val.to_bytes(4, 'little')
-    result[12:16] = type_val.to_bytes(4, 'little')
-    result[16:] = DVPL_FOOTER
-    return result
+    return DVPL_FOOTER_STRUCT.pack(input_size, compressed_size, crc32_val, type_val, DVPL_FOOTER)
 
 
 def read_dvpl_footer(buffer):
     if len(buffer) < DVPL_FOOTER_SIZE:
-        raise ValueError(Color.RED + "InvalidDVPLFooter: Buffer size is smaller than expected" + Color.RESET)
+        raise ValueError("InvalidDVPLFooter: Buffer size is smaller than expected")
 
-    footer_buffer = buffer[-DVPL_FOOTER_SIZE:]
+    original_size, compressed_size, crc32_val, type_val, signature = DVPL_FOOTER_STRUCT.unpack_from(buffer, len(buffer) - DVPL_FOOTER_SIZE)
 
-    if footer_buffer[16:] != DVPL_FOOTER:
-        raise ValueError(Color.RED + "InvalidDVPLFooter: Footer signature mismatch" + Color.RESET)
-
-    original_size = int.from_bytes(footer_buffer[:4], 'little')
-    compressed_size = int.from_bytes(footer_buffer[4:8], 'little')
-    crc32_val = int.from_bytes(footer_buffer[8:12], 'little')
-    type_val = int.from_bytes(footer_buffer[12:16], 'little')
+    if signature != DVPL_FOOTER:
+        if signature == DVPL_CHUNKED_FOOTER:
+            raise ValueError("ChunkedDVPL: File uses the chunked multi-block encoding, which the game client cannot read. Use --chunked to process it")
+        raise ValueError("InvalidDVPLFooter: Footer signature mismatch")
 
     return DVPLFooter(original_size, compressed_size, crc32_val, type_val)
 
 
-def compress_dvpl(buffer, compression_type="default"):
-    if compression_type == "fast":
-        mode = "fast"
-    elif compression_type == "hc":
-        mode = "high_compression"
-    else:
-        mode = "default"
+def stat_dvpl(path):
+    with open(path, "rb") as f:
+        file_size = f.seek(0, os.SEEK_END)
+        if file_size < DVPL_FOOTER_SIZE:
+            raise ValueError("InvalidDVPLFooter: Buffer size is smaller than expected")
+        f.seek(-DVPL_FOOTER_SIZE, os.SEEK_END)
+        footer_data = read_dvpl_footer(f.read(DVPL_FOOTER_SIZE))
 
-    compressed_block = lz4.block.compress(buffer, store_size=False, mode=mode)
-    footer_buffer = create_dvpl_footer(len(buffer), len(compressed_block), zlib.crc32(compressed_block), DVPL_TYPE_LZ4)
-    return compressed_block + footer_buffer
+    if file_size - DVPL_FOOTER_SIZE != footer_data.compressed_size:
+        raise ValueError("DVPLSizeMismatch")
 
+    return footer_data
 
-def decompress_dvpl(buffer):
+
+def resolve_compression(compression_type, path, buffer):
+    # A callable compression type is a per-file policy deciding from the path and content
+    if callable(compression_type):
+        return compression_type(path, buffer)
+    if compression_type == "auto":
+        return choose_compression(path, buffer)
+    return compression_type
+
+
+def lz4_mode(compression_type):
+    try:
+        return LZ4_MODES[compression_type]
+    except KeyError:
+        raise ValueError(f"Unknown compression type '{compression_type}', expected none, {', '.join(LZ4_MODES)} or auto.") from None
+
+
+def compress_dvpl_parts(buffer, compression_type="default", timings=None):
+    if len(buffer) > DVPL_MAX_BLOCK_SIZE:
+        raise ValueError("DVPLSizeOverflow: File is too large for a single-block DVPL file. Use --chunked, which the game client cannot read")
+
+    if compression_type == "none":
+        # Already-compressed content is stored raw, the payload is the input itself
+        with time_phase(timings, "crc"):
+            crc32_val = zlib.crc32(buffer)
+        return buffer, create_dvpl_footer(len(buffer), len(buffer), crc32_val, DVPL_TYPE_NONE)
+
+    mode = lz4_mode(compression_type)
+    with time_phase(timings, "lz4"):
+        compressed_block = lz4.block.compress(buffer, store_size=False, mode=mode)
+    with time_phase(timings, "crc"):
+        crc32_val = zlib.crc32(compressed_block)
+    return compressed_block, create_dvpl_footer(len(buffer), len(compressed_block), crc32_val, DVPL_TYPE_LZ4)
+
+
+def compress_dvpl(buffer, compression_type="default"):
+    compressed_block, footer_buffer = compress_dvpl_parts(buffer, resolve_compression(compression_type, None, buffer))
+    return bytes(compressed_block) + footer_buffer
+
+
+def validate_dvpl(buffer, timings=None):
     footer_data = read_dvpl_footer(buffer)
-    target_block = buffer[:-DVPL_FOOTER_SIZE]
+    # A memoryview slice avoids copying the payload out of bytes or mmap buffers
+    target_block = memoryview(buffer)[:-DVPL_FOOTER_SIZE]
 
     if len(target_block) != footer_data.compressed_size:
-        raise ValueError(Color.RED + "DVPLSizeMismatch" + Color.RESET)
+        target_block.release()
+        raise ValueError("DVPLSizeMismatch")
 
-    if zlib.crc32(target_block) != footer_data.crc32:
-        raise ValueError(Color.RED + "DVPLCRC32Mismatch" + Color.RESET)
+    with time_phase(timings, "crc"):
+        crc32_val = zlib.crc32(target_block)
+    if crc32_val != footer_data.crc32:
+        target_block.release()
+        raise ValueError("DVPLCRC32Mismatch")
 
     if footer_data.type == DVPL_TYPE_NONE:
-        if footer_data.original_size != footer_data.compressed_size or footer_data.type != DVPL_TYPE_NONE:
-            raise ValueError(Color.RED + "DVPLTypeSizeMismatch" + Color.RESET)
-        return target_block
-    elif footer_data.type == DVPL_TYPE_LZ4:
+        if footer_data.original_size != footer_data.compressed_size:
+            target_block.release()
+            raise ValueError("DVPLTypeSizeMismatch")
+    elif footer_data.type != DVPL_TYPE_LZ4:
+        target_block.release()
+        raise ValueError("UNKNOWN DVPL FORMAT")
+    elif footer_data.original_size > DVPL_MAX_BLOCK_SIZE:
+        # A corrupt size would otherwise reach lz4 as an allocation it cannot make
+        target_block.release()
+        raise ValueError("DVPLSizeOverflow: Footer original size exceeds the single-block limit")
+
+    return footer_data, target_block
+
+
+def decode_dvpl_block(footer_data, target_block, timings=None):
+    with time_phase(timings, "lz4"):
         de_dvpl_block = lz4.block.decompress(target_block, uncompressed_size=footer_data.original_size)
-        if len(de_dvpl_block) != footer_data.original_size:
-            raise ValueError(Color.RED + "DVPLDecodeSizeMismatch" + Color.RESET)
-        return de_dvpl_block
-    else:
-        raise ValueError(Color.RED + "UNKNOWN DVPL FORMAT" + Color.RESET)
+    if len(de_dvpl_block) != footer_data.original_size:
+        raise ValueError("DVPLDecodeSizeMismatch")
+    return de_dvpl_block
+
+
+def decompress_dvpl(buffer):
+    footer_data, target_block = validate_dvpl(buffer)
+
+    with target_block:
+        if footer_data.type == DVPL_TYPE_NONE:
+            return target_block.tobytes()
+        return decode_dvpl_block(footer_data, target_block)
+
+
+@contextmanager
+def map_dvpl_file(path, use_mmap=True, timings=None):
+    with open(path, "rb") as f:
+        # Empty files cannot be mapped, and some filesystems do not support mmap at all
+        if not use_mmap or os.fstat(f.fileno()).st_size == 0:
+            with time_phase(timings, "read"):
+                buffer = f.read()
+            yield buffer
+            return
+
+        # Mapped pages are faulted in lazily, so their disk time lands in the crc and lz4 phases
+        with time_phase(timings, "read"):
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with mapped:
+            yield mapped
+
+
+def is_temp_path(path):
+    return path.endswith(TEMP_SUFFIX)
+
+
+def temp_output_path(path):
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}{TEMP_SUFFIX}")
+
+
+@contextmanager
+def atomic_output(path, fsync=False):
+    # The output only appears under its name once complete, a killed run leaves a temp file instead of a truncated one
+    temp_path = temp_output_path(path)
+    try:
+        with open(temp_path, "wb") as f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.remove(temp_path)
+        raise
+
+
+def write_dvpl_parts(path, *parts, timings=None, fsync=False):
+    # Write the payload and the footer separately instead of concatenating them
+    with time_phase(timings, "write"), atomic_output(path, fsync) as f:
+        for part in parts:
+            f.write(part)
+
+
+def compress_dvpl_file(src_path, dst_path, compression_type="default", use_mmap=True, timings=None, fsync=False, on_source=None,
+                       existing_footer=None):
+    with map_dvpl_file(src_path, use_mmap, timings) as buffer:
+        if on_source is not None:
+            on_source(buffer)
+        # The 'auto' policy trial-compresses a sample, which is LZ4 work too
+        with time_phase(timings, "lz4"):
+            compression_type = resolve_compression(compression_type, src_path, buffer)
+        compressed_block, footer_buffer = compress_dvpl_parts(buffer, compression_type, timings)
+        footer_data = read_dvpl_footer(footer_buffer)
+        # An identical source encodes to the same footer (sizes, CRC32 of the payload, type), the output is left as it is
+        if footer_data != existing_footer:
+            # Stored payloads still point into the mapping, so write before it is closed
+            write_dvpl_parts(dst_path, compressed_block, footer_buffer, timings=timings, fsync=fsync)
+        del compressed_block
+
+    return footer_data
+
+
+def decompress_dvpl_file(src_path, dst_path, use_mmap=True, timings=None, fsync=False):
+    with map_dvpl_file(src_path, use_mmap, timings) as buffer:
+        footer_data, target_block = validate_dvpl(buffer, timings)
+
+        with target_block:
+            if footer_data.type == DVPL_TYPE_NONE:
+                write_dvpl_parts(dst_path, target_block, timings=timings, fsync=fsync)
+                return footer_data
+            de_dvpl_block = decode_dvpl_block(footer_data, target_block, timings)
+
+    write_dvpl_parts(dst_path, de_dvpl_block, timings=timings, fsync=fsync)
+    return footer_data
+
+
+def read_dvpl_file(path, use_mmap=True):
+    with map_dvpl_file(path, use_mmap) as buffer:
+        footer_data, target_block = validate_dvpl(buffer)
+
+        with target_block:
+            if footer_data.type == DVPL_TYPE_NONE:
+                return target_block.tobytes()
+            return decode_dvpl_block(footer_data, target_block)
+
+
+def verify_dvpl_file(path, full=True, use_mmap=True, timings=None):
+    with map_dvpl_file(path, use_mmap, timings) as buffer:
+        footer_data, target_block = validate_dvpl(buffer, timings)
+
+        with target_block:
+            if full and footer_data.type == DVPL_TYPE_LZ4:
+                decode_dvpl_block(footer_data, target_block, timings)
+
+    return footer_data
+
+
+def read_stream(src):
+    # Pipes and sockets return short reads, so collect until EOF into one growable buffer
+    buffer = bytearray()
+    while True:
+        chunk = src.read(STREAM_CHUNK_SIZE)
+        if not chunk:
+            return buffer
+        buffer += chunk
+
+
+def compress_stream(src, dst, compression_type="default"):
+    buffer = read_stream(src)
+    compressed_block, footer_buffer = compress_dvpl_parts(buffer, resolve_compression(compression_type, None, buffer))
+    del buffer
+
+    dst.write(compressed_block)
+    dst.write(footer_buffer)
+    return read_dvpl_footer(footer_buffer)
+
+
+def decompress_stream(src, dst):
+    buffer = read_stream(src)
+    footer_data, target_block = validate_dvpl(buffer)
+
+    with target_block:
+        if footer_data.type == DVPL_TYPE_NONE:
+            dst.write(target_block)
+            return footer_data
+        de_dvpl_block = decode_dvpl_block(footer_data, target_block)
+    del buffer
+
+    dst.write(de_dvpl_block)
+    return footer_data
+
+
+def verify_stream(src, full=True):
+    buffer = read_stream(src)
+    footer_data, target_block = validate_dvpl(buffer)
+
+    with target_block:
+        if full and footer_data.type == DVPL_TYPE_LZ4:
+            decode_dvpl_block(footer_data, target_block)
+
+    return footer_data
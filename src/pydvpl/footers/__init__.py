@@ -0,0 +1,9 @@
+from ._footers import (
+    FooterTable,
+    read_footers,
+    parse_footers,
+    check_footers,
+    footer_masks,
+    FOOTER_COLUMNS,
+    ANOMALY_KINDS
+)
@@ -0,0 +1,239 @@
+import os
+import sys
+from array import array
+from ..dvpl import (
+    DVPL_FOOTER_SIZE,
+    DVPL_FOOTER,
+    DVPL_CHUNKED_FOOTER,
+    DVPL_TYPE_NONE,
+    DVPL_TYPE_LZ4,
+    DVPL_MAX_BLOCK_SIZE,
+    DVPLFooter,
+)
+
+
+# A footer is five little-endian uint32 words, the signature compared as a word too
+FOOTER_COLUMNS = ("original_size", "compressed_size", "crc32", "type", "signature")
+FOOTER_WORDS = len(FOOTER_COLUMNS)
+DVPL_SIGNATURE = int.from_bytes(DVPL_FOOTER, "little")
+DVPL_CHUNKED_SIGNATURE = int.from_bytes(DVPL_CHUNKED_FOOTER, "little")
+DVPL_VALID_TYPES = (DVPL_TYPE_NONE, DVPL_TYPE_LZ4)
+# Ratios further than this many interquartile ranges outside the middle half are reported
+RATIO_OUTLIER_FENCE = 3.0
+RATIO_OUTLIER_MIN_FILES = 8
+# Error strings as stat_dvpl raises them, so info output does not depend on the read path
+FOOTER_ERRORS = {
+    "short": "InvalidDVPLFooter: Buffer size is smaller than expected",
+    "chunked": "ChunkedDVPL: File uses the chunked multi-block encoding, which the game client cannot read. Use --chunked to process it",
+    "signature": "InvalidDVPLFooter: Footer signature mismatch",
+    "size_mismatch": "DVPLSizeMismatch",
+}
+# Fewest footers worth handing to a worker thread
+FOOTER_READ_SLICE = 1024
+ANOMALY_KINDS = ("type", "stored_size", "overflow", "ratio_outlier")
+
+
+def load_numpy():
+    # Optional: columns become numpy arrays and checks run as array expressions
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def lz4_bound(size):
+    # LZ4_COMPRESSBOUND, the largest block LZ4 can produce for an input of this size
+    return size + size // 255 + 16
+
+
+class FooterTable:
+    __slots__ = ("paths", "file_sizes", "errors", "original_size", "compressed_size", "crc32", "type", "signature")
+
+    def __init__(self, paths, file_sizes, errors, columns):
+        self.paths = paths
+        self.file_sizes = file_sizes
+        # Row index to the error of a file whose footer could not be read at all
+        self.errors = errors
+        for name in FOOTER_COLUMNS:
+            setattr(self, name, columns[name])
+
+    def __len__(self):
+        return len(self.paths)
+
+    def footer(self, row):
+        return DVPLFooter(int(self.original_size[row]), int(self.compressed_size[row]), int(self.crc32[row]), int(self.type[row]))
+
+    def row_error(self, row):
+        if row in self.errors:
+            return self.errors[row]
+        signature = self.signature[row]
+        if signature != DVPL_SIGNATURE:
+            return FOOTER_ERRORS["chunked"] if signature == DVPL_CHUNKED_SIGNATURE else FOOTER_ERRORS["signature"]
+        if self.file_sizes[row] - DVPL_FOOTER_SIZE != self.compressed_size[row]:
+            return FOOTER_ERRORS["size_mismatch"]
+        return None
+
+    def to_entries(self):
+        # The same entry dicts info mode builds one stat_dvpl call at a time
+        entries = []
+        for row, path in enumerate(self.paths):
+            error = self.row_error(row)
+            if error is not None:
+                entries.append({"path": path, "error": error})
+                continue
+            footer = self.footer(row)
+            entries.append({
+                "path": path,
+                "original_size": footer.original_size,
+                "compressed_size": footer.compressed_size,
+                "crc32": footer.crc32,
+                "type": footer.type,
+            })
+        return entries
+
+
+def parse_footers(blob, numpy=None):
+    # blob is a run of DVPL_FOOTER_SIZE byte footers, parsed in one pass into one column per field
+    if len(blob) % DVPL_FOOTER_SIZE:
+        raise ValueError("InvalidDVPLFooter: Buffer size is not a multiple of the footer size")
+
+    if numpy is not None:
+        dtype = numpy.dtype([(name, "<u4") for name in FOOTER_COLUMNS])
+        rows = numpy.frombuffer(blob, dtype=dtype)
+        return {name: rows[name].astype(numpy.int64) for name in FOOTER_COLUMNS}
+
+    words = array("I", bytes(blob))
+    if sys.byteorder != "little":
+        words.byteswap()
+    # Extended slices of an array are copied in C, one column per stride
+    return {name: words[index::FOOTER_WORDS] for index, name in enumerate(FOOTER_COLUMNS)}
+
+
+def read_footer_into(blob, row, path):
+    # Only the trailing footer is read, the rest of the file is never touched
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        file_size = os.fstat(fd).st_size
+        if file_size < DVPL_FOOTER_SIZE:
+            return file_size, FOOTER_ERRORS["short"]
+        offset = row * DVPL_FOOTER_SIZE
+        if hasattr(os, "pread"):
+            data = os.pread(fd, DVPL_FOOTER_SIZE, file_size - DVPL_FOOTER_SIZE)
+        else:
+            os.lseek(fd, file_size - DVPL_FOOTER_SIZE, os.SEEK_SET)
+            data = os.read(fd, DVPL_FOOTER_SIZE)
+        blob[offset:offset + DVPL_FOOTER_SIZE] = data
+        return file_size, None
+    finally:
+        os.close(fd)
+
+
+def read_footers(paths, workers=1, use_numpy=True):
+    paths = list(paths)
+    blob = bytearray(len(paths) * DVPL_FOOTER_SIZE)
+    file_sizes = array("q", bytes(8 * len(paths)))
+    errors = {}
+
+    def read_rows(rows):
+        for row in rows:
+            try:
+                file_sizes[row], error = read_footer_into(blob, row, paths[row])
+            except OSError as e:
+                error = str(e)
+            if error is not None:
+                errors[row] = error
+
+    # Each worker takes a contiguous slice, a future per 20 byte read costs more than the read
+    slice_size = max(FOOTER_READ_SLICE, -(-len(paths) // max(workers, 1)))
+    slices = [range(start, min(start + slice_size, len(paths))) for start in range(0, len(paths), slice_size)]
+    if workers > 1 and len(slices) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for _ in executor.map(read_rows, slices):
+                pass
+    else:
+        for rows in slices:
+            read_rows(rows)
+
+    numpy = load_numpy() if use_numpy else None
+    columns = parse_footers(blob, numpy)
+    if numpy is not None:
+        file_sizes = numpy.frombuffer(file_sizes, dtype=numpy.int64)
+    return FooterTable(paths, file_sizes, errors, columns)
+
+
+def footer_masks(table):
+    # One boolean column per check, True where a footer is suspicious
+    original = table.original_size
+    compressed = table.compressed_size
+    types = table.type
+    numpy = None if isinstance(original, array) else load_numpy()
+
+    if numpy is not None:
+        readable = numpy.ones(len(table), dtype=bool)
+        readable[list(table.errors)] = False
+        valid = readable & (table.signature == DVPL_SIGNATURE) & (table.file_sizes - DVPL_FOOTER_SIZE == compressed)
+        stored = types == DVPL_TYPE_NONE
+        masks = {
+            "type": valid & ~numpy.isin(types, DVPL_VALID_TYPES),
+            "stored_size": valid & stored & (original != compressed),
+            "overflow": valid & ((original > DVPL_MAX_BLOCK_SIZE) | (~stored & (compressed > lz4_bound(original)))),
+        }
+        ratio_rows = valid & (types == DVPL_TYPE_LZ4) & (original > 0)
+        ratios = compressed[ratio_rows] / original[ratio_rows]
+        outliers = numpy.zeros(len(table), dtype=bool)
+        if len(ratios) >= RATIO_OUTLIER_MIN_FILES:
+            low, high = ratio_fences(numpy.percentile(ratios, [25, 75]))
+            outliers[ratio_rows] = (ratios < low) | (ratios > high)
+        masks["ratio_outlier"] = outliers
+        return {kind: mask.tolist() for kind, mask in masks.items()}
+
+    valid = [table.row_error(row) is None for row in range(len(table))]
+    rows = list(zip(valid, original, compressed, types))
+    masks = {
+        "type": [ok and kind not in DVPL_VALID_TYPES for ok, _, _, kind in rows],
+        "stored_size": [ok and kind == DVPL_TYPE_NONE and size != stored for ok, size, stored, kind in rows],
+        "overflow": [ok and (size > DVPL_MAX_BLOCK_SIZE or (kind != DVPL_TYPE_NONE and stored > lz4_bound(size))) for ok, size, stored, kind in rows],
+    }
+    ratio_rows = [ok and kind == DVPL_TYPE_LZ4 and size > 0 for ok, size, _, kind in rows]
+    ratios = [stored / size for (_, size, stored, _), use in zip(rows, ratio_rows) if use]
+    outliers = [False] * len(rows)
+    if len(ratios) >= RATIO_OUTLIER_MIN_FILES:
+        low, high = ratio_fences(quartiles(ratios))
+        for row, use in enumerate(ratio_rows):
+            if use:
+                ratio = compressed[row] / original[row]
+                outliers[row] = ratio < low or ratio > high
+    masks["ratio_outlier"] = outliers
+    return masks
+
+
+def quartiles(values):
+    # Linear interpolation between closest ranks, as numpy.percentile does by default
+    values = sorted(values)
+    result = []
+    for fraction in (0.25, 0.75):
+        position = (len(values) - 1) * fraction
+        lower = int(position)
+        upper = min(lower + 1, len(values) - 1)
+        result.append(values[lower] + (values[upper] - values[lower]) * (position - lower))
+    return result
+
+
+def ratio_fences(quartile_pair):
+    first, third = (float(value) for value in quartile_pair)
+    spread = third - first
+    return first - RATIO_OUTLIER_FENCE * spread, third + RATIO_OUTLIER_FENCE * spread
+
+
+def check_footers(table):
+    masks = footer_masks(table)
+    files = []
+    for kind in ANOMALY_KINDS:
+        files.extend({"path": table.paths[row], "kind": kind} for row, flagged in enumerate(masks[kind]) if flagged)
+    return {
+        "counts": {kind: sum(masks[kind]) for kind in ANOMALY_KINDS},
+        "files": sorted(files, key=lambda anomaly: (anomaly["path"], anomaly["kind"])),
+    }
@@ -0,0 +1,11 @@
+from ._journal import (
+    Journal,
+    CommitQueue,
+    fsync_path,
+    syncfs_paths,
+    remove_originals,
+    remove_temp_files,
+    DEFAULT_JOURNAL_NAME,
+    FSYNC_POLICIES,
+    COMMIT_BATCH_SIZE
+)
@@ -0,0 +1,222 @@
+import json
+import os
+import threading
+import time
+from contextlib import suppress
+from functools import lru_cache
+from ..dvpl import is_temp_path, FSYNC_POLICIES
+
+
+JOURNAL_VERSION = 1
+DEFAULT_JOURNAL_NAME = ".pydvpl-journal"
+COMMIT_BATCH_SIZE = 256
+
+
+def fsync_path(path):
+    # Directories cannot be opened for fsync on every platform, their renames are then as durable as the OS makes them
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@lru_cache(maxsize=1)
+def load_syncfs():
+    # syncfs(2) is Linux only and the os module does not wrap it
+    try:
+        import ctypes
+
+        return ctypes.CDLL(None, use_errno=True).syncfs
+    except (ImportError, OSError, AttributeError, TypeError):
+        return None
+
+
+def syncfs_paths(paths):
+    # One syncfs per filesystem flushes every dirty file and rename on it, instead of one fsync per output
+    syncfs = load_syncfs()
+    if syncfs is None:
+        return False
+
+    devices = {}
+    for path in paths:
+        try:
+            devices.setdefault(os.stat(path).st_dev, path)
+        except OSError:
+            return False
+    for path in devices.values():
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return False
+        try:
+            if syncfs(fd) != 0:
+                return False
+        finally:
+            os.close(fd)
+    return True
+
+
+def remove_originals(file_paths):
+    for file_path in file_paths:
+        with suppress(FileNotFoundError):
+            os.remove(file_path)
+
+
+def remove_temp_files(directories):
+    # Temp outputs of a killed run are never renamed into place, nothing else would clean them up
+    for directory in directories:
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if is_temp_path(entry.name) and entry.is_file(follow_symlinks=False):
+                        with suppress(FileNotFoundError):
+                            os.remove(entry.path)
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+
+
+class Journal:
+    # JSON lines: a header with the mode and the walked file list, then one line per committed file
+    def __init__(self, path, root):
+        self.path = os.path.abspath(path)
+        self.root = os.path.abspath(root)
+        self.file = None
+        self.lock = threading.Lock()
+
+    def owns(self, path):
+        return os.path.abspath(path) == self.path
+
+    def key(self, file_path):
+        return os.path.relpath(os.path.abspath(file_path), self.root).replace(os.sep, "/")
+
+    def begin(self, mode, file_paths):
+        # A journal left behind by an earlier interrupted run may have been walked as an input
+        header = {"version": JOURNAL_VERSION, "mode": mode, "files": [self.key(file_path) for file_path in file_paths if not self.owns(file_path)]}
+        self.file = open(self.path, "w", encoding="utf-8")
+        self.file.write(json.dumps(header, separators=(",", ":")) + "\n")
+        self.file.flush()
+
+    def resume(self, mode):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                header = json.loads(f.readline())
+                done = set()
+                for line in f:
+                    # The last line may be cut short by the crash that interrupted the run
+                    with suppress(ValueError):
+                        done.add(json.loads(line))
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No interrupted run to resume, journal '{self.path}' not found.")
+        except ValueError:
+            raise ValueError(f"Journal '{self.path}' is corrupt, start a new run without --resume.")
+
+        if header.get("version") != JOURNAL_VERSION or header.get("mode") != mode:
+            raise ValueError(f"Journal '{self.path}' belongs to a '{header.get('mode')}' run, not '{mode}'.")
+
+        # Outputs are written next to their inputs, so only the directories of journaled files can hold temp files
+        remove_temp_files({os.path.dirname(os.path.join(self.root, key)) for key in header["files"]})
+
+        self.file = open(self.path, "a", encoding="utf-8")
+        pending = [os.path.join(self.root, key) for key in header["files"] if key not in done]
+        return pending, [os.path.join(self.root, key) for key in done]
+
+    def record(self, file_paths, fsync=False):
+        lines = "".join(json.dumps(self.key(file_path)) + "\n" for file_path in file_paths)
+        with self.lock:
+            self.file.write(lines)
+            self.file.flush()
+            if fsync:
+                os.fsync(self.file.fileno())
+
+    def close(self, completed=False):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        # A finished run has nothing left to resume
+        if completed:
+            with suppress(FileNotFoundError):
+                os.remove(self.path)
+
+
+class CommitQueue:
+    # Finished outputs are committed in batches: made durable, journaled, and only then are their originals deleted
+    def __init__(self, fsync="batch", keep_originals=False, journal=None, metrics=None, batch_size=COMMIT_BATCH_SIZE):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync}', expected one of {', '.join(FSYNC_POLICIES)}.")
+        self.fsync = fsync
+        self.keep_originals = keep_originals
+        self.journal = journal
+        self.metrics = metrics
+        self.batch_size = batch_size
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Outputs finished before an error are still committed, a resume then skips them
+        self.flush()
+
+    @property
+    def fsync_each(self):
+        return self.fsync == "always"
+
+    def owns(self, path):
+        return self.journal is not None and self.journal.owns(path)
+
+    def add(self, src_path, output_path):
+        with self.lock:
+            self.pending.append((src_path, output_path))
+            if len(self.pending) < self.batch_size:
+                return
+            batch, self.pending = self.pending, []
+        # Committed outside the lock, the other workers keep encoding while this one waits on fsync
+        self.commit(batch)
+
+    def flush(self):
+        with self.lock:
+            batch, self.pending = self.pending, []
+        self.commit(batch)
+
+    def timed(self, name, func, *args):
+        start_time = time.perf_counter()
+        func(*args)
+        if self.metrics is not None:
+            self.metrics.record_phase(name, time.perf_counter() - start_time)
+
+    def commit(self, batch):
+        if not batch:
+            return
+
+        # Outputs must be durable before anything relies on them: their originals are deleted, or the journal
+        # tells a resume to skip them. Kept originals without a journal are simply redone after a crash.
+        if not self.keep_originals or self.journal is not None:
+            if self.fsync == "batch":
+                self.timed("fsync", self.sync_outputs, batch)
+            elif self.fsync == "always":
+                # Each output was fsynced before its rename, the renames still need their directories synced
+                self.timed("fsync", self.sync_directories, batch)
+        if self.journal is not None:
+            self.journal.record([src_path for src_path, _ in batch], self.fsync != "none")
+        if not self.keep_originals:
+            self.timed("unlink", remove_originals, [src_path for src_path, _ in batch])
+
+    def sync_outputs(self, batch):
+        if syncfs_paths({os.path.dirname(os.path.abspath(output_path)) for _, output_path in batch}):
+            return
+        # Without syncfs every output and directory is synced on its own
+        for _, output_path in batch:
+            fsync_path(output_path)
+        self.sync_directories(batch)
+
+    def sync_directories(self, batch):
+        # The renames live in the directories, which need their own fsync
+        for directory in {os.path.dirname(os.path.abspath(output_path)) for _, output_path in batch}:
+            fsync_path(directory)
@@ -0,0 +1,7 @@
+from ._manifest import (
+    Manifest,
+    hash_file,
+    hash_buffer,
+    DEFAULT_MANIFEST_NAME,
+    MANIFEST_VERSION
+)
\ No newline at end of file
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import threading
+from ..dvpl import stat_dvpl
+
+
+MANIFEST_VERSION = 1
+DEFAULT_MANIFEST_NAME = ".pydvpl-manifest.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_buffer(buffer):
+    return hashlib.blake2b(buffer, digest_size=16).hexdigest()
+
+
+class Manifest:
+    def __init__(self, path, root):
+        self.path = os.path.abspath(path)
+        self.root = os.path.abspath(root)
+        self.entries = {}
+        self.seen = set()
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            # A corrupt manifest only costs one full rebuild
+            return
+
+        if data.get("version") == MANIFEST_VERSION:
+            self.entries = data.get("entries", {})
+
+    def key(self, src_path):
+        return os.path.relpath(os.path.abspath(src_path), self.root).replace(os.sep, "/")
+
+    def owns(self, path):
+        return os.path.abspath(path) == self.path
+
+    def is_fresh(self, src_path, dst_path, compression):
+        key = self.key(src_path)
+        with self.lock:
+            self.seen.add(key)
+            entry = self.entries.get(key)
+
+        if entry is None or entry["compression"] != compression:
+            return False
+
+        src_stat = os.stat(src_path)
+        if src_stat.st_size != entry["size"]:
+            return False
+
+        # The output must still carry the footer we wrote, not a stale or hand-edited file
+        try:
+            footer_data = stat_dvpl(dst_path)
+        except (OSError, ValueError):
+            return False
+        if (footer_data.original_size, footer_data.compressed_size, footer_data.crc32) != tuple(entry["footer"]):
+            return False
+
+        if src_stat.st_mtime_ns == entry["mtime_ns"]:
+            return True
+
+        # Touched but possibly unchanged (checkouts, copies): fall back to the content hash
+        if hash_file(src_path) != entry["hash"]:
+            return False
+
+        with self.lock:
+            entry["mtime_ns"] = src_stat.st_mtime_ns
+        return True
+
+    def record(self, src_path, compression, footer_data, digest=None, src_stat=None):
+        # Callers pass the stat taken before compressing and the hash of the buffer they compressed, so an edit
+        # in between is seen as a changed file on the next run. Without them the file is read again.
+        if src_stat is None:
+            src_stat = os.stat(src_path)
+        entry = {
+            "size": src_stat.st_size,
+            "mtime_ns": src_stat.st_mtime_ns,
+            "hash": digest if digest is not None else hash_file(src_path),
+            "compression": compression,
+            "footer": [footer_data.original_size, footer_data.compressed_size, footer_data.crc32],
+        }
+        key = self.key(src_path)
+        with self.lock:
+            self.seen.add(key)
+            self.entries[key] = entry
+
+    def save(self, evict=True):
+        with self.lock:
+            # Drop entries whose source was not seen in this run (deleted, renamed or now ignored)
+            if evict:
+                self.entries = {key: entry for key, entry in self.entries.items() if key in self.seen}
+            data = {"version": MANIFEST_VERSION, "entries": dict(sorted(self.entries.items()))}
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,8 @@
+from ._metrics import (
+    RunMetrics,
+    FileTimings,
+    time_phase,
+    error_kind,
+    PHASES,
+    DEFAULT_SLOWEST
+)
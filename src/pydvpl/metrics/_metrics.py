@@ -0,0 +1,185 @@
+import os
+import heapq
+import threading
+import time
+from contextlib import nullcontext
+
+
+PHASES = ("walk", "read", "hash", "crc", "lz4", "write", "fsync", "unlink")
+DEFAULT_SLOWEST = 10
+
+
+class PhaseTimer:
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timings.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class FileTimings:
+    # One per file and only touched by the worker processing it, so no locking here
+    __slots__ = ("path", "phases", "bytes_in", "bytes_out", "seconds", "error", "start")
+
+    def __init__(self, path):
+        self.path = path
+        self.phases = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+        self.error = None
+        self.start = time.perf_counter()
+
+    def phase(self, name):
+        return PhaseTimer(self, name)
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def to_dict(self):
+        entry = {
+            "path": self.path,
+            "seconds": round(self.seconds, 6),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "phases": {name: round(seconds, 6) for name, seconds in self.phases.items()},
+        }
+        if self.error is not None:
+            entry["error"] = error_kind(self.error)
+        return entry
+
+
+def time_phase(timings, name):
+    # Instrumentation is opt-in, untimed runs only pay for a nullcontext
+    return nullcontext() if timings is None else timings.phase(name)
+
+
+def error_kind(error):
+    # Format errors carry their kind as a message prefix, e.g. 'DVPLCRC32Mismatch' or 'ChunkedDVPL: ...'
+    kind = str(error).partition(":")[0]
+    if isinstance(error, ValueError) and kind.isidentifier():
+        return kind
+    return type(error).__name__
+
+
+def file_extension(path):
+    if path.endswith(".dvpl"):
+        path = path[:-len(".dvpl")]
+    return os.path.splitext(path)[1].lower() or "(none)"
+
+
+def megabytes_per_second(size, seconds):
+    return round(size / seconds / (1024 * 1024), 2) if seconds > 0 else 0.0
+
+
+# Hooks get the FileTimings of every finished file, called on the worker thread one at a time
+class RunMetrics:
+    def __init__(self, mode=None, workers=1, slowest=DEFAULT_SLOWEST, hooks=()):
+        self.mode = mode
+        self.workers = workers
+        self.slowest = slowest
+        self.hooks = list(hooks)
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.succeeded = 0
+        self.failed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.extensions = {}
+        self.errors = {}
+        self.failures = []
+        self.slowest_files = []
+        self.sequence = 0
+        # Extra report sections from optional passes, e.g. dedup
+        self.sections = {}
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def start_file(self, path):
+        return FileTimings(path)
+
+    def record_walk(self, seconds):
+        self.record_phase("walk", seconds)
+
+    def record_phase(self, name, seconds):
+        # For run-level work that is not tied to one file, like the walk or batched commits
+        with self.lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def finish_file(self, timings, error=None):
+        timings.seconds = time.perf_counter() - timings.start
+        timings.error = error
+
+        with self.lock:
+            for name, seconds in timings.phases.items():
+                self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+            if error is None:
+                self.succeeded += 1
+                self.bytes_in += timings.bytes_in
+                self.bytes_out += timings.bytes_out
+                bucket = self.extensions.setdefault(file_extension(timings.path), {"files": 0, "bytes_in": 0, "bytes_out": 0, "seconds": 0.0})
+                bucket["files"] += 1
+                bucket["bytes_in"] += timings.bytes_in
+                bucket["bytes_out"] += timings.bytes_out
+                bucket["seconds"] += timings.seconds
+            else:
+                self.failed += 1
+                kind = error_kind(error)
+                self.errors[kind] = self.errors.get(kind, 0) + 1
+                self.failures.append({"path": timings.path, "error": kind, "message": str(error)})
+
+            # A bounded min-heap keeps the N slowest files without holding every entry
+            self.sequence += 1
+            item = (timings.seconds, self.sequence, timings)
+            if len(self.slowest_files) < self.slowest:
+                heapq.heappush(self.slowest_files, item)
+            elif self.slowest and item > self.slowest_files[0]:
+                heapq.heapreplace(self.slowest_files, item)
+
+            for hook in self.hooks:
+                hook(timings)
+
+        return timings
+
+    def to_dict(self):
+        with self.lock:
+            elapsed = time.perf_counter() - self.start
+            extensions = {}
+            for extension, bucket in sorted(self.extensions.items()):
+                extensions[extension] = dict(bucket, seconds=round(bucket["seconds"], 6), mb_per_s=megabytes_per_second(bucket["bytes_in"], bucket["seconds"]))
+
+            return {
+                "mode": self.mode,
+                "workers": self.workers,
+                "elapsed": round(elapsed, 6),
+                "files": {"succeeded": self.succeeded, "failed": self.failed},
+                "bytes": {"in": self.bytes_in, "out": self.bytes_out},
+                "throughput": {
+                    "in_mb_per_s": megabytes_per_second(self.bytes_in, elapsed),
+                    "out_mb_per_s": megabytes_per_second(self.bytes_out, elapsed),
+                },
+                # Summed over workers, so with --jobs > 1 the total can exceed the elapsed time
+                "phases": {name: round(seconds, 6) for name, seconds in self.phases.items()},
+                "extensions": extensions,
+                "slowest": [item[2].to_dict() for item in sorted(self.slowest_files, reverse=True)],
+                "errors": dict(sorted(self.errors.items())),
+                "failures": sorted(self.failures, key=lambda failure: failure["path"]),
+                **self.sections,
+            }
+
+    def write_report(self, path):
+        import json
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
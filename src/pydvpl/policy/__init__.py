@@ -0,0 +1,9 @@
+from ._policy import (
+    choose_compression,
+    parse_compression_overrides,
+    compression_policy,
+    STORE_EXTENSIONS,
+    AUTO_SAMPLE_SIZE,
+    AUTO_STORE_THRESHOLD,
+    AUTO_HC_THRESHOLD
+)
\ No newline at end of file
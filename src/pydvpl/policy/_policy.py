@@ -0,0 +1,73 @@
+import os
+import lz4.block
+from functools import lru_cache, partial
+
+
+# Formats that are already entropy-coded, LZ4 only burns time on them
+STORE_EXTENSIONS = frozenset([
+    ".png", ".webp", ".jpg", ".jpeg", ".ogg", ".mp3", ".ktx", ".pvr", ".dds", ".zip", ".gz", ".bz2", ".xz", ".zst", ".dvpl",
+])
+COMPRESSION_TYPES = ("none", "fast", "default", "hc")
+AUTO_SAMPLE_SIZE = 64 * 1024
+# Store raw when LZ4 saves less than this fraction of the sample
+AUTO_STORE_THRESHOLD = 0.05
+# Use HC when it saves at least this fraction of the sample over default LZ4
+AUTO_HC_THRESHOLD = 0.05
+
+
+@lru_cache(maxsize=32)
+def parse_compression_overrides(spec):
+    overrides = {}
+    if not spec:
+        return overrides
+
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        extension, separator, compression_type = item.partition("=")
+        compression_type = compression_type.strip().lower()
+        if not separator or compression_type not in COMPRESSION_TYPES + ("auto",):
+            raise ValueError(f"Invalid compression override '{item}', expected <extension>=<{'|'.join(COMPRESSION_TYPES + ('auto',))}>.")
+        extension = extension.strip().lower()
+        overrides[extension if extension.startswith(".") else "." + extension] = compression_type
+    return overrides
+
+
+def sample_buffer(buffer, sample_size=AUTO_SAMPLE_SIZE):
+    if len(buffer) <= sample_size:
+        return buffer
+
+    # Head, middle and tail catch files with a compressible header and an opaque body
+    part_size = sample_size // 3
+    middle = (len(buffer) - part_size) // 2
+    with memoryview(buffer) as view:
+        return b"".join((view[:part_size], view[middle:middle + part_size], view[-part_size:]))
+
+
+def choose_compression(path, buffer, overrides=None, default="auto", store_threshold=AUTO_STORE_THRESHOLD, hc_threshold=AUTO_HC_THRESHOLD):
+    extension = os.path.splitext(path)[1].lower() if path else ""
+    compression_type = (overrides or {}).get(extension, default)
+    if compression_type != "auto":
+        return compression_type
+
+    if extension in STORE_EXTENSIONS or not len(buffer):
+        return "none"
+
+    sample = sample_buffer(buffer)
+    sample_size = len(sample)
+    default_size = len(lz4.block.compress(sample, store_size=False, mode="default"))
+    if 1 - default_size / sample_size < store_threshold:
+        return "none"
+
+    hc_size = len(lz4.block.compress(sample, store_size=False, mode="high_compression"))
+    if (default_size - hc_size) / sample_size >= hc_threshold:
+        return "hc"
+    return "default"
+
+
+def compression_policy(compression_type, overrides_spec=None):
+    overrides = parse_compression_overrides(overrides_spec)
+    if compression_type != "auto" and not overrides:
+        return compression_type
+    return partial(choose_compression, overrides=overrides, default=compression_type)
@@ -0,0 +1,7 @@
+from ._progress import (
+    ProgressCounter,
+    TerminalProgress,
+    format_duration,
+    TTY_INTERVAL,
+    PLAIN_INTERVAL
+)
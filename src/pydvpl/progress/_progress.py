@@ -0,0 +1,101 @@
+import sys
+import threading
+import time
+from ..api import ProgressSink
+from ..color import Color
+
+
+# Redraws per second on a terminal, and seconds between status lines in logs
+TTY_INTERVAL = 0.1
+PLAIN_INTERVAL = 5.0
+BAR_LENGTH = 50
+
+
+class ProgressCounter:
+    def __init__(self, value=0):
+        self.lock = threading.Lock()
+        self.value = value
+
+    def add(self, count=1):
+        # += on an attribute is not atomic, workers may report at the same time
+        with self.lock:
+            self.value += count
+            return self.value
+
+
+def format_duration(seconds):
+    if seconds < 1:
+        return f"{int(seconds * 1000)} ms", Color.GREEN
+    elif seconds < 60:
+        return f"{int(seconds)} s", Color.YELLOW
+    elif seconds < 3600:
+        return f"{int(seconds / 60)} min(s)", Color.ORANGE
+    return f"{int(seconds / 3600)} hour(s)", Color.RED
+
+
+class TerminalProgress(ProgressSink):
+    # Renders at most once per interval, so the cost no longer scales with the file count
+    def __init__(self, stream=None, interval=None, start_time=None, done=0, total=0):
+        self.stream = stream if stream is not None else sys.stdout
+        self.tty = self.stream.isatty()
+        self.interval = interval if interval is not None else (TTY_INTERVAL if self.tty else PLAIN_INTERVAL)
+        self.start_time = start_time if start_time is not None else time.time()
+        self.counter = ProgressCounter(done)
+        self.total = total
+        self.render_lock = threading.Lock()
+        self.last_render = time.monotonic()
+        self.rendered = None
+
+    def start(self, total):
+        self.total = max(self.total, total)
+
+    def advance(self, count=1):
+        done = self.counter.add(count)
+        if time.monotonic() - self.last_render >= self.interval:
+            self.render(done)
+
+    def finish(self):
+        # The last state is always shown, even when it arrived between two intervals
+        self.render(self.counter.value)
+
+    def render(self, done):
+        # A worker that finds another one rendering just skips this frame
+        if not self.render_lock.acquire(blocking=False):
+            return
+        try:
+            self.last_render = time.monotonic()
+            if done == self.rendered or not self.total:
+                return
+            self.rendered = done
+            self.stream.write(self.format_bar(done) if self.tty else self.format_line(done))
+            self.stream.flush()
+        finally:
+            self.render_lock.release()
+
+    def remaining_time(self, done):
+        if done <= 0:
+            return None
+        elapsed_time = time.time() - self.start_time
+        return (self.total - done) * elapsed_time / done
+
+    def format_bar(self, done):
+        progress = min(done / self.total, 1.0)
+        filled_length = int(BAR_LENGTH * progress)
+        gap_length = 1 if filled_length < BAR_LENGTH else 0
+        bar = (f"{Color.GREEN}{'━' * filled_length}{Color.RESET}{' ' * gap_length}"
+               f"{Color.GREY}{'━' * (BAR_LENGTH - filled_length - gap_length)}{Color.RESET}")
+        line = f"\rProcessing: [{bar}] {progress * 100:.2f}%"
+        remaining_time = self.remaining_time(done)
+        if remaining_time is not None:
+            text, color = format_duration(remaining_time)
+            line += f" | Remaining time: {color}{text}{Color.RESET}"
+        # Pad over leftovers of a longer previous frame
+        return line + "\033[K"
+
+    def format_line(self, done):
+        # Logs get plain periodic lines, no carriage returns or colors
+        line = f"Processing: {done}/{self.total} files ({min(done / self.total, 1.0) * 100:.2f}%)"
+        remaining_time = self.remaining_time(done)
+        if remaining_time is not None:
+            line += f" | Remaining time: {format_duration(remaining_time)[0]}"
+        return line + "\n"
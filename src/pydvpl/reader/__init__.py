@@ -0,0 +1,4 @@
+from ._reader import (
+    DVPLReader,
+    DEFAULT_CACHE_BYTES
+)
\ No newline at end of file
@@ -0,0 +1,130 @@
+import os
+import threading
+from collections import OrderedDict
+from ..dvpl import read_dvpl_file, stat_dvpl
+
+
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+CACHE_KEYS = ("stat", "crc")
+
+
+class DVPLReader:
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES, key="stat", cache_dir=None, use_mmap=True):
+        if key not in CACHE_KEYS:
+            raise ValueError(f"Unknown cache key '{key}', expected one of {', '.join(CACHE_KEYS)}.")
+
+        self.max_bytes = max_bytes
+        self.key = key
+        self.cache_dir = cache_dir
+        self.use_mmap = use_mmap
+        self.entries = OrderedDict()
+        self.current_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def cache_key(self, path):
+        if self.key == "crc":
+            # Content-addressed: identical payloads at different paths share one entry
+            footer_data = stat_dvpl(path)
+            return footer_data.crc32, footer_data.original_size, footer_data.compressed_size
+        file_stat = os.stat(path)
+        return os.path.abspath(path), file_stat.st_mtime_ns, file_stat.st_size
+
+    def read(self, path):
+        key = self.cache_key(path)
+        with self.lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+
+        cache_path = None
+        data = None
+        if self.cache_dir is not None:
+            cache_path, footer_data = self.disk_cache_path(path)
+            data = self.read_disk_cache(cache_path, footer_data.original_size)
+
+        if data is None:
+            data = read_dvpl_file(path, self.use_mmap)
+            if cache_path is not None:
+                self.write_disk_cache(cache_path, data)
+        else:
+            with self.lock:
+                self.disk_hits += 1
+
+        self.store(key, data)
+        return data
+
+    def store(self, key, data):
+        # Payloads larger than the whole budget would only flush everything else
+        if len(data) > self.max_bytes:
+            return
+
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= len(previous)
+            self.entries[key] = data
+            self.current_bytes += len(data)
+
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+                self.evictions += 1
+
+    def disk_cache_path(self, path):
+        footer_data = stat_dvpl(path)
+        return os.path.join(self.cache_dir, f"{footer_data.crc32:08x}-{footer_data.original_size}-{footer_data.compressed_size}.bin"), footer_data
+
+    def read_disk_cache(self, cache_path, original_size):
+        try:
+            with open(cache_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        return data if len(data) == original_size else None
+
+    def write_disk_cache(self, cache_path, data):
+        # Write then rename so concurrent processes never read a partial entry
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def invalidate(self, path):
+        key = self.cache_key(path)
+        with self.lock:
+            data = self.entries.pop(key, None)
+            if data is not None:
+                self.current_bytes -= len(data)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,5 @@
+from ._serve import (
+    DVPLServer,
+    footer_to_dict,
+    SERVE_OPS
+)
\ No newline at end of file
@@ -0,0 +1,172 @@
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ..dvpl import compress_dvpl_file, decompress_dvpl_file, verify_dvpl_file
+from ..policy import compression_policy
+from ..journal import CommitQueue
+from ..api import COMPRESSION_TYPES, VERIFY_LEVELS
+
+
+SERVE_OPS = ("compress", "decompress", "verify")
+
+
+def footer_to_dict(footer_data):
+    return {
+        "original_size": footer_data.original_size,
+        "compressed_size": footer_data.compressed_size,
+        "crc32": footer_data.crc32,
+        "type": footer_data.type,
+    }
+
+
+def request_jobs(request):
+    jobs = request["jobs"] if "jobs" in request else [request]
+    if not isinstance(jobs, list) or not all(isinstance(job, dict) for job in jobs):
+        raise ValueError("'jobs' must be a list of JSON objects.")
+    return jobs
+
+
+def remove_stale_socket(socket_path):
+    # Only a stale socket from an earlier run is replaced, never a file or a server that is still listening
+    try:
+        if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+            raise FileExistsError(f"'{socket_path}' exists and is not a socket.")
+    except FileNotFoundError:
+        return
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except ConnectionRefusedError:
+        os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+    raise FileExistsError(f"'{socket_path}' is already serving.")
+
+
+class DVPLServer:
+    def __init__(self, workers=1, compression="default", use_mmap=True):
+        # The pool stays warm for the lifetime of the server, jobs never pay for process or pool startup
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers))
+        self.compression = compression
+        self.use_mmap = use_mmap
+        self.stopped = threading.Event()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def run_job(self, job):
+        start_time = time.perf_counter()
+        op = job.get("op")
+        path = job.get("path")
+        result = {"op": op, "path": path}
+
+        try:
+            if op not in SERVE_OPS:
+                raise ValueError(f"Unknown op '{op}', expected one of {', '.join(SERVE_OPS)}.")
+            if not path:
+                raise ValueError("Job is missing 'path'.")
+
+            if op == "compress":
+                compression = job.get("compression") or self.compression
+                if compression not in COMPRESSION_TYPES:
+                    raise ValueError(f"Unknown compression '{compression}', expected one of {', '.join(COMPRESSION_TYPES)}.")
+                output = job.get("output") or path + ".dvpl"
+                policy = compression_policy(compression, job.get("compression_override"))
+                footer_data = compress_dvpl_file(path, output, policy, self.use_mmap)
+            elif op == "decompress":
+                if not job.get("output") and not path.endswith(".dvpl"):
+                    raise ValueError("Decompress jobs need an 'output' for files without a .dvpl suffix.")
+                output = job.get("output") or path[:-len(".dvpl")]
+                footer_data = decompress_dvpl_file(path, output, self.use_mmap)
+            else:
+                level = job.get("level", "full")
+                if level not in VERIFY_LEVELS:
+                    raise ValueError(f"Unknown verify level '{level}', expected one of {', '.join(VERIFY_LEVELS)}.")
+                output = None
+                footer_data = verify_dvpl_file(path, level == "full", self.use_mmap)
+
+            # Unlike the CLI, a server keeps originals unless told otherwise
+            if output is not None and not job.get("keep_originals", True):
+                # The original is deleted only once its output is durable
+                with CommitQueue() as committer:
+                    committer.add(path, output)
+
+            result.update({"ok": True, "output": output, "footer": footer_to_dict(footer_data)})
+        except Exception as e:
+            result.update({"ok": False, "error": type(e).__name__, "message": str(e)})
+
+        result["seconds"] = round(time.perf_counter() - start_time, 6)
+        return result
+
+    def handle_request(self, request):
+        if request.get("op") == "shutdown":
+            self.stopped.set()
+            return {"id": request.get("id"), "ok": True, "shutdown": True}
+        if request.get("op") == "ping":
+            return {"id": request.get("id"), "ok": True}
+
+        results = list(self.executor.map(self.run_job, request_jobs(request)))
+        return {"id": request.get("id"), "ok": all(result["ok"] for result in results), "results": results}
+
+    def handle_line(self, line):
+        request = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object.")
+            response = self.handle_request(request)
+        except ValueError as e:
+            # A malformed request gets an error reply, it must never take the daemon down
+            request_id = request.get("id") if isinstance(request, dict) else None
+            return json.dumps({"id": request_id, "ok": False, "error": "InvalidRequest", "message": str(e)})
+        return json.dumps(response)
+
+    def serve_stream(self, reader=None, writer=None):
+        reader = reader if reader is not None else sys.stdin
+        writer = writer if writer is not None else sys.stdout
+        for line in reader:
+            if not line.strip():
+                continue
+            writer.write(self.handle_line(line) + "\n")
+            writer.flush()
+            if self.stopped.is_set():
+                break
+
+    def serve_socket(self, socket_path):
+        server_instance = self
+
+        class RequestHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for raw_line in self.rfile:
+                    line = raw_line.decode("utf-8")
+                    if not line.strip():
+                        continue
+                    self.wfile.write((server_instance.handle_line(line) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+                    if server_instance.stopped.is_set():
+                        # shutdown() blocks until serve_forever returns, so it cannot run on a handler thread
+                        threading.Thread(target=self.server.shutdown).start()
+                        return
+
+        remove_stale_socket(socket_path)
+
+        with socketserver.ThreadingUnixStreamServer(socket_path, RequestHandler) as unix_server:
+            os.chmod(socket_path, 0o600)
+            try:
+                unix_server.serve_forever()
+            finally:
+                os.remove(socket_path)
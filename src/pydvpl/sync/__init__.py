@@ -0,0 +1,5 @@
+from ._sync import (
+    sync_file,
+    sync_trees,
+    SYNC_ACTIONS
+)
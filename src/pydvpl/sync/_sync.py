@@ -0,0 +1,120 @@
+import os
+from functools import partial
+from ..dvpl import stat_dvpl, compress_dvpl_file, is_temp_path
+from ..manifest import Manifest, DEFAULT_MANIFEST_NAME, hash_buffer
+from ..walker import compile_ignore, collect_files, walk_files, is_sidecar_path
+from ..api import ProgressSink, iter_file_results
+
+
+SYNC_ACTIONS = ("added", "updated", "unchanged", "failed")
+
+
+def sync_file(src_path, dst_path, compression_type="default", use_mmap=True, manifest=None, compression=None):
+    try:
+        dst_footer = stat_dvpl(dst_path)
+    except FileNotFoundError:
+        dst_footer = None
+        action = "added"
+    except (OSError, ValueError):
+        # A corrupt or foreign destination is simply rewritten
+        dst_footer = None
+        action = "updated"
+    else:
+        # Only a recorded state (size, mtime or content hash, compression level, mirror footer) skips the encode;
+        # timestamps alone are preserved by cp -p, rsync -t and tar and say nothing about the content
+        if manifest is not None and compression is not None and manifest.is_fresh(src_path, dst_path, compression):
+            return "unchanged"
+        action = "updated"
+
+    if dst_footer is None:
+        os.makedirs(os.path.dirname(dst_path) or ".", exist_ok=True)
+
+    digests = []
+    on_source = None
+    if manifest is not None and compression is not None:
+        # The manifest records the content that was compressed, not whatever is on disk afterwards
+        src_stat = os.stat(src_path)
+
+        def on_source(buffer):
+            digests.append(hash_buffer(buffer))
+
+    footer_data = compress_dvpl_file(src_path, dst_path, compression_type, use_mmap, on_source=on_source, existing_footer=dst_footer)
+    if footer_data == dst_footer:
+        action = "unchanged"
+
+    if on_source is not None:
+        manifest.record(src_path, compression, footer_data, digests[0], src_stat)
+    return action
+
+
+def sync_one(src_path, config, src_root, dst_root, compression_type, use_mmap, manifest, compression):
+    dst_path = os.path.join(dst_root, os.path.relpath(src_path, src_root) + ".dvpl")
+    try:
+        return src_path, sync_file(src_path, dst_path, compression_type, use_mmap, manifest, compression), None
+    except Exception as e:
+        return src_path, "failed", e
+
+
+def prune_tree(dst_root, expected):
+    pruned = []
+    for dst_path in walk_files(dst_root):
+        if not dst_path.endswith(".dvpl") or is_temp_path(dst_path):
+            continue
+        if os.path.relpath(dst_path, dst_root) in expected:
+            continue
+        os.remove(dst_path)
+        pruned.append(dst_path)
+
+        # Drop directories the prune emptied, up to but never including the root
+        directory = os.path.dirname(dst_path)
+        while os.path.abspath(directory) != os.path.abspath(dst_root):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                break
+            directory = os.path.dirname(directory)
+    return pruned
+
+
+def is_sync_source(file_path):
+    # A manifest or journal left in the source tree by other modes is not mirrored
+    return not file_path.endswith(".dvpl") and not is_sidecar_path(file_path)
+
+
+def sync_trees(src_root, dst_root, compression_type="default", ignore="", prune=False, workers=1, use_mmap=True, progress=None, compression=None):
+    if not os.path.isdir(src_root):
+        raise NotADirectoryError(f"Source directory '{src_root}' not found.")
+    if os.path.abspath(src_root) == os.path.abspath(dst_root):
+        raise ValueError("Source and destination must be different directories.")
+
+    progress = progress if progress is not None else ProgressSink()
+    src_files, ignored_files = collect_files(src_root, compile_ignore(ignore), is_sync_source)
+    summary = dict.fromkeys(SYNC_ACTIONS, 0)
+    summary.update({"ignored": len(ignored_files), "pruned": 0, "failures": []})
+
+    # The compression level is recorded with each file, a policy callable needs its label passed in
+    if compression is None and isinstance(compression_type, str):
+        compression = compression_type
+    os.makedirs(dst_root, exist_ok=True)
+    manifest = Manifest(os.path.join(dst_root, DEFAULT_MANIFEST_NAME), src_root)
+
+    progress.start(len(src_files))
+    func = partial(sync_one, src_root=src_root, dst_root=dst_root, compression_type=compression_type, use_mmap=use_mmap,
+                   manifest=manifest, compression=compression)
+    for src_path, action, error in iter_file_results(func, src_files, None, workers):
+        summary[action] += 1
+        if error is not None:
+            summary["failures"].append({"path": src_path, "error": type(error).__name__, "message": str(error)})
+        progress.advance()
+    progress.finish()
+    # Entries of deleted or now ignored sources are dropped with the save
+    manifest.save()
+
+    # Pruning is skipped after failures, a source that could not be read must not lose its mirror
+    if prune and not summary["failed"] and os.path.isdir(dst_root):
+        # Ignored sources still exist, so their mirrors are left alone rather than treated as orphans
+        expected = {os.path.relpath(src_path, src_root) + ".dvpl" for src_path in src_files + ignored_files if is_sync_source(src_path)}
+        summary["pruned"] = len(prune_tree(dst_root, expected))
+
+    summary["failures"].sort(key=lambda failure: failure["path"])
+    return summary
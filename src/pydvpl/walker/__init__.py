@@ -0,0 +1,8 @@
+from ._walker import (
+    IgnoreMatcher,
+    compile_ignore,
+    is_sidecar_path,
+    walk_files,
+    collect_files,
+    SIDECAR_NAMES
+)
\ No newline at end of file
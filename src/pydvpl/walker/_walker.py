@@ -0,0 +1,76 @@
+import os
+import re
+import fnmatch
+from functools import lru_cache
+from ..dvpl import is_temp_path
+
+
+GLOB_CHARS = ("*", "?", "[")
+# The incremental manifest with its temp file and the resume journal. Spelled out instead of imported,
+# the walker is on the startup path and the manifest and journal modules are loaded lazily.
+SIDECAR_NAMES = frozenset((".pydvpl-manifest.json", ".pydvpl-manifest.json.tmp", ".pydvpl-journal"))
+
+
+class IgnoreMatcher:
+    def __init__(self, patterns):
+        suffixes = []
+        globs = []
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern:
+                continue
+            if any(char in pattern for char in GLOB_CHARS):
+                globs.append(fnmatch.translate(pattern))
+            else:
+                suffixes.append(pattern)
+
+        # str.endswith takes a tuple, so every plain suffix is checked in one call
+        self.suffixes = tuple(suffixes)
+        self.glob_regex = re.compile("|".join(globs)) if globs else None
+
+    def __bool__(self):
+        return bool(self.suffixes) or self.glob_regex is not None
+
+    def __call__(self, path):
+        if self.suffixes and path.endswith(self.suffixes):
+            return True
+        if self.glob_regex is not None:
+            return self.glob_regex.match(os.path.basename(path)) is not None or self.glob_regex.match(path) is not None
+        return False
+
+
+@lru_cache(maxsize=32)
+def compile_ignore(ignore):
+    return IgnoreMatcher(ignore.split(",") if ignore else [])
+
+
+def is_sidecar_path(path):
+    # The tool's own files in a processed tree are never assets, whatever mode walks it
+    return is_temp_path(path) or os.path.basename(path) in SIDECAR_NAMES
+
+
+def walk_files(directory):
+    stack = [str(directory)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    # Symlinked directories are not followed to avoid cycles
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        yield entry.path
+        except (PermissionError, FileNotFoundError):
+            continue
+
+
+def collect_files(directory, should_ignore=None, accept=None):
+    work_files = []
+    ignored_files = []
+    for file_path in walk_files(directory):
+        if (should_ignore and should_ignore(file_path)) or (accept is not None and not accept(file_path)):
+            ignored_files.append(file_path)
+        else:
+            work_files.append(file_path)
+    return work_files, ignored_files
@@ -0,0 +1,23 @@
+import random
+
+import pytest
+
+
+WORDS = (b"dava", b"smartdlc", b"tank", b"blitz", b"mesh", b"texture", b"\n", b"  ")
+
+
+def make_payload(size, seed=0):
+    # Game assets mix incompressible runs (textures, sounds) with repetitive text, so payloads do too
+    rng = random.Random(seed)
+    payload = bytearray()
+    while len(payload) < size:
+        if rng.random() < 0.3:
+            payload += rng.randbytes(rng.randint(1, 4096))
+        else:
+            payload += b"".join(rng.choice(WORDS) for _ in range(rng.randint(1, 512)))
+    return bytes(payload[:size])
+
+
+@pytest.fixture(scope="session")
+def payload():
+    return make_payload
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pydvpl.aio import compress_file, decompress_file, read_file, convert_tree
+from pydvpl.aio import _aio as aio_module
+from pydvpl.dvpl import read_dvpl_file, DVPL_TYPE_NONE
+
+
+def write_tree(path, count):
+    for number in range(count):
+        (path / f"{number}.yaml").write_bytes(f"tank: {number}\n".encode() * 50)
+
+
+def slow_compress(delay, active, peak):
+    lock = threading.Lock()
+    compress_dvpl_file = aio_module.compress_dvpl_file
+
+    def compress(*args):
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        try:
+            time.sleep(delay)
+            return compress_dvpl_file(*args)
+        finally:
+            with lock:
+                active.pop()
+
+    return compress
+
+
+def test_file_round_trip(tmp_path, payload):
+    payload = payload(100000)
+    path = str(tmp_path / "a.bin")
+    with open(path, "wb") as f:
+        f.write(payload)
+
+    async def main():
+        footer_data = await compress_file(path, keep_originals=False, compression="none")
+        assert not os.path.exists(path)
+        assert await read_file(path + ".dvpl") == payload
+        assert (await decompress_file(path + ".dvpl")) == footer_data
+        return footer_data
+
+    footer_data = asyncio.run(main())
+    assert (footer_data.original_size, footer_data.type) == (len(payload), DVPL_TYPE_NONE)
+    with open(path, "rb") as f:
+        assert f.read() == payload
+    assert os.path.exists(path + ".dvpl")
+
+    with pytest.raises(ValueError):
+        asyncio.run(decompress_file(path))
+
+
+def test_convert_tree_reports_every_file(tmp_path):
+    write_tree(tmp_path, 6)
+    (tmp_path / "skip.png").write_bytes(b"png")
+    (tmp_path / "broken.yaml.dvpl").write_bytes(b"not a dvpl")
+    reported = []
+
+    summary = asyncio.run(convert_tree(str(tmp_path), "compress", ignore="*.png",
+                                       progress=lambda done, total, result: reported.append((done, total))))
+    # The ignored count covers the skipped pattern and the existing .dvpl file
+    assert (summary["succeeded"], summary["failed"], summary["ignored"]) == (6, 0, 2)
+    assert reported == [(done, 6) for done in range(1, 7)]
+    assert read_dvpl_file(str(tmp_path / "3.yaml.dvpl")) == b"tank: 3\n" * 50
+
+    summary = asyncio.run(convert_tree(str(tmp_path), "verify"))
+    assert (summary["succeeded"], summary["failed"]) == (6, 1)
+    failure = next(result for result in summary["results"] if not result["ok"])
+    assert failure["path"].endswith("broken.yaml.dvpl") and failure["error"] == "ValueError"
+
+    with pytest.raises(ValueError):
+        asyncio.run(convert_tree(str(tmp_path), "pack"))
+
+
+def test_concurrency_is_limited_by_the_semaphore(tmp_path, monkeypatch):
+    write_tree(tmp_path, 12)
+    active, peak = [], []
+    monkeypatch.setattr(aio_module, "compress_dvpl_file", slow_compress(0.02, active, peak))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        summary = asyncio.run(convert_tree(str(tmp_path), "compress", concurrency=3, executor=executor))
+    assert summary["succeeded"] == 12
+    assert max(peak) == 3
+
+
+def test_cancelled_run_leaves_no_temp_files(tmp_path, monkeypatch):
+    write_tree(tmp_path, 80)
+    active, peak = [], []
+    monkeypatch.setattr(aio_module, "compress_dvpl_file", slow_compress(0.02, active, peak))
+
+    async def main():
+        task = asyncio.ensure_future(convert_tree(str(tmp_path), "compress", concurrency=4, keep_originals=False))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    names = os.listdir(tmp_path)
+    assert not [name for name in names if name.endswith(".pydvpl-tmp")]
+    outputs = [name for name in names if name.endswith(".dvpl")]
+    assert 0 < len(outputs) < 80
+    # Every source is either still there or fully converted, never lost
+    for number in range(80):
+        name = f"{number}.yaml"
+        if name not in names:
+            assert read_dvpl_file(str(tmp_path / (name + ".dvpl"))) == f"tank: {number}\n".encode() * 50
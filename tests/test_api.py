@@ -0,0 +1,64 @@
+import os
+from argparse import Namespace
+
+import pytest
+
+import pydvpl
+from pydvpl import DVPLOptions, iter_results
+from pydvpl.dvpl import read_dvpl_file
+
+
+@pytest.mark.parametrize("keep_originals", (True, False))
+def test_convert_dvpl_accepts_a_baseline_config(tmp_path, keep_originals):
+    # Only the attributes the CLI namespace had before the newer options were added
+    (tmp_path / "a.yaml").write_bytes(b"a: 1\n")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.txt").write_bytes(b"tank " * 100)
+    config = Namespace(mode="compress", keep_originals=keep_originals, verbose=False, ignore="", compression=None)
+
+    assert pydvpl.convert_dvpl(str(tmp_path), config) == (2, 0, 0)
+    assert read_dvpl_file(str(tmp_path / "sub" / "b.txt.dvpl")) == b"tank " * 100
+    assert (tmp_path / "a.yaml").exists() == keep_originals
+
+    config.mode = "verify"
+    assert pydvpl.verify_dvpl(str(tmp_path), config)[:2] == (2, 0)
+
+    config.mode = "decompress"
+    config.keep_originals = False
+    assert pydvpl.convert_dvpl(str(tmp_path / "a.yaml.dvpl"), config) == (1, 0, 0)
+    assert (tmp_path / "a.yaml").read_bytes() == b"a: 1\n"
+
+
+def test_stopped_run_resumes_from_its_journal(tmp_path):
+    for number in range(10):
+        (tmp_path / f"{number}.yaml").write_bytes(b"n: %d\n" % number)
+    options = DVPLOptions(keep_originals=False, jobs=2, journal="")
+
+    results = iter_results(tmp_path, options)
+    first = [next(results) for _ in range(4)]
+    results.close()
+    # Committed outputs lost their originals, the journal is kept for the resume
+    assert all(not os.path.exists(result.path) for result in first)
+    assert (tmp_path / ".pydvpl-journal").exists()
+
+    options.resume = True
+    rest = list(iter_results(tmp_path, options))
+    # Files still in flight when the run stopped were committed without being yielded, none is done twice
+    paths = [result.path for result in first + rest]
+    assert len(set(paths)) == len(paths) and set(paths) <= {str(tmp_path / f"{number}.yaml") for number in range(10)}
+    assert all(result.ok for result in rest)
+    assert sorted(os.listdir(tmp_path)) == sorted(f"{number}.yaml.dvpl" for number in range(10))
+
+
+def test_runs_without_resume_or_journal_write_no_journal(tmp_path, monkeypatch):
+    from pydvpl.journal import _journal as journal_module
+
+    (tmp_path / "a.yaml").write_bytes(b"a: 1\n")
+    synced = []
+    monkeypatch.setattr(journal_module, "syncfs_paths", lambda paths: synced.append(paths) or True)
+    monkeypatch.setattr(journal_module, "fsync_path", lambda path: synced.append(path))
+
+    # Kept originals without a journal need no fsync at all
+    assert [result.status for result in iter_results(tmp_path, DVPLOptions(keep_originals=True))] == ["ok"]
+    assert synced == []
+    assert sorted(os.listdir(tmp_path)) == ["a.yaml", "a.yaml.dvpl"]
@@ -0,0 +1,60 @@
+import os
+
+import pydvpl
+from pydvpl.bench import generate_corpus, run_bench_case, run_benchmark
+from pydvpl.bench import _bench as bench_module
+
+
+def test_generated_corpus_is_reproducible(tmp_path):
+    first = generate_corpus(tmp_path / "first", file_count=12, max_size=4096, seed=3)
+    second = generate_corpus(tmp_path / "second", file_count=12, max_size=4096, seed=3)
+    assert first["files"] == second["files"] == 12
+    assert first["bytes"] == second["bytes"]
+
+    file_paths = bench_module.list_corpus(tmp_path / "first")
+    assert len(file_paths) == 12
+    assert {os.path.splitext(file_path)[1] for file_path in file_paths} <= {".yaml", ".png", ".sc2"}
+    assert sum(os.path.getsize(file_path) for file_path in file_paths) == first["bytes"]
+
+
+def test_bench_case_round_trips_the_corpus(tmp_path):
+    corpus = generate_corpus(tmp_path, file_count=10, max_size=8192)
+
+    result = run_bench_case(str(tmp_path), "auto", 2, "read")
+    assert (result["mode"], result["workers"], result["io"]) == ("auto", 2, "read")
+    assert result["files"] == 10 and result["bytes_in"] == corpus["bytes"]
+    assert result["roundtrip_ok"] is True
+    assert 0 < result["ratio"] <= 1.01
+    # The corpus is left as it was, outputs go to a scratch directory
+    assert len(bench_module.list_corpus(tmp_path)) == 10 and not any(name.endswith(".dvpl") for name in os.listdir(tmp_path / "group0"))
+
+
+def test_broken_round_trip_is_reported(tmp_path, monkeypatch):
+    generate_corpus(tmp_path, file_count=4, max_size=1024)
+    decompress_dvpl_file = bench_module.decompress_dvpl_file
+
+    def decompress_and_corrupt(src_path, dst_path, use_mmap):
+        footer_data = decompress_dvpl_file(src_path, dst_path, use_mmap)
+        with open(dst_path, "ab") as f:
+            f.write(b"!")
+        return footer_data
+
+    monkeypatch.setattr(bench_module, "decompress_dvpl_file", decompress_and_corrupt)
+    assert run_bench_case(str(tmp_path), "fast", 1, "mmap")["roundtrip_ok"] is False
+
+
+def test_benchmark_report(tmp_path, monkeypatch):
+    # The startup probe runs a fresh interpreter, which has to find this checkout
+    monkeypatch.setenv("PYTHONPATH", os.path.dirname(os.path.dirname(pydvpl.__file__)))
+    report = run_benchmark(modes=("fast", "hc"), workers=(1, 2), io=("mmap",), isolate=False, file_count=8)
+    assert set(report) == {"pydvpl", "lz4", "python", "platform", "cpu_count", "timestamp", "startup", "corpus", "results"}
+    assert report["corpus"]["files"] == 8 and report["corpus"]["seed"] == 0
+    assert not os.path.exists(report["corpus"]["directory"])
+    assert set(report["startup"]) == {"import_ms", "budget_ms", "heavy_modules", "ok"}
+    assert [(result["mode"], result["workers"]) for result in report["results"]] == [("fast", 1), ("fast", 2), ("hc", 1), ("hc", 2)]
+    assert all(result["roundtrip_ok"] and result["files"] == 8 for result in report["results"])
+
+    generate_corpus(tmp_path, file_count=5, max_size=1024)
+    report = run_benchmark(str(tmp_path), modes=("default",), io=("read",), isolate=False)
+    assert report["corpus"]["files"] == 5 and report["corpus"]["seed"] is None
+    assert len(report["results"]) == 1 and report["results"][0]["roundtrip_ok"]
@@ -0,0 +1,77 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from pydvpl._pydvpl import pack_dvpl
+from pydvpl.bundle import DVPLBundle, DVPLBundleWriter, pack_dvpl_bundle
+from pydvpl.dvpl import compress_dvpl
+
+
+def test_failed_pack_leaves_no_bundle(tmp_path):
+    (tmp_path / "a.yaml").write_bytes(b"a: 1\n")
+    (tmp_path / "b.yaml.dvpl").write_bytes(b"not a dvpl file")
+    bundle_path = tmp_path.parent / "out.dvplb"
+
+    for workers in (1, 2):
+        with pytest.raises(ValueError, match="InvalidDVPLFooter"):
+            pack_dvpl_bundle(sorted(str(path) for path in tmp_path.iterdir()), str(tmp_path), str(bundle_path), workers=workers)
+        assert not bundle_path.exists()
+        assert not [name for name in os.listdir(tmp_path.parent) if name.endswith(".pydvpl-tmp")]
+
+
+def test_pack_prefers_kept_dvpl_over_its_source(tmp_path):
+    # A tree compressed with --keep-originals: a.yaml and a.yaml.dvpl both map to the entry name a.yaml
+    source = tmp_path / "assets"
+    source.mkdir()
+    (source / "a.yaml").write_bytes(b"a: 2\n")
+    (source / "a.yaml.dvpl").write_bytes(compress_dvpl(b"a: 1\n"))
+    (source / "b.yaml").write_bytes(b"b: 1\n")
+    bundle_path = tmp_path / "assets.dvplb"
+    config = SimpleNamespace(output=str(bundle_path), ignore="", compression=None, compression_override=None, verbose=False)
+
+    assert pack_dvpl(str(source), config, workers=2) == (2, 0, 1)
+    with DVPLBundle(str(bundle_path)) as bundle:
+        assert sorted(bundle.names()) == ["a.yaml", "b.yaml"]
+        assert bundle.read("a.yaml") == b"a: 1\n"
+
+
+def test_pack_skips_sidecars(tmp_path):
+    source = tmp_path / "assets"
+    source.mkdir()
+    (source / "a.yaml").write_bytes(b"a: 1\n")
+    (source / ".pydvpl-manifest.json").write_text("{}")
+    (source / ".pydvpl-journal").write_text("{}\n")
+    bundle_path = source / "assets.dvplb"
+    config = SimpleNamespace(output=str(bundle_path), ignore="", compression=None, compression_override=None, verbose=False)
+
+    # Packing twice into the tree must not pick up the first bundle either
+    assert pack_dvpl(str(source), config, workers=1) == (1, 0, 2)
+    assert pack_dvpl(str(source), config, workers=1) == (1, 0, 3)
+    with DVPLBundle(str(bundle_path)) as bundle:
+        assert bundle.names() == ["a.yaml"]
+
+
+@pytest.mark.parametrize("name", ("../escape.yaml", "sub/../../escape.yaml", "/tmp/escape.yaml", "", ".", "link/escape.yaml"))
+def test_extract_rejects_names_outside_the_output_directory(tmp_path, name):
+    bundle_path = tmp_path / "evil.dvplb"
+    with DVPLBundleWriter(str(bundle_path)) as writer:
+        writer.add(name, b"a: 1\n")
+    output = tmp_path / "out"
+    output.mkdir()
+    # A symlink planted in the output directory must not be followed out of it either
+    (output / "link").symlink_to(tmp_path)
+
+    with DVPLBundle(str(bundle_path)) as bundle, pytest.raises(ValueError, match="DVPLBundleUnsafeEntry"):
+        bundle.extract(name, str(output))
+    assert not (tmp_path / "escape.yaml.dvpl").exists()
+
+
+def test_extract_keeps_nested_names(tmp_path):
+    bundle_path = tmp_path / "configs.dvplb"
+    with DVPLBundleWriter(str(bundle_path)) as writer:
+        writer.add("sub/dir/a.yaml", b"a: 1\n")
+    with DVPLBundle(str(bundle_path)) as bundle:
+        target_path = bundle.extract("sub/dir/a.yaml", str(tmp_path / "out"), decompress=True)
+    assert target_path == os.path.realpath(tmp_path / "out" / "sub" / "dir" / "a.yaml")
+    assert (tmp_path / "out" / "sub" / "dir" / "a.yaml").read_bytes() == b"a: 1\n"
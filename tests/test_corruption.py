@@ -0,0 +1,181 @@
+import json
+import random
+import struct
+from types import SimpleNamespace
+
+import pytest
+from lz4.block import LZ4BlockError
+
+from pydvpl.dvpl import compress_dvpl, decompress_dvpl, read_dvpl_footer, stat_dvpl, verify_dvpl_file, DVPL_FOOTER_SIZE, DVPL_TYPE_LZ4, DVPL_MAX_BLOCK_SIZE
+from pydvpl._pydvpl import info_dvpl, verify_dvpl
+from pydvpl.footers import read_footers, parse_footers, footer_masks, check_footers, FOOTER_COLUMNS
+
+
+# Corrupt input must fail loudly: a DVPL ValueError, or LZ4 rejecting a damaged block
+DECODE_ERRORS = (ValueError, LZ4BlockError)
+FOOTER_FIELDS = ("original_size", "compressed_size", "crc32", "type", "signature")
+
+
+@pytest.fixture(params=("default", "none"))
+def dvpl(request, payload):
+    data = payload(20000, seed=3)
+    return data, compress_dvpl(data, request.param)
+
+
+def flip(buffer, index, bit):
+    corrupted = bytearray(buffer)
+    corrupted[index] ^= 1 << bit
+    return bytes(corrupted)
+
+
+@pytest.mark.parametrize("field", range(len(FOOTER_FIELDS)), ids=FOOTER_FIELDS)
+def test_every_footer_bit_flip_is_rejected(dvpl, field):
+    data, blob = dvpl
+    start = len(blob) - DVPL_FOOTER_SIZE + field * 4
+    for index in range(start, start + 4):
+        for bit in range(8):
+            with pytest.raises(DECODE_ERRORS):
+                decompress_dvpl(flip(blob, index, bit))
+
+
+def test_payload_corruption_is_caught_by_crc(dvpl):
+    data, blob = dvpl
+    rng = random.Random(5)
+    for _ in range(200):
+        corrupted = flip(blob, rng.randrange(len(blob) - DVPL_FOOTER_SIZE), rng.randrange(8))
+        with pytest.raises(ValueError, match="DVPLCRC32Mismatch"):
+            decompress_dvpl(corrupted)
+
+
+def test_random_garbage_never_decodes(payload):
+    rng = random.Random(9)
+    for _ in range(300):
+        garbage = rng.randbytes(rng.randint(0, 64))
+        if rng.random() < 0.5:
+            # Mostly valid looking: the right signature after random fields
+            garbage += b"DVPL"
+        with pytest.raises(DECODE_ERRORS):
+            decompress_dvpl(garbage)
+
+
+@pytest.mark.parametrize("cut", (1, DVPL_FOOTER_SIZE - 1, DVPL_FOOTER_SIZE, DVPL_FOOTER_SIZE + 1))
+def test_truncated_files_are_rejected(dvpl, cut):
+    data, blob = dvpl
+    with pytest.raises(ValueError):
+        decompress_dvpl(blob[:-cut])
+
+
+@pytest.mark.parametrize("length", (0, 1, DVPL_FOOTER_SIZE - 1))
+def test_files_shorter_than_a_footer_are_rejected(dvpl, length):
+    data, blob = dvpl
+    with pytest.raises(ValueError, match="InvalidDVPLFooter"):
+        decompress_dvpl(blob[:length])
+
+
+def test_oversized_original_size_is_a_value_error(dvpl):
+    data, blob = dvpl
+    footer = read_dvpl_footer(blob)
+    if footer.type != DVPL_TYPE_LZ4:
+        pytest.skip("stored payloads never reach the decoder")
+    corrupted = bytearray(blob)
+    corrupted[-DVPL_FOOTER_SIZE:-DVPL_FOOTER_SIZE + 4] = (0xFFFFFFFF).to_bytes(4, "little")
+    with pytest.raises(ValueError, match="DVPLSizeOverflow"):
+        decompress_dvpl(bytes(corrupted))
+
+
+def test_batch_footer_reader_agrees_with_stat(tmp_path, dvpl):
+    data, blob = dvpl
+    rng = random.Random(13)
+    paths = []
+    for number in range(60):
+        corrupted = bytearray(blob)
+        for _ in range(rng.randint(0, 3)):
+            index = len(blob) - rng.randint(1, DVPL_FOOTER_SIZE + 4)
+            corrupted[index] = rng.randrange(256)
+        if number % 10 == 0:
+            corrupted = corrupted[:rng.randint(0, DVPL_FOOTER_SIZE)]
+        path = tmp_path / f"{number}.dvpl"
+        path.write_bytes(bytes(corrupted))
+        paths.append(str(path))
+
+    for workers in (1, 4):
+        entries = read_footers(paths, workers).to_entries()
+        for path, entry in zip(paths, entries):
+            try:
+                footer = stat_dvpl(path)
+            except ValueError as e:
+                assert entry == {"path": path, "error": str(e)}
+            else:
+                assert entry == {"path": path, **footer._asdict()}
+
+
+def test_verify_file_reports_corruption(tmp_path, dvpl):
+    data, blob = dvpl
+    path = tmp_path / "asset.dvpl"
+    path.write_bytes(flip(blob, len(blob) // 2, 0))
+    for use_mmap in (True, False):
+        with pytest.raises(ValueError, match="DVPLCRC32Mismatch"):
+            verify_dvpl_file(str(path), use_mmap=use_mmap)
+
+
+def test_info_table_counts_unreadable_footers(tmp_path, dvpl, capsys):
+    data, blob = dvpl
+    (tmp_path / "good.yaml.dvpl").write_bytes(blob)
+    (tmp_path / "bad.yaml.dvpl").write_bytes(blob[:-1])
+    config = SimpleNamespace(ignore="", verbose=False, format="table")
+
+    assert info_dvpl(str(tmp_path), config, workers=1) == (1, 1, 0)
+    assert "1 file(s) have no readable footer" in capsys.readouterr().out
+
+
+def test_verify_report_names_the_failure_kind(tmp_path, dvpl):
+    data, blob = dvpl
+    (tmp_path / "crc.yaml.dvpl").write_bytes(flip(blob, 0, 0))
+    (tmp_path / "short.yaml.dvpl").write_bytes(blob[:DVPL_FOOTER_SIZE - 1])
+    report_path = tmp_path.parent / "failures.json"
+    config = SimpleNamespace(path=str(tmp_path), mode="verify", ignore="", verbose=False, keep_originals=True, verify_report=str(report_path))
+
+    assert verify_dvpl(str(tmp_path), config) == (0, 2, 0)
+    failures = json.loads(report_path.read_text())["failures"]
+    assert [failure["error"] for failure in failures] == ["DVPLCRC32Mismatch", "InvalidDVPLFooter"]
+
+
+def test_numpy_footer_checks_match_the_array_branch(tmp_path):
+    numpy = pytest.importorskip("numpy")
+    rng = random.Random(21)
+    # (original_size, compressed_size, type, signature), one or more rows per anomaly and per read error
+    footers = [(size, int(size * rng.uniform(0.4, 0.6)), DVPL_TYPE_LZ4, b"DVPL") for size in rng.sample(range(1000, 5000), 20)]
+    footers += [
+        (4000, 3990, DVPL_TYPE_LZ4, b"DVPL"),  # ratio outlier
+        (100, 100, 0, b"DVPL"),
+        (100, 90, 0, b"DVPL"),  # stored size
+        (100, 60, 7, b"DVPL"),  # unknown type
+        (10, 100, DVPL_TYPE_LZ4, b"DVPL"),  # beyond the LZ4 bound
+        (DVPL_MAX_BLOCK_SIZE + 1, 50, DVPL_TYPE_LZ4, b"DVPL"),
+        (0, 0, DVPL_TYPE_LZ4, b"DVPL"),
+        (100, 60, DVPL_TYPE_LZ4, b"DVPC"),
+        (100, 60, DVPL_TYPE_LZ4, b"XXXX"),
+    ]
+    paths = []
+    for number, (original_size, compressed_size, type_val, signature) in enumerate(footers):
+        path = tmp_path / f"{number}.dvpl"
+        path.write_bytes(bytes(compressed_size) + struct.pack("<IIII4s", original_size, compressed_size, rng.getrandbits(32), type_val, signature))
+        paths.append(str(path))
+    (tmp_path / "mismatch.dvpl").write_bytes(bytes(5) + struct.pack("<IIII4s", 100, 60, 0, DVPL_TYPE_LZ4, b"DVPL"))
+    (tmp_path / "short.dvpl").write_bytes(b"DVPL")
+    paths += [str(tmp_path / "mismatch.dvpl"), str(tmp_path / "short.dvpl"), str(tmp_path / "missing.dvpl")]
+
+    with_numpy = read_footers(paths, use_numpy=True)
+    without_numpy = read_footers(paths, use_numpy=False)
+    assert isinstance(with_numpy.original_size, numpy.ndarray)
+    assert with_numpy.to_entries() == without_numpy.to_entries()
+    assert footer_masks(with_numpy) == footer_masks(without_numpy)
+    report = check_footers(with_numpy)
+    assert report == check_footers(without_numpy)
+    assert all(report["counts"].values())
+
+    blob = b"".join((tmp_path / f"{number}.dvpl").read_bytes()[-DVPL_FOOTER_SIZE:] for number in range(len(footers)))
+    numpy_columns = parse_footers(blob, numpy)
+    array_columns = parse_footers(blob)
+    for name in FOOTER_COLUMNS:
+        assert numpy_columns[name].tolist() == array_columns[name].tolist()
@@ -0,0 +1,129 @@
+import os
+import threading
+
+import pytest
+
+from pydvpl._pydvpl import parse_command_line_args
+from pydvpl.dedup import DedupIndex
+from pydvpl.dedup import _dedup as dedup_module
+from pydvpl.dvpl import compress_dvpl_file, read_dvpl_file
+
+
+class CountingCompress:
+    # Holds the first call until released, so the other file arrives while its leader is still encoding
+    def __init__(self, fail_first=False):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.fail_first = fail_first
+
+    def __call__(self, src_path, dst_path):
+        self.calls.append(src_path)
+        if len(self.calls) == 1:
+            self.started.set()
+            self.release.wait(5)
+            if self.fail_first:
+                raise OSError("disk full")
+        return compress_dvpl_file(src_path, dst_path)
+
+
+def write_duplicates(tmp_path, names, data=b"speed: 10\n" * 50):
+    paths = []
+    for name in names:
+        path = tmp_path / name
+        path.write_bytes(data)
+        paths.append(str(path))
+    return paths
+
+
+def run_pair(index, paths, compress):
+    # The leader starts first; the follower is started once the leader is inside compress_func
+    errors = {}
+
+    def run(path):
+        try:
+            index.compress(path, path + ".dvpl", compress)
+        except Exception as e:
+            errors[path] = e
+
+    leader = threading.Thread(target=run, args=(paths[0],))
+    leader.start()
+    assert compress.started.wait(5)
+    follower = threading.Thread(target=run, args=(paths[1],))
+    follower.start()
+    compress.release.set()
+    leader.join(5)
+    follower.join(5)
+    return errors
+
+
+def test_follower_waits_for_its_leader_and_clones_the_output(tmp_path):
+    paths = write_duplicates(tmp_path, ("a.yaml", "b.yaml"))
+    index = DedupIndex("copy")
+    index.index(paths)
+    compress = CountingCompress()
+
+    assert run_pair(index, paths, compress) == {}
+    assert compress.calls == [paths[0]]
+    assert read_dvpl_file(paths[1] + ".dvpl") == read_dvpl_file(paths[0] + ".dvpl")
+    assert index.summary() == {"method": "copy", "files": 1, "groups": 1, "bytes": 500, "disk_bytes": 0, "methods": {"copy": 1}}
+
+
+def test_follower_encodes_itself_when_its_leader_fails(tmp_path):
+    paths = write_duplicates(tmp_path, ("a.yaml", "b.yaml"))
+    index = DedupIndex("copy")
+    index.index(paths)
+    compress = CountingCompress(fail_first=True)
+
+    errors = run_pair(index, paths, compress)
+    assert list(errors) == [paths[0]]
+    assert compress.calls == paths
+    assert read_dvpl_file(paths[1] + ".dvpl") == b"speed: 10\n" * 50
+    assert index.summary()["files"] == 0
+
+
+def test_unique_sizes_and_extensions_are_not_deduplicated(tmp_path):
+    paths = write_duplicates(tmp_path, ("a.yaml", "b.txt")) + write_duplicates(tmp_path, ("c.yaml",), b"other")
+    index = DedupIndex("copy")
+    index.index(paths)
+    calls = []
+    for path in paths:
+        index.compress(path, path + ".dvpl", lambda src, dst: calls.append(src) or compress_dvpl_file(src, dst))
+    assert calls == paths
+    assert index.summary()["files"] == 0
+
+
+@pytest.mark.parametrize("method", ("auto", "reflink"))
+def test_reflink_falls_back_to_a_copy(tmp_path, monkeypatch, method):
+    def unsupported(src_path, dst_path, fsync=False):
+        raise OSError(95, "Operation not supported")
+
+    monkeypatch.setattr(dedup_module, "reflink_file", unsupported)
+    src = tmp_path / "a.yaml.dvpl"
+    src.write_bytes(b"payload")
+
+    assert dedup_module.clone_file(str(src), str(tmp_path / "b.yaml.dvpl"), method) == "copy"
+    assert (tmp_path / "b.yaml.dvpl").read_bytes() == b"payload"
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".pydvpl-tmp")]
+
+
+def test_hardlink_shares_the_inode(tmp_path):
+    src = tmp_path / "a.yaml.dvpl"
+    src.write_bytes(b"payload")
+    dst = tmp_path / "b.yaml.dvpl"
+
+    assert dedup_module.clone_file(str(src), str(dst), "hardlink") == "hardlink"
+    assert os.path.samefile(src, dst)
+
+
+@pytest.mark.parametrize("path", ("a.yaml", "-"))
+def test_dedup_is_rejected_outside_directories(tmp_path, monkeypatch, capsys, path):
+    (tmp_path / "a.yaml").write_bytes(b"a: 1\n")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("sys.argv", ["pydvpl", "--mode", "compress", "--path", path, "--dedup", "copy"])
+    with pytest.raises(SystemExit):
+        parse_command_line_args()
+    assert "only supported for 'compress' mode on directories" in capsys.readouterr().err
+
+    monkeypatch.setattr("sys.argv", ["pydvpl", "--mode", "compress", "--path", str(tmp_path), "--dedup", "copy"])
+    assert parse_command_line_args().dedup == "copy"
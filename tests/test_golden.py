@@ -0,0 +1,27 @@
+import json
+import zlib
+from pathlib import Path
+
+import pytest
+
+from pydvpl.dvpl import compress_dvpl, decompress_dvpl, create_dvpl_footer, DVPL_TYPE_NONE
+
+
+# Outputs of compress_dvpl as it was before the parallel, streaming and mmap paths were added
+GOLDEN = json.loads((Path(__file__).parent / "data" / "golden_dvpl.json").read_text())
+
+
+@pytest.mark.parametrize("vector", GOLDEN["vectors"], ids=lambda vector: f"{vector['name']}-{vector['mode']}")
+def test_compress_matches_golden_vector(vector):
+    data = bytes.fromhex(vector["input"])
+    expected = bytes.fromhex(vector["output"])
+    assert compress_dvpl(data, vector["mode"]) == expected
+    assert decompress_dvpl(expected) == data
+
+
+def test_stored_payload_layout():
+    # Type NONE is the payload itself followed by a footer whose sizes match
+    data = b"already compressed \x89PNG"
+    expected = data + len(data).to_bytes(4, "little") * 2 + zlib.crc32(data).to_bytes(4, "little") + DVPL_TYPE_NONE.to_bytes(4, "little") + b"DVPL"
+    assert compress_dvpl(data, "none") == expected
+    assert create_dvpl_footer(len(data), len(data), zlib.crc32(data), DVPL_TYPE_NONE) == expected[len(data):]
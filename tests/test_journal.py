@@ -0,0 +1,108 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from pydvpl._pydvpl import unpack_dvpl
+from pydvpl.bundle import DVPLBundleWriter
+from pydvpl.journal import CommitQueue, Journal
+from pydvpl.journal import _journal as journal_module
+
+
+class RecordingQueue(CommitQueue):
+    # Records the order outputs are synced and journaled in, instead of timing it
+    def __init__(self, *args, events, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.events = events
+
+    def sync_outputs(self, batch):
+        self.events.append("sync_outputs")
+
+    def sync_directories(self, batch):
+        self.events.append("sync_directories")
+
+
+@pytest.mark.parametrize("fsync,synced", (("batch", "sync_outputs"), ("always", "sync_directories"), ("none", None)))
+@pytest.mark.parametrize("keep_originals", (True, False))
+def test_outputs_are_durable_before_they_are_journaled(tmp_path, fsync, synced, keep_originals):
+    src = tmp_path / "a.yaml"
+    src.write_bytes(b"a: 1\n")
+    (tmp_path / "a.yaml.dvpl").write_bytes(b"")
+    journal = Journal(str(tmp_path / ".pydvpl-journal"), str(tmp_path))
+    journal.begin("compress", [str(src)])
+
+    events = []
+    original_record = journal.record
+    journal.record = lambda *args: (events.append("record"), original_record(*args))
+    with RecordingQueue(fsync, keep_originals, journal, events=events) as committer:
+        committer.add(str(src), str(tmp_path / "a.yaml.dvpl"))
+    journal.close()
+
+    assert events == ([synced] if synced else []) + ["record"]
+    assert src.exists() == keep_originals
+
+
+def test_kept_originals_without_journal_skip_fsync(tmp_path):
+    events = []
+    with RecordingQueue("batch", True, None, events=events) as committer:
+        committer.add(str(tmp_path / "a.yaml"), str(tmp_path / "a.yaml.dvpl"))
+    assert events == []
+
+
+def test_resume_removes_temp_files_of_the_killed_run(tmp_path):
+    (tmp_path / "sub").mkdir()
+    src = tmp_path / "sub" / "a.yaml"
+    src.write_bytes(b"a: 1\n")
+    journal = Journal(str(tmp_path / ".pydvpl-journal"), str(tmp_path))
+    journal.begin("compress", [str(src)])
+    journal.close()
+    (tmp_path / "sub" / ".a.yaml.dvpl.100.200.pydvpl-tmp").write_bytes(b"partial")
+
+    pending, done = Journal(str(tmp_path / ".pydvpl-journal"), str(tmp_path)).resume("compress")
+    assert (pending, done) == ([str(src)], [])
+    assert sorted(os.listdir(tmp_path / "sub")) == ["a.yaml"]
+
+
+@pytest.mark.parametrize("fsync", ("batch", "always"))
+def test_unpack_deletes_the_bundle_after_its_entries_are_durable(tmp_path, monkeypatch, fsync):
+    bundle_path = tmp_path / "configs.dvplb"
+    with DVPLBundleWriter(str(bundle_path)) as writer:
+        writer.add("a.yaml", b"a: 1\n")
+        writer.add("sub/b.yaml", b"b: 1\n")
+
+    synced = []
+    # Without syncfs every output is fsynced on its own, which is what this test follows
+    monkeypatch.setattr(journal_module, "load_syncfs", lambda: None)
+    original_fsync_path = journal_module.fsync_path
+    monkeypatch.setattr(journal_module, "fsync_path", lambda path: (synced.append((path, bundle_path.exists())), original_fsync_path(path)))
+    config = SimpleNamespace(output=str(tmp_path / "out"), keep_originals=False, verbose=False, fsync=fsync)
+
+    assert unpack_dvpl(str(bundle_path), config) == (2, 0, 0)
+    assert not bundle_path.exists()
+    # Every directory, and with batch every output, is synced while the bundle still exists
+    assert {os.path.relpath(path, tmp_path) for path, _ in synced} >= {"out", os.path.join("out", "sub")}
+    if fsync == "batch":
+        assert {os.path.relpath(path, tmp_path) for path, _ in synced} >= {os.path.join("out", "a.yaml.dvpl"), os.path.join("out", "sub", "b.yaml.dvpl")}
+    assert all(existed for _, existed in synced)
+
+
+def test_batch_syncs_once_per_filesystem(tmp_path, monkeypatch):
+    syncfs = journal_module.load_syncfs()
+    if syncfs is None:
+        pytest.skip("syncfs is not available on this platform")
+    calls = []
+    monkeypatch.setattr(journal_module, "load_syncfs", lambda: lambda fd: calls.append(fd) or syncfs(fd))
+    monkeypatch.setattr(journal_module, "fsync_path", lambda path: calls.append(path))
+
+    batch = []
+    for number in range(20):
+        directory = tmp_path / f"d{number % 4}"
+        directory.mkdir(exist_ok=True)
+        src = directory / f"{number}.yaml"
+        src.write_bytes(b"x")
+        (directory / f"{number}.yaml.dvpl").write_bytes(b"x")
+        batch.append((str(src), str(directory / f"{number}.yaml.dvpl")))
+
+    CommitQueue("batch", keep_originals=False).commit(batch)
+    assert len(calls) == 1 and isinstance(calls[0], int)
+    assert not any(os.path.exists(src) for src, _ in batch)
@@ -0,0 +1,88 @@
+import json
+import os
+
+from pydvpl import DVPLOptions, iter_results
+from pydvpl.api import _api as api_module
+from pydvpl.dvpl import compress_dvpl_file, read_dvpl_file
+from pydvpl.manifest import DEFAULT_MANIFEST_NAME
+
+
+def run(path):
+    options = DVPLOptions(keep_originals=True, incremental=True)
+    results = iter_results(path, options)
+    return {os.path.basename(result.path): result.status for result in results if result.status != "ignored"}
+
+
+def entries(path):
+    with open(path / DEFAULT_MANIFEST_NAME, "r", encoding="utf-8") as f:
+        return json.load(f)["entries"]
+
+
+def bump_mtime(path):
+    src_stat = os.stat(path)
+    os.utime(path, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns + 10 ** 9))
+
+
+def test_unchanged_files_are_skipped(tmp_path):
+    (tmp_path / "a.yaml").write_bytes(b"a: 1\n")
+    (tmp_path / "b.txt").write_bytes(b"tank " * 100)
+
+    assert run(tmp_path) == {"a.yaml": "ok", "b.txt": "ok"}
+    assert run(tmp_path) == {"a.yaml": "skipped", "b.txt": "skipped"}
+
+    (tmp_path / "a.yaml").write_bytes(b"a: 2\n")
+    bump_mtime(tmp_path / "a.yaml")
+    assert run(tmp_path) == {"a.yaml": "ok", "b.txt": "skipped"}
+    assert read_dvpl_file(str(tmp_path / "a.yaml.dvpl")) == b"a: 2\n"
+
+
+def test_touched_file_falls_back_to_the_content_hash(tmp_path):
+    (tmp_path / "a.yaml").write_bytes(b"a: 1\n")
+    run(tmp_path)
+
+    bump_mtime(tmp_path / "a.yaml")
+    assert run(tmp_path) == {"a.yaml": "skipped"}
+    # The new mtime is recorded, so the next run does not hash again
+    assert entries(tmp_path)["a.yaml"]["mtime_ns"] == os.stat(tmp_path / "a.yaml").st_mtime_ns
+
+
+def test_output_with_another_footer_is_rebuilt(tmp_path):
+    (tmp_path / "a.yaml").write_bytes(b"a: 1\n")
+    (tmp_path / "other").write_bytes(b"b: 2\n")
+    run(tmp_path)
+
+    compress_dvpl_file(str(tmp_path / "other"), str(tmp_path / "a.yaml.dvpl"))
+    os.remove(tmp_path / "other")
+    os.remove(tmp_path / "other.dvpl")
+    assert run(tmp_path) == {"a.yaml": "ok"}
+    assert read_dvpl_file(str(tmp_path / "a.yaml.dvpl")) == b"a: 1\n"
+
+
+def test_full_run_prunes_entries_of_removed_sources(tmp_path):
+    (tmp_path / "a.yaml").write_bytes(b"a: 1\n")
+    (tmp_path / "b.yaml").write_bytes(b"b: 2\n")
+    run(tmp_path)
+    assert sorted(entries(tmp_path)) == ["a.yaml", "b.yaml"]
+
+    os.remove(tmp_path / "b.yaml")
+    assert run(tmp_path) == {"a.yaml": "skipped"}
+    assert sorted(entries(tmp_path)) == ["a.yaml"]
+
+
+def test_edit_during_compression_is_seen_on_the_next_run(tmp_path, monkeypatch):
+    (tmp_path / "a.yaml").write_bytes(b"a: 1\n")
+
+    def compress_then_edit(src_path, dst_path, **kwargs):
+        footer_data = compress_dvpl_file(src_path, dst_path, **kwargs)
+        # Same size, so only the recorded hash tells the two contents apart
+        with open(src_path, "wb") as f:
+            f.write(b"a: 2\n")
+        bump_mtime(src_path)
+        return footer_data
+
+    monkeypatch.setattr(api_module, "compress_dvpl_file", compress_then_edit)
+    assert run(tmp_path) == {"a.yaml": "ok"}
+    monkeypatch.undo()
+
+    assert run(tmp_path) == {"a.yaml": "ok"}
+    assert read_dvpl_file(str(tmp_path / "a.yaml.dvpl")) == b"a: 2\n"
@@ -0,0 +1,100 @@
+import time
+
+from pydvpl import DVPLOptions, iter_results
+from pydvpl.dedup import DedupIndex
+from pydvpl.metrics import RunMetrics, time_phase, PHASES
+
+
+def finish(metrics, path, seconds=0.0, error=None, **phases):
+    timings = metrics.start_file(path)
+    for name, phase_seconds in phases.items():
+        timings.add(name, phase_seconds)
+    timings.start = time.perf_counter() - seconds
+    return metrics.finish_file(timings, error)
+
+
+def test_time_phase_accumulates_per_file_and_per_run():
+    assert time_phase(None, "lz4").__enter__() is None
+
+    metrics = RunMetrics("compress")
+    timings = metrics.start_file("a.yaml")
+    for _ in range(3):
+        with time_phase(timings, "lz4"):
+            time.sleep(0.01)
+    with time_phase(timings, "write"):
+        pass
+    assert sorted(timings.phases) == ["lz4", "write"]
+    assert timings.phases["lz4"] >= 0.03
+
+    metrics.finish_file(timings)
+    finish(metrics, "b.yaml", lz4=1.0)
+    metrics.record_phase("fsync", 0.5)
+    metrics.record_walk(0.25)
+
+    phases = metrics.to_dict()["phases"]
+    assert list(phases) == list(PHASES)
+    assert phases["lz4"] >= 1.03
+    assert (phases["fsync"], phases["walk"]) == (0.5, 0.25)
+    assert phases["read"] == 0.0
+
+
+def test_only_the_slowest_files_are_kept():
+    metrics = RunMetrics(slowest=3)
+    for seconds in (5, 1, 9, 3, 7, 2, 8):
+        finish(metrics, f"{seconds}.yaml", seconds)
+
+    slowest = metrics.to_dict()["slowest"]
+    assert [entry["path"] for entry in slowest] == ["9.yaml", "8.yaml", "7.yaml"]
+    assert len(metrics.slowest_files) == 3
+
+    none_kept = RunMetrics(slowest=0)
+    finish(none_kept, "a.yaml", 1)
+    assert none_kept.to_dict()["slowest"] == []
+
+
+def test_errors_are_counted_by_kind():
+    metrics = RunMetrics()
+    finish(metrics, "b.dvpl", error=ValueError("DVPLCRC32Mismatch: stored 1, computed 2"))
+    finish(metrics, "a.dvpl", error=ValueError("DVPLCRC32Mismatch: stored 3, computed 4"))
+    finish(metrics, "c.dvpl", error=ValueError("not a kind prefix"))
+    finish(metrics, "d.dvpl", error=FileNotFoundError("d.dvpl"))
+    finish(metrics, "e.yaml.dvpl")
+
+    report = metrics.to_dict()
+    assert report["files"] == {"succeeded": 1, "failed": 4}
+    assert report["errors"] == {"DVPLCRC32Mismatch": 2, "FileNotFoundError": 1, "ValueError": 1}
+    assert [failure["path"] for failure in report["failures"]] == ["a.dvpl", "b.dvpl", "c.dvpl", "d.dvpl"]
+    assert report["failures"][0]["message"] == "DVPLCRC32Mismatch: stored 3, computed 4"
+    # Failed files do not count towards bytes or extensions
+    assert list(report["extensions"]) == [".yaml"]
+    assert [entry.get("error") for entry in sorted(report["slowest"], key=lambda entry: entry["path"])] == [
+        "DVPLCRC32Mismatch", "DVPLCRC32Mismatch", "ValueError", "FileNotFoundError", None]
+
+
+def test_hooks_see_every_finished_file():
+    seen = []
+    metrics = RunMetrics(hooks=[lambda timings: seen.append(("first", timings.path))])
+    metrics.add_hook(lambda timings: seen.append(("second", timings.path, timings.error)))
+
+    error = OSError("gone")
+    finish(metrics, "a.yaml")
+    finish(metrics, "b.yaml", error=error)
+    assert seen == [("first", "a.yaml"), ("second", "a.yaml", None), ("first", "b.yaml"), ("second", "b.yaml", error)]
+
+
+def test_run_report_has_the_dedup_section(tmp_path):
+    payload = b"tank " * 200
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (tmp_path / name).write_bytes(payload)
+    (tmp_path / "d.txt").write_bytes(b"unique")
+
+    metrics = RunMetrics("compress")
+    results = list(iter_results(tmp_path, DVPLOptions(keep_originals=True), metrics=metrics, dedup=DedupIndex("copy")))
+    assert [result.status for result in results] == ["ok"] * 4
+
+    report = metrics.to_dict()
+    assert report["files"] == {"succeeded": 4, "failed": 0}
+    assert report["bytes"]["in"] == 3 * len(payload) + len(b"unique")
+    assert report["dedup"] == {"method": "copy", "files": 2, "groups": 1, "bytes": 2 * len(payload), "disk_bytes": 0,
+                               "methods": {"copy": 2}}
+    assert report["phases"]["hash"] > 0
@@ -0,0 +1,110 @@
+import os
+import time
+import zlib
+
+import lz4.block
+import pytest
+
+from pydvpl.dvpl import compress_dvpl, decompress_dvpl, compress_dvpl_file, decompress_dvpl_file, stat_dvpl
+from pydvpl.footers import read_footers
+
+
+# Each hot path is timed against the raw lz4/zlib/os calls it wraps on the same machine, so the gates
+# hold on slow CI runners too. A path fails when it is more than MARGIN times slower than its baseline.
+MARGIN = float(os.environ.get("PYDVPL_PERF_MARGIN", "1.5"))
+REPEATS = 5
+pytestmark = [
+    pytest.mark.perf,
+    pytest.mark.skipif(bool(os.environ.get("PYDVPL_SKIP_PERF")), reason="PYDVPL_SKIP_PERF is set"),
+]
+
+
+def best_of(func, repeats=REPEATS):
+    # The minimum is the least noisy estimate of what the code itself costs
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def assert_within_margin(measured, baseline, what):
+    # A millisecond of slack keeps timer resolution from failing very fast paths
+    limit = baseline * MARGIN + 0.001
+    assert measured <= limit, f"{what} took {measured * 1000:.2f} ms, over {limit * 1000:.2f} ms ({MARGIN}x the raw {baseline * 1000:.2f} ms)"
+
+
+@pytest.fixture(scope="module")
+def large_payload(payload):
+    return payload(8 * 1024 * 1024, seed=1)
+
+
+@pytest.mark.parametrize("mode,lz4_mode", (("fast", "fast"), ("default", "default")))
+def test_compress_throughput(large_payload, mode, lz4_mode):
+    def raw():
+        block = lz4.block.compress(large_payload, store_size=False, mode=lz4_mode)
+        zlib.crc32(block)
+
+    assert_within_margin(best_of(lambda: compress_dvpl(large_payload, mode)), best_of(raw), f"compress_dvpl({mode})")
+
+
+def test_decompress_throughput(large_payload):
+    blob = compress_dvpl(large_payload)
+    block = blob[:-20]
+
+    def raw():
+        zlib.crc32(block)
+        lz4.block.decompress(block, uncompressed_size=len(large_payload))
+
+    assert_within_margin(best_of(lambda: decompress_dvpl(blob)), best_of(raw), "decompress_dvpl")
+
+
+@pytest.mark.parametrize("use_mmap", (True, False))
+def test_file_throughput(tmp_path, large_payload, use_mmap):
+    src = tmp_path / "asset.bin"
+    dst = tmp_path / "asset.bin.dvpl"
+    out = tmp_path / "asset.out"
+    raw_dst = tmp_path / "raw.dvpl"
+    src.write_bytes(large_payload)
+
+    def raw():
+        with open(src, "rb") as f:
+            data = f.read()
+        block = lz4.block.compress(data, store_size=False)
+        zlib.crc32(block)
+        with open(raw_dst, "wb") as f:
+            f.write(block)
+
+    def roundtrip():
+        compress_dvpl_file(str(src), str(dst), use_mmap=use_mmap)
+        decompress_dvpl_file(str(dst), str(out), use_mmap=use_mmap)
+
+    def raw_roundtrip():
+        raw()
+        with open(raw_dst, "rb") as f:
+            block = f.read()
+        zlib.crc32(block)
+        with open(out, "wb") as f:
+            f.write(lz4.block.decompress(block, uncompressed_size=len(large_payload)))
+
+    assert_within_margin(best_of(roundtrip), best_of(raw_roundtrip), f"file round trip (mmap={use_mmap})")
+
+
+def test_footer_table_throughput(tmp_path):
+    blob = compress_dvpl(b"footer" * 100)
+    paths = []
+    for number in range(2000):
+        path = tmp_path / f"{number}.dvpl"
+        path.write_bytes(blob)
+        paths.append(str(path))
+
+    def one_at_a_time():
+        for path in paths:
+            stat_dvpl(path)
+
+    assert_within_margin(best_of(lambda: check_rows(read_footers(paths))), best_of(one_at_a_time), "read_footers")
+
+
+def check_rows(table):
+    assert len(table) and not table.errors
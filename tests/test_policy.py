@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from pydvpl.chunked import compress_chunked_file
+from pydvpl.dvpl import compress_dvpl, compress_dvpl_file, read_dvpl_footer, resolve_compression, DVPL_TYPE_NONE
+from pydvpl.policy import choose_compression, compression_policy, parse_compression_overrides
+
+
+WORDS = (b"name", b"health", b"armor", b"speed", b"turret", b"gun", b"true", b"false", b": ", b"\n", b"0.25", b"1200")
+# Config-like text where HC saves a lot over default LZ4, and noise that LZ4 cannot shrink
+TEXT = b"".join(random.Random(2).choices(WORDS, k=40000))
+NOISE = random.Random(1).randbytes(200000)
+
+
+def test_overrides_take_precedence_over_the_default():
+    overrides = parse_compression_overrides("PNG=hc, .yaml=none,txt=auto")
+    assert overrides == {".png": "hc", ".yaml": "none", ".txt": "auto"}
+    assert choose_compression("pic.png", NOISE, overrides, default="auto") == "hc"
+    assert choose_compression("a.YAML", TEXT, overrides, default="fast") == "none"
+    assert choose_compression("a.txt", NOISE, overrides, default="fast") == "none"
+    assert choose_compression("a.sc2", TEXT, overrides, default="fast") == "fast"
+
+
+@pytest.mark.parametrize("spec", ("png", "png=zstd", "=hc,png"))
+def test_invalid_overrides_are_rejected(spec):
+    with pytest.raises(ValueError, match="Invalid compression override"):
+        parse_compression_overrides(spec)
+
+
+def test_auto_stores_known_formats_empty_and_incompressible_files():
+    assert choose_compression("pic.png", TEXT) == "none"
+    assert choose_compression("a.yaml", b"") == "none"
+    assert choose_compression("a.bin", NOISE) == "none"
+    assert choose_compression("a.yaml", TEXT) == "hc"
+
+
+def test_auto_thresholds_decide_between_store_default_and_hc():
+    # LZ4 never saves everything, so a store threshold of 1 always stores
+    assert choose_compression("a.yaml", TEXT, store_threshold=1.0) == "none"
+    # HC never saves the whole sample over default, so a threshold of 1 keeps default
+    assert choose_compression("a.yaml", TEXT, hc_threshold=1.0) == "default"
+    assert choose_compression("a.yaml", TEXT, hc_threshold=0.0) == "hc"
+
+
+def test_policy_is_a_plain_level_without_auto_or_overrides():
+    assert compression_policy("hc") == "hc"
+    assert callable(compression_policy("auto"))
+    assert compression_policy("fast", "png=none")("pic.png", NOISE) == "none"
+
+
+def test_plain_auto_is_resolved_through_the_policy():
+    assert resolve_compression("auto", "a.yaml", TEXT) == "hc"
+    assert resolve_compression("auto", "a.bin", NOISE) == "none"
+    assert resolve_compression("fast", "a.bin", NOISE) == "fast"
+    assert compress_dvpl(TEXT, "auto") == compress_dvpl(TEXT, "hc")
+    assert read_dvpl_footer(compress_dvpl(NOISE, "auto")).type == DVPL_TYPE_NONE
+
+
+def test_unknown_compression_types_are_rejected(tmp_path):
+    src_path = tmp_path / "a.yaml"
+    src_path.write_bytes(TEXT)
+    with pytest.raises(ValueError, match="Unknown compression type 'zstd'"):
+        compress_dvpl(TEXT, "zstd")
+    with pytest.raises(ValueError, match="Unknown compression type 'HC'"):
+        compress_dvpl_file(str(src_path), str(tmp_path / "a.yaml.dvpl"), "HC")
+    with pytest.raises(ValueError, match="Unknown compression type 'zstd'"):
+        compress_chunked_file(str(src_path), str(tmp_path / "a.yaml.dvpl"), "zstd")
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["a.yaml"]
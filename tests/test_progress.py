@@ -0,0 +1,119 @@
+import io
+import threading
+
+from pydvpl.progress import TerminalProgress, TTY_INTERVAL, PLAIN_INTERVAL
+from pydvpl.progress import _progress as progress_module
+
+
+class FakeStream(io.StringIO):
+    def __init__(self, tty=False):
+        super().__init__()
+        self.tty = tty
+
+    def isatty(self):
+        return self.tty
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+def lines(stream):
+    return stream.getvalue().splitlines()
+
+
+def test_interval_follows_the_stream():
+    assert TerminalProgress(FakeStream(tty=True)).interval == TTY_INTERVAL
+    assert TerminalProgress(FakeStream()).interval == PLAIN_INTERVAL
+    assert TerminalProgress(FakeStream(), interval=0.5).interval == 0.5
+
+
+def test_renders_at_most_once_per_interval(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(progress_module, "time", clock)
+    stream = FakeStream()
+    progress = TerminalProgress(stream, interval=1.0, total=100)
+
+    for _ in range(50):
+        progress.advance()
+    assert stream.getvalue() == ""
+
+    clock.now += 1.0
+    progress.advance()
+    for _ in range(10):
+        progress.advance()
+    assert lines(stream) == ["Processing: 51/100 files (51.00%) | Remaining time: 960 ms"]
+
+
+def test_plain_stream_gets_periodic_lines(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(progress_module, "time", clock)
+    stream = FakeStream()
+    progress = TerminalProgress(stream, interval=2.0, total=4)
+
+    for _ in range(4):
+        clock.now += 2.0
+        progress.advance()
+    assert lines(stream) == [
+        "Processing: 1/4 files (25.00%) | Remaining time: 6 s",
+        "Processing: 2/4 files (50.00%) | Remaining time: 4 s",
+        "Processing: 3/4 files (75.00%) | Remaining time: 2 s",
+        "Processing: 4/4 files (100.00%) | Remaining time: 0 ms",
+    ]
+    assert "\r" not in stream.getvalue() and "\033" not in stream.getvalue()
+
+
+def test_finish_always_renders_the_last_state(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(progress_module, "time", clock)
+    stream = FakeStream()
+    progress = TerminalProgress(stream, interval=60.0)
+    progress.start(3)
+
+    for _ in range(3):
+        progress.advance()
+    assert stream.getvalue() == ""
+
+    progress.finish()
+    progress.finish()
+    assert lines(stream) == ["Processing: 3/3 files (100.00%) | Remaining time: 0 ms"]
+
+
+def test_terminal_redraws_one_line():
+    stream = FakeStream(tty=True)
+    progress = TerminalProgress(stream, total=2)
+    progress.advance(2)
+    progress.finish()
+    frame = stream.getvalue()
+    assert frame.startswith("\rProcessing: [") and frame.endswith("\033[K")
+    assert "100.00%" in frame and "\n" not in frame
+
+
+def test_concurrent_advances_are_all_counted():
+    stream = FakeStream()
+    progress = TerminalProgress(stream, interval=0.0, total=8000)
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        for _ in range(1000):
+            progress.advance()
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    progress.finish()
+
+    assert progress.counter.value == 8000
+    # Frames are never interleaved, every write is one whole line
+    assert all(line.startswith("Processing: ") and "files" in line for line in lines(stream))
+    assert lines(stream)[-1].startswith("Processing: 8000/8000 files (100.00%)")
@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from pydvpl.dvpl import compress_dvpl
+from pydvpl.reader import DVPLReader
+
+
+def write_dvpl(path, data):
+    path.write_bytes(compress_dvpl(data))
+    return str(path)
+
+
+def test_byte_budget_evicts_least_recently_used(tmp_path):
+    a = write_dvpl(tmp_path / "a.dvpl", b"a" * 400)
+    b = write_dvpl(tmp_path / "b.dvpl", b"b" * 400)
+    c = write_dvpl(tmp_path / "c.dvpl", b"c" * 400)
+    reader = DVPLReader(max_bytes=1000)
+
+    reader.read(a)
+    reader.read(b)
+    # a becomes the most recently used, so c pushes b out
+    assert reader.read(a) == b"a" * 400
+    reader.read(c)
+
+    stats = reader.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["entries"], stats["bytes"]) == (1, 3, 1, 2, 800)
+    reader.read(a)
+    reader.read(b)
+    assert reader.stats()["misses"] == 4
+
+
+def test_payload_larger_than_the_budget_is_not_cached(tmp_path):
+    small = write_dvpl(tmp_path / "small.dvpl", b"s" * 100)
+    large = write_dvpl(tmp_path / "large.dvpl", b"l" * 2000)
+    reader = DVPLReader(max_bytes=1000)
+
+    reader.read(small)
+    assert reader.read(large) == b"l" * 2000
+    stats = reader.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (1, 100, 0)
+
+
+def test_rewritten_file_is_read_again(tmp_path):
+    path = tmp_path / "a.dvpl"
+    write_dvpl(path, b"old")
+    reader = DVPLReader()
+    assert reader.read(str(path)) == b"old"
+
+    stat = os.stat(path)
+    write_dvpl(path, b"new")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert reader.read(str(path)) == b"new"
+
+
+def test_crc_key_shares_identical_payloads(tmp_path):
+    a = write_dvpl(tmp_path / "a.dvpl", b"same" * 10)
+    b = write_dvpl(tmp_path / "b.dvpl", b"same" * 10)
+    reader = DVPLReader(key="crc")
+    reader.read(a)
+    reader.read(b)
+    assert (reader.stats()["hits"], reader.stats()["entries"]) == (1, 1)
+
+
+def test_unknown_cache_key_is_rejected():
+    with pytest.raises(ValueError, match="Unknown cache key"):
+        DVPLReader(key="mtime")
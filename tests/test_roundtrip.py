@@ -0,0 +1,115 @@
+import io
+import random
+
+import pytest
+
+from pydvpl.chunked import compress_chunked_file, decompress_chunked_file, verify_chunked_file, read_chunked_footer
+from pydvpl.dvpl import (
+    compress_dvpl,
+    decompress_dvpl,
+    compress_dvpl_file,
+    decompress_dvpl_file,
+    read_dvpl_file,
+    verify_dvpl_file,
+    compress_stream,
+    decompress_stream,
+    read_dvpl_footer,
+    DVPL_FOOTER_SIZE,
+    DVPL_TYPE_NONE,
+    DVPL_TYPE_LZ4,
+)
+from pydvpl.dvpl._dvpl import STREAM_CHUNK_SIZE
+
+
+MODES = ("fast", "default", "hc", "none")
+# Empty and single byte inputs, both sides of the LZ4 64 KiB window and the stream read size, and a large file
+EDGE_SIZES = (0, 1, 2, 15, 16, 17, 255, 256, 65535, 65536, 65537, STREAM_CHUNK_SIZE - 1, STREAM_CHUNK_SIZE + 1, 4 * 1024 * 1024 + 3)
+# Property-style cases: seeded random sizes, reproducible from the seed in the test id
+RANDOM_CASES = [(seed, random.Random(seed).randint(0, 256 * 1024)) for seed in range(24)]
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("size", EDGE_SIZES)
+def test_roundtrip_edge_sizes(payload, size, mode):
+    data = payload(size, seed=size)
+    dvpl = compress_dvpl(data, mode)
+
+    footer = read_dvpl_footer(dvpl)
+    assert footer.original_size == size
+    assert footer.compressed_size == len(dvpl) - DVPL_FOOTER_SIZE
+    assert footer.type == (DVPL_TYPE_NONE if mode == "none" else DVPL_TYPE_LZ4)
+    assert decompress_dvpl(dvpl) == data
+
+
+@pytest.mark.parametrize("seed,size", RANDOM_CASES)
+def test_roundtrip_random_sizes(payload, seed, size):
+    data = payload(size, seed=seed)
+    mode = MODES[seed % len(MODES)]
+    assert decompress_dvpl(compress_dvpl(data, mode)) == data
+
+
+@pytest.mark.parametrize("use_mmap", (True, False))
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("size", (0, 1, 65537, STREAM_CHUNK_SIZE + 1))
+def test_file_paths_match_in_memory_output(tmp_path, payload, size, mode, use_mmap):
+    data = payload(size, seed=size + 7)
+    src = tmp_path / "asset.bin"
+    dst = tmp_path / "asset.bin.dvpl"
+    out = tmp_path / "asset.out"
+    src.write_bytes(data)
+
+    compress_dvpl_file(str(src), str(dst), mode, use_mmap=use_mmap)
+    assert dst.read_bytes() == compress_dvpl(data, mode)
+    assert read_dvpl_file(str(dst), use_mmap=use_mmap) == data
+    assert verify_dvpl_file(str(dst), use_mmap=use_mmap).original_size == size
+
+    decompress_dvpl_file(str(dst), str(out), use_mmap=use_mmap)
+    assert out.read_bytes() == data
+
+
+class TrickleReader(io.RawIOBase):
+    # Returns short reads like a pipe does
+    def __init__(self, data, step):
+        self.data = memoryview(data)
+        self.step = step
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        chunk = self.data[:min(self.step, size if size >= 0 else self.step)].tobytes()
+        self.data = self.data[len(chunk):]
+        return chunk
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("size", (0, 1, STREAM_CHUNK_SIZE - 1, STREAM_CHUNK_SIZE + 1))
+def test_stream_paths_match_in_memory_output(payload, size, mode):
+    data = payload(size, seed=size + 11)
+    compressed = io.BytesIO()
+    compress_stream(TrickleReader(data, 65521), compressed, mode)
+    assert compressed.getvalue() == compress_dvpl(data, mode)
+
+    decompressed = io.BytesIO()
+    decompress_stream(TrickleReader(compressed.getvalue(), 4093), decompressed)
+    assert decompressed.getvalue() == data
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("size,block_size", ((0, 4096), (1, 4096), (4095, 4096), (4096, 4096), (4097, 4096), (300000, 65536)))
+@pytest.mark.parametrize("workers", (1, 3))
+def test_chunked_roundtrip(tmp_path, payload, size, block_size, mode, workers):
+    data = payload(size, seed=size + block_size)
+    src = tmp_path / "asset.bin"
+    dst = tmp_path / "asset.bin.dvpl"
+    out = tmp_path / "asset.out"
+    src.write_bytes(data)
+
+    written = compress_chunked_file(str(src), str(dst), mode, block_size=block_size, workers=workers)
+    footer = read_chunked_footer(str(dst))
+    assert written.blocks == footer.blocks
+    assert footer.original_size == size
+    assert len(footer.blocks) == -(-size // block_size)
+    verify_chunked_file(str(dst), workers=workers)
+    decompress_chunked_file(str(dst), str(out), workers=workers)
+    assert out.read_bytes() == data
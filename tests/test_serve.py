@@ -0,0 +1,97 @@
+import io
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from pydvpl.serve import DVPLServer
+
+
+def serve_lines(*requests):
+    reader = io.StringIO("".join(line + "\n" for line in requests))
+    writer = io.StringIO()
+    with DVPLServer() as server:
+        server.serve_stream(reader, writer)
+    return [json.loads(line) for line in writer.getvalue().splitlines()]
+
+
+def test_malformed_requests_get_error_replies(tmp_path):
+    asset = tmp_path / "a.yaml"
+    asset.write_bytes(b"a: 1\n")
+    replies = serve_lines(
+        '{"id": 1, "jobs": [1]}',
+        '{"id": 2, "jobs": null}',
+        '{"id": 3, "jobs": {"op": "verify"}}',
+        '[1]',
+        'not json',
+        json.dumps({"id": 4, "jobs": [{"op": "compress", "path": str(asset)}, {"op": "compress", "path": 5}]}),
+        '{"id": 5, "op": "ping"}',
+    )
+
+    assert [reply["id"] for reply in replies] == [1, 2, 3, None, None, 4, 5]
+    assert all(reply["error"] == "InvalidRequest" for reply in replies[:5])
+    assert [result["ok"] for result in replies[5]["results"]] == [True, False]
+    assert replies[6] == {"id": 5, "ok": True}
+
+
+def test_socket_path_that_is_not_a_socket_is_kept(tmp_path):
+    path = tmp_path / "server.sock"
+    path.write_text("keep")
+    with DVPLServer() as server, pytest.raises(FileExistsError):
+        server.serve_socket(str(path))
+    assert path.read_text() == "keep"
+
+
+def test_stale_socket_is_replaced(tmp_path):
+    path = str(tmp_path / "server.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+
+    with DVPLServer() as server:
+        thread = threading.Thread(target=server.serve_socket, args=(path,))
+        thread.start()
+        for _ in range(100):
+            try:
+                client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                client.connect(path)
+                break
+            except (ConnectionRefusedError, FileNotFoundError):
+                client.close()
+                time.sleep(0.05)
+        with client, client.makefile("rwb") as stream:
+            stream.write(b'{"id": 1, "op": "shutdown"}\n')
+            stream.flush()
+            assert json.loads(stream.readline())["shutdown"] is True
+        thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_live_socket_is_kept(tmp_path):
+    path = str(tmp_path / "server.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as live:
+        live.bind(path)
+        live.listen()
+        with DVPLServer() as server, pytest.raises(FileExistsError, match="already serving"):
+            server.serve_socket(path)
+
+        # The running server still accepts connections on its socket
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(path)
+
+
+def test_unknown_compression_and_level_are_rejected(tmp_path):
+    asset = tmp_path / "a.yaml"
+    asset.write_bytes(b"a: 1\n")
+    replies = serve_lines(
+        json.dumps({"id": 1, "jobs": [{"op": "compress", "path": str(asset), "compression": "bogus"}]}),
+        json.dumps({"id": 2, "jobs": [{"op": "compress", "path": str(asset), "compression": "hc"}]}),
+        json.dumps({"id": 3, "jobs": [{"op": "verify", "path": str(asset) + ".dvpl", "level": "quick"}]}),
+        json.dumps({"id": 4, "jobs": [{"op": "verify", "path": str(asset) + ".dvpl", "level": "crc"}]}),
+    )
+
+    assert [reply["ok"] for reply in replies] == [False, True, False, True]
+    assert "Unknown compression 'bogus'" in replies[0]["results"][0]["message"]
+    assert "Unknown verify level 'quick'" in replies[2]["results"][0]["message"]
@@ -0,0 +1,15 @@
+import os
+import subprocess
+import sys
+
+import pydvpl
+from pydvpl.bench._bench import STARTUP_FORBIDDEN_MODULES
+
+
+def test_import_keeps_heavy_modules_lazy():
+    # Run in a fresh interpreter, this one already has whatever the other tests imported
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(pydvpl.__file__)))
+    code = "import sys, pydvpl; print(','.join(sorted(sys.modules)))"
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env)
+    modules = set(completed.stdout.strip().split(","))
+    assert not sorted(modules.intersection(STARTUP_FORBIDDEN_MODULES))
@@ -0,0 +1,90 @@
+import os
+
+from pydvpl.dvpl import read_dvpl_file, stat_dvpl
+from pydvpl.sync import sync_trees, sync_file
+
+
+def write_tree(root, files):
+    for name, data in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+
+def test_prune_keeps_mirrors_of_ignored_sources(tmp_path):
+    src = tmp_path / "src"
+    dst = tmp_path / "dst"
+    write_tree(src, {"a.yaml": b"a: 1\n", "pic.png": b"\x89PNG image", "sub/b.txt": b"text"})
+    sync_trees(str(src), str(dst))
+    assert (dst / "pic.png.dvpl").exists()
+
+    # pic.png is still there, only ignored now; a.yaml is really gone
+    os.remove(src / "a.yaml")
+    summary = sync_trees(str(src), str(dst), ignore=".png", prune=True)
+
+    assert summary["pruned"] == 1
+    assert not (dst / "a.yaml.dvpl").exists()
+    assert read_dvpl_file(str(dst / "pic.png.dvpl")) == b"\x89PNG image"
+    assert read_dvpl_file(str(dst / "sub" / "b.txt.dvpl")) == b"text"
+
+
+def test_same_size_edit_with_older_mtime_is_resynced(tmp_path):
+    src = tmp_path / "src"
+    dst = tmp_path / "dst"
+    write_tree(src, {"a1.yaml": b"speed: 10\n", "a2.yaml": b"armor: 5\n"})
+    assert sync_trees(str(src), str(dst))["added"] == 2
+    assert sync_trees(str(src), str(dst))["unchanged"] == 2
+
+    # Same length, timestamp set back the way cp -p, rsync -t or tar x leave it
+    stat = os.stat(src / "a1.yaml")
+    (src / "a1.yaml").write_bytes(b"speed: 99\n")
+    os.utime(src / "a1.yaml", ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**9))
+
+    summary = sync_trees(str(src), str(dst))
+    assert (summary["updated"], summary["unchanged"]) == (1, 1)
+    assert read_dvpl_file(str(dst / "a1.yaml.dvpl")) == b"speed: 99\n"
+
+
+def test_compression_change_is_applied(tmp_path):
+    src = tmp_path / "src"
+    dst = tmp_path / "dst"
+    write_tree(src, {"a.txt": b"tank " * 2000})
+    sync_trees(str(src), str(dst), compression_type="default")
+
+    summary = sync_trees(str(src), str(dst), compression_type="none")
+    assert summary["updated"] == 1
+    assert os.path.getsize(dst / "a.txt.dvpl") == 10000 + 20
+    assert sync_trees(str(src), str(dst), compression_type="none")["unchanged"] == 1
+
+
+def test_tool_files_in_the_source_are_not_mirrored(tmp_path):
+    src = tmp_path / "src"
+    dst = tmp_path / "dst"
+    write_tree(src, {
+        "a.yaml": b"a: 1\n",
+        ".pydvpl-manifest.json": b"{}",
+        ".pydvpl-journal": b"{}\n",
+        "sub/.b.yaml.1.2.pydvpl-tmp": b"partial",
+    })
+
+    summary = sync_trees(str(src), str(dst), prune=True)
+    assert (summary["added"], summary["ignored"]) == (1, 3)
+    assert sorted(os.listdir(dst)) == [".pydvpl-manifest.json", "a.yaml.dvpl"]
+
+
+def test_mirror_with_the_same_footer_is_not_rewritten(tmp_path):
+    write_tree(tmp_path, {"a.yaml": b"a: 1\n" * 100})
+    src_path = str(tmp_path / "a.yaml")
+    dst_path = str(tmp_path / "out" / "a.yaml.dvpl")
+    assert sync_file(src_path, dst_path) == "added"
+    inode = os.stat(dst_path).st_ino
+
+    # Without a manifest the source is encoded again, but an identical footer leaves the mirror alone
+    assert sync_file(src_path, dst_path) == "unchanged"
+    assert os.stat(dst_path).st_ino == inode
+
+    write_tree(tmp_path, {"a.yaml": b"a: 2\n" * 100})
+    assert sync_file(src_path, dst_path) == "updated"
+    assert os.stat(dst_path).st_ino != inode
+    assert read_dvpl_file(dst_path) == b"a: 2\n" * 100
+    assert stat_dvpl(dst_path).original_size == 500
@@ -0,0 +1,50 @@
+import os
+
+from pydvpl.journal import DEFAULT_JOURNAL_NAME
+from pydvpl.manifest import DEFAULT_MANIFEST_NAME
+from pydvpl.walker import compile_ignore, collect_files, is_sidecar_path, SIDECAR_NAMES
+
+
+def test_sidecar_names_match_the_tool_defaults():
+    assert SIDECAR_NAMES == {DEFAULT_MANIFEST_NAME, DEFAULT_MANIFEST_NAME + ".tmp", DEFAULT_JOURNAL_NAME}
+    assert is_sidecar_path("assets/sub/.a.yaml.dvpl.10.20.pydvpl-tmp")
+    assert is_sidecar_path("assets/.pydvpl-journal")
+    assert not is_sidecar_path("assets/pydvpl-journal.yaml")
+
+
+def test_empty_entries_ignore_nothing():
+    # A trailing comma or stray spaces must not turn into a suffix every path ends with
+    for spec in ("", ",", " , ", ".exe,,"):
+        matcher = compile_ignore(spec)
+        assert not matcher("assets/a.yaml")
+    assert not compile_ignore(" , ")
+    assert compile_ignore(".exe,,")("bin/tool.exe")
+
+
+def test_plain_entries_match_suffixes():
+    matcher = compile_ignore(".exe, dll,test.txt,exe.dvpl")
+    assert matcher("bin/a.exe") and matcher("bin/a.dll") and matcher("src/test.txt") and matcher("bin/a.exe.dvpl")
+    assert not matcher("bin/a.exe.bak")
+    assert not matcher("src/test.txt.dvpl")
+
+
+def test_globs_match_the_name_or_the_whole_path():
+    matcher = compile_ignore("*.png,cache_*,maps/*.sc2")
+    assert matcher("ui/icons/tank.png")
+    assert matcher("data/cache_01.bin")
+    assert matcher("maps/desert.sc2")
+    assert not matcher("ui/icons/tank.png.dvpl")
+    assert not matcher("data/texture_cache.bin")
+    assert not matcher("other/desert.sc2")
+
+
+def test_collect_files_splits_work_from_ignored(tmp_path):
+    (tmp_path / "sub").mkdir()
+    for name in ("a.yaml", "b.png", "sub/c.yaml", "sub/d.yaml.dvpl"):
+        (tmp_path / name).write_bytes(b"x")
+    # Symlinked directories are not followed
+    (tmp_path / "loop").symlink_to(tmp_path)
+
+    work_files, ignored_files = collect_files(str(tmp_path), compile_ignore("*.png"), lambda path: not path.endswith(".dvpl"))
+    assert sorted(os.path.relpath(path, tmp_path) for path in work_files) == ["a.yaml", os.path.join("sub", "c.yaml")]
+    assert sorted(os.path.relpath(path, tmp_path) for path in ignored_files) == ["b.png", os.path.join("sub", "d.yaml.dvpl")]